@@ -1,6 +1,41 @@
-from .scotus import ScotusData, ConferenceReportVotes
-from .high_courts import HighCourt
-from .states import State, list_possible_states
+# Public names are resolved lazily (PEP 562) so that importing the package does not pull in
+# numpy, pandas or scipy; each submodule is imported on first access to one of its names.
+import importlib
 
-__all__ = ['ScotusData', 'ConferenceReportVotes', 'HighCourt',
-           'State', 'list_possible_states']
+# Public name -> submodule defining it.
+_EXPORTS = {
+    'ScotusData': 'scotus',
+    'ConferenceReportVotes': 'scotus',
+    'HighCourt': 'high_courts',
+    'State': 'states',
+    'list_possible_states': '_paths',
+    'scdb_paths': '_paths',
+    'CompactVotes': '_compact',
+    'SparseVotes': '_compact',
+    'pair_stats': 'vote_stats',
+    'natural_court_stats': 'vote_stats',
+    'cache_info': '_cache',
+    'clear_cache': '_cache',
+    'set_cache_memory': '_cache',
+    'share_votes': 'shared',
+    'attach_votes': 'shared',
+    'release_votes': 'shared',
+    'detach_votes': 'shared',
+
+    'load_states': 'aio',
+    'get_courts': 'aio',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module('.' + _EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,97 @@
+# ====================================================================================== #
+# Command-line entry point.
+#   python -m scotus build [TARGET ...] [--jobs N] [--force] [--year YEAR] [--dry-run]
+#   python -m scotus synth PATH [--scale S] [--seed N]
+#   python -m scotus bench [NAME ...] [--scale S] [--repeat N] [--json OUT] [--baseline B]
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import sys
+import argparse
+import logging
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m scotus')
+    parser.add_argument('--data-dir', help="Data directory (overrides SCOTUS_DATA_DIR).")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Rebuild cached data from raw sources.")
+    build.add_argument('targets', nargs='*',
+                       help="Targets to build (default: all with sources present).")
+    build.add_argument('-j', '--jobs', type=int, default=None,
+                       help="Worker processes (default: number of CPUs).")
+    build.add_argument('--force', action='store_true', help="Rebuild even if up to date.")
+    build.add_argument('--year', type=int, default=2024, help="SCDB release year.")
+    build.add_argument('--dry-run', action='store_true', help="Only show what would run.")
+    build.add_argument('--list', action='store_true', help="List targets and exit.")
+
+    synth = commands.add_parser('synth', help="Write a synthetic data directory.")
+    synth.add_argument('path', help="Directory to write.")
+    synth.add_argument('--scale', type=float, default=1, help="Size multiplier (default: 1).")
+    synth.add_argument('--seed', type=int, default=0)
+
+    bench = commands.add_parser('bench', help="Benchmark setup routines and accessors on "
+                                              "synthetic data.")
+    bench.add_argument('names', nargs='*', help="Benchmarks to run (default: all).")
+    bench.add_argument('--scale', type=float, default=1, help="Size multiplier (default: 1).")
+    bench.add_argument('--repeat', type=int, default=3, help="Timed runs per benchmark.")
+    bench.add_argument('--json', help="Write results to this file.")
+    bench.add_argument('--baseline', help="Results file to compare against.")
+    bench.add_argument('--tolerance', type=float, default=.2,
+                       help="Allowed fractional slowdown against the baseline.")
+    bench.add_argument('--list', action='store_true', help="List benchmarks and exit.")
+
+    args = parser.parse_args(argv)
+    if args.data_dir:
+        # Set before the data modules are imported so that workers see it too.
+        os.environ['SCOTUS_DATA_DIR'] = os.path.abspath(args.data_dir)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+
+    if args.command == 'synth':
+        from . import synthetic
+        for name, n in synthetic.generate(args.path, scale=args.scale, seed=args.seed).items():
+            print('%-8s %d cases' % (name, n))
+        return 0
+    if args.command == 'bench':
+        return _bench(args)
+
+    from . import _build
+
+    if args.list:
+        for name, t in _build.targets(args.year).items():
+            deps = ' (after %s)' % ', '.join(t.deps) if t.deps else ''
+            print('%-16s -> %s%s' % (name, ', '.join(t.outputs), deps))
+        return 0
+
+    status = _build.build(args.targets or None, jobs=args.jobs, force=args.force,
+                          year=args.year, dry_run=args.dry_run)
+    for name, s in status.items():
+        print('%-16s %s' % (name, s))
+    return 1 if any(s == 'failed' for s in status.values()) else 0
+
+
+def _bench(args):
+    import json
+    from . import bench
+
+    if args.list:
+        print('\n'.join(bench.BENCHMARKS))
+        return 0
+    # Benchmarks write caches, so they only use --data-dir when it is given explicitly.
+    results = bench.run(args.names or None, data_dir=args.data_dir, scale=args.scale,
+                        repeat=args.repeat)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = bench.compare(results, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print('REGRESSION %-36s %8.3fs -> %8.3fs' % (name, before, after))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# ====================================================================================== #
+# Build orchestrator for the setup_* routines. Each target declares the raw sources it
+# reads, the files it writes and the targets it depends on. Targets run in a process pool
+# as soon as their dependencies finish, and a target is skipped when its outputs exist and
+# its sources are unchanged since the last successful build (recorded in a manifest).
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import json
+import logging
+import importlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from ._config import DATADR
+from ._columnar import fingerprint
+
+log = logging.getLogger(__name__)
+
+MANIFEST_FILE = '.build_manifest.json'
+
+# module and function: setup routine (relative to this package) and its keyword arguments.
+# sources: paths relative to DATADR; a tuple groups alternatives of which one must exist.
+# outputs: paths relative to DATADR.
+Target = namedtuple('Target', ['module', 'function', 'kwargs', 'sources', 'outputs', 'deps'])
+
+
+def targets(year=2024):
+    """Build targets keyed by name.
+
+    Parameters
+    ----------
+    year : int, 2024
+        SCDB release built by the 'scdb' target.
+    """
+    hcjd = os.path.join('original_data_files', 'HCJD_%s.dta')
+    return {
+        'scdb': Target('scotus', 'setup_scdb', {'year': year},
+                       [f'SCDB_{year}_01_justiceCentered_Citation.csv'],
+                       [os.path.join('scotus_cache', str(year))], []),
+        'scdb-legacy': Target('scotus', 'setup_scdb', {'legacy': True},
+                              ['SCDB_Legacy_04_justiceCentered_Citation.csv'],
+                              [os.path.join('scotus_cache', 'legacy')], []),
+        'canada': Target('high_courts', 'setup_canada', {}, [hcjd % 'Canada'],
+                         ['canada_full_court_votes.cohorts'], []),
+        'australia': Target('high_courts', 'setup_australia', {}, [hcjd % 'Australia'],
+                            ['australian_full_court_votes.cohorts'], []),
+        'india': Target('high_courts', 'setup_india', {}, [hcjd % 'India'],
+                        ['india_full_court_votes.cohorts'], []),
+        'us-states': Target('states', 'setup_us_states', {},
+                            [('state_supreme_court_v2.p', 'state_supreme_court_v2.dta')],
+                            ['us_state_courts'], []),
+        'warren-votes': Target('scotus', 'setup_warren_votes', {'disp': False},
+                               ['vinwar_stata_EDL.xlsx.p'], ['warren_conf_votes.p'], []),
+        'warren-by-court': Target('scotus', 'setup_warren_votes_by_court', {},
+                                  ['warren_conf_votes.p', 'vinwar_stata_EDL.xlsx.p'],
+                                  ['warren_conf_votes_bycourt',
+                                   'warren_conf_votes_bycourt_natct.p'],
+                                  ['warren-votes']),
+    }
+
+
+def _source_fingerprints(target):
+    """Fingerprint of each existing source, or None if a required source is missing."""
+    fps = {}
+    for source in target.sources:
+        options = source if isinstance(source, tuple) else (source,)
+        present = [s for s in options if os.path.exists(os.path.join(DATADR, s))]
+        if not present:
+            return None
+        for s in present:
+            fps[s] = fingerprint(os.path.join(DATADR, s))
+    return fps
+
+
+def _load_manifest():
+    path = os.path.join(DATADR, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest):
+    path = os.path.join(DATADR, MANIFEST_FILE)
+    tmp = '%s.tmp-%d' % (path, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _run(module, function, kwargs):
+    """Run one setup routine; executed in a worker process."""
+    logging.basicConfig(level=logging.INFO)
+    mod = importlib.import_module('.' + module, __package__)
+    getattr(mod, function)(**kwargs)
+
+
+def _ordered(names, graph):
+    """names plus all their dependencies, dependencies first."""
+    out = []
+
+    def visit(name, path):
+        if name in path:
+            raise ValueError("Dependency cycle through %r." % name)
+        if name not in graph:
+            raise ValueError("Unknown build target %r." % name)
+        for d in graph[name].deps:
+            visit(d, path + (name,))
+        if name not in out:
+            out.append(name)
+    for name in names:
+        visit(name, ())
+    return out
+
+
+def build(names=None, jobs=None, force=False, year=2024, dry_run=False):
+    """Build the requested targets and their dependencies.
+
+    Parameters
+    ----------
+    names : list of str, None
+        Targets to build. By default every target whose sources are present.
+    jobs : int, None
+        Number of worker processes; defaults to the number of CPUs.
+    force : bool, False
+        Rebuild targets even if they are up to date.
+    year : int, 2024
+        SCDB release for the 'scdb' target.
+    dry_run : bool, False
+        Only report what would be built.
+
+    Returns
+    -------
+    dict
+        Target name -> 'built', 'up to date', 'missing sources', 'failed' or 'skipped'
+        (a dependency failed); with dry_run, 'would build' replaces 'built'.
+    """
+    graph = targets(year)
+    if names is None:
+        names = [n for n, t in graph.items() if _source_fingerprints(t) is not None]
+        names += [n for n, t in graph.items()
+                  if n not in names and t.deps and all(d in names for d in t.deps)]
+    order = _ordered(names, graph)
+    manifest = _load_manifest()
+    key = {n: (f'{n}:{year}' if n == 'scdb' else n) for n in order}
+
+    status = {}
+    rebuilt = set()
+
+    def stale(name):
+        t = graph[name]
+        if force or rebuilt.intersection(t.deps):
+            return True
+        outputs_exist = all(os.path.exists(os.path.join(DATADR, o)) for o in t.outputs)
+        return not outputs_exist or manifest.get(key[name]) != _source_fingerprints(t)
+
+    def ready(name):
+        return all(status.get(d) in ('built', 'up to date', 'would build')
+                   for d in graph[name].deps)
+
+    pending = list(order)
+    running = {}
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = graph[name].deps
+                if any(status.get(d) in ('failed', 'skipped', 'missing sources') for d in deps):
+                    status[name] = 'skipped'
+                    pending.remove(name)
+                elif ready(name):
+                    pending.remove(name)
+                    t = graph[name]
+                    if _source_fingerprints(t) is None and not (dry_run and deps):
+                        log.warning("%s: missing sources %s.", name, t.sources)
+                        status[name] = 'missing sources'
+                    elif not stale(name):
+                        status[name] = 'up to date'
+                    elif dry_run:
+                        status[name] = 'would build'
+                        rebuilt.add(name)
+                    else:
+                        log.info("Building %s...", name)
+                        running[pool.submit(_run, t.module, t.function, t.kwargs)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    future.result()
+                except Exception:
+                    log.exception("%s failed.", name)
+                    status[name] = 'failed'
+                    continue
+                status[name] = 'built'
+                rebuilt.add(name)
+                manifest[key[name]] = _source_fingerprints(graph[name])
+                _save_manifest(manifest)
+    return status
@@ -0,0 +1,178 @@
+# ====================================================================================== #
+# Process-wide cache of loaded court data shared by all the data wrappers. Entries are
+# keyed by a file's path and the options it was loaded with, and are only returned while
+# the file's size and modification time match those at load time, so rebuilt files are
+# read afresh. The least recently used entries are dropped beyond a memory budget.
+# Values are handed out as read-only views: arrays are frozen when they are cached, and
+# containers and DataFrames are shallow-copied on each access, so callers can rebind
+# entries or (under pandas copy-on-write) modify frames without reaching the cached copy.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import threading
+from collections import OrderedDict
+
+from ._config import CACHE_MAX_MEMORY
+from .profiling import size_of
+
+
+def _freeze(value):
+    """Mark every array reachable through containers as read-only."""
+    if hasattr(value, 'setflags') and hasattr(value, 'flags'):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+
+
+def _view(value):
+    """Shallow copy of containers and DataFrames, down to the (read-only) arrays."""
+    if isinstance(value, dict):
+        return {k: _view(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_view(v) for v in value]
+    if type(value) is tuple:
+        return tuple(_view(v) for v in value)
+    if hasattr(value, 'columns') and hasattr(value, 'copy'):
+        return value.copy(deep=False)
+    return value
+
+
+class LoadCache():
+    """Thread-safe LRU cache of loaded files, bounded by an estimate of the bytes held."""
+    def __init__(self, max_memory=CACHE_MAX_MEMORY):
+        """
+        Parameters
+        ----------
+        max_memory : int, CACHE_MAX_MEMORY
+            Budget in bytes. Values larger than the budget are returned but not cached; 0
+            disables caching.
+        """
+        self.max_memory = max_memory
+        # (path, options) -> (version, value, nbytes), least recently used first
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        # Per-key [lock, (version, value)] so that concurrent misses on one file load it
+        # once, even when the value is too large to be cached.
+        self._loading = {}
+        self.hits = self.misses = 0
+
+    def get(self, path, load, options=(), version_path=None, version=None):
+        """Value of load() for the current version of a file, loaded at most once per
+        version. If the file to version by does not exist, load() is called uncached, so
+        that it can fall back to another source or raise for the file it reads.
+
+        Parameters
+        ----------
+        path : str
+        load : callable
+            Called without arguments on a miss.
+        options : hashable, ()
+            Anything else that determines the value, e.g. the loader's name and arguments.
+        version_path : str, None
+            File whose size and modification time version the entry. Defaults to path;
+            e.g. the header of a columnar table directory.
+        version : tuple, None
+            Version of the data load() reads, e.g. the header fingerprint of an already
+            opened store, used instead of the current one of version_path.
+
+        Returns
+        -------
+        object
+            Read-only view of the value.
+        """
+        key = (os.path.abspath(path), options)
+        if version is None:
+            try:
+                st = os.stat(version_path or path)
+            except FileNotFoundError:
+                return load()
+            version = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _view(entry[1])
+            loading = self._loading.setdefault(key, [threading.Lock(), None])
+
+        try:
+            with loading[0]:
+                with self._lock:
+                    for entry in (self._entries.get(key), loading[1]):
+                        if entry is not None and entry[0] == version:
+                            self.hits += 1
+                            return _view(entry[1])
+                    self.misses += 1
+
+                value = load()
+                _freeze(value)
+                loading[1] = (version, value)
+                self._put(key, version, value)
+        finally:
+            with self._lock:
+                if self._loading.get(key) is loading:
+                    del self._loading[key]
+        return _view(value)
+
+    def _put(self, key, version, value):
+        nbytes = size_of(value) or 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[2]
+            if self.max_memory <= 0 or nbytes > self.max_memory:
+                return
+            self._entries[key] = (version, value, nbytes)
+            self._nbytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        while self._nbytes > self.max_memory and self._entries:
+            self._nbytes -= self._entries.popitem(last=False)[1][2]
+
+    def resize(self, max_memory):
+        """Change the budget, evicting entries as needed."""
+        with self._lock:
+            self.max_memory = max_memory
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = self.misses = 0
+
+    def info(self):
+        """dict of 'entries', 'nbytes', 'max_memory', 'hits' and 'misses'."""
+        with self._lock:
+            return {'entries': len(self._entries), 'nbytes': self._nbytes,
+                    'max_memory': self.max_memory, 'hits': self.hits, 'misses': self.misses}
+
+
+# The cache shared by every loader in the package.
+SHARED_CACHE = LoadCache()
+
+
+def cached(path, load, options=(), version_path=None, version=None):
+    """SHARED_CACHE.get. See LoadCache.get."""
+    return SHARED_CACHE.get(path, load, options, version_path, version)
+
+
+def cache_info():
+    """Size and hit statistics of the shared cache of loaded data."""
+    return SHARED_CACHE.info()
+
+
+def clear_cache():
+    """Drop every entry of the shared cache of loaded data."""
+    SHARED_CACHE.clear()
+
+
+def set_cache_memory(max_memory):
+    """Set the memory budget in bytes of the shared cache of loaded data (0 disables it)."""
+    SHARED_CACHE.resize(max_memory)
@@ -0,0 +1,169 @@
+# ====================================================================================== #
+# Random-access store of natural-court cohorts, one file per country. The file starts with
+# a JSON index of the cohorts (justice labels, vote counts, array type and byte offset)
+# followed by each cohort's vote matrix as raw, aligned bytes. Readers map the file once
+# and slice cohorts out on demand, so fetching one cohort reads only its pages.
+# Stores are written to a temporary sibling and renamed into place, so readers polling the
+# path during a rebuild see either the old or the new file, never a partial one, and a
+# reader that has opened a store keeps reading the version it opened.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import json
+import mmap
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'SCOHORTS'
+FORMAT_VERSION = 1
+# Vote arrays start on multiples of this many bytes.
+_ALIGN = 64
+# Magic, then the byte length of the JSON index as a little-endian uint64.
+_PREFIX = struct.Struct('<8sQ')
+
+
+def _aligned(n):
+    return -(-n // _ALIGN) * _ALIGN
+
+
+def _label(j):
+    """Justice label as a JSON value of the same type (numpy scalars become Python ones)."""
+    j = j.item() if isinstance(j, np.generic) else j
+    if not isinstance(j, (str, int, float)):
+        raise ValueError("Justice labels must be strings or numbers, not %r." % (j,))
+    return j
+
+
+def same_justices(a, b):
+    """True if two lists of justice labels name the same justices, in any order."""
+    a, b = [_label(j) for j in a], [_label(j) for j in b]
+    return len(a) == len(b) and set(a) == set(b)
+
+
+def write_cohorts(path, courts):
+    """Write natural-court vote sets as a cohort store, atomically replacing any existing
+    file at path.
+
+    Parameters
+    ----------
+    path : str
+    courts : list of dict
+        Each with 'justices' (list of string or numeric labels, read back with the same
+        types) and 'votes' (cases x justices array), as returned by full_court_vote_sets.
+    """
+    entries = []
+    arrays = []
+    offset = 0
+    for court in courts:
+        votes = np.ascontiguousarray(court['votes'])
+        if votes.dtype == object:
+            raise ValueError("Cohort votes must have a numeric type.")
+        if votes.ndim != 2 or votes.shape[1] != len(court['justices']):
+            raise ValueError("Cohort votes must have one column per justice.")
+        entries.append({'justices': [_label(j) for j in court['justices']],
+                        'dtype': votes.dtype.str, 'shape': list(votes.shape),
+                        'offset': offset})
+        arrays.append(votes)
+        offset = _aligned(offset + votes.nbytes)
+    header = json.dumps({'format': FORMAT_VERSION, 'cohorts': entries}).encode()
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix=os.path.basename(path) + '.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, len(header)))
+            f.write(header)
+            start = _aligned(_PREFIX.size + len(header))
+            for entry, votes in zip(entries, arrays):
+                f.seek(start + entry['offset'])
+                f.write(votes.tobytes())
+            f.truncate(start + offset)
+            # The data must be on disk before the rename makes it visible, or a crash could
+            # leave an empty store in place of the old one.
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _fsync_dir(dirname)
+
+
+def _fsync_dir(dirname):
+    """Persist a rename in dirname, where the platform allows syncing directories."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(dirname, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CohortStore():
+    """Read access to a store written by write_cohorts. Only the index is read on
+    construction; the file is memory-mapped and each cohort's votes are read-only views of
+    the map.
+    """
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError("%s is not a cohort store." % path)
+            header = json.loads(f.read(length))
+            if header.get('format') != FORMAT_VERSION:
+                raise ValueError("Unsupported cohort store format in %s." % path)
+            # Mapping the open file pins this version even if the path is replaced.
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._start = _aligned(_PREFIX.size + length)
+        self._entries = header['cohorts']
+
+    def __len__(self):
+        return len(self._entries)
+
+    def index(self):
+        """Table of the cohorts.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per cohort with 'justices' (tuple of labels), 'n_justices', 'n_votes'
+            and 'offset' (byte position of its votes in the file).
+        """
+        return pd.DataFrame({
+            'justices': [tuple(e['justices']) for e in self._entries],
+            'n_justices': [e['shape'][1] for e in self._entries],
+            'n_votes': [e['shape'][0] for e in self._entries],
+            'offset': [self._start + e['offset'] for e in self._entries]})
+
+    def find(self, justices):
+        """Position of the cohort made up of exactly the given justices, in any order."""
+        for i, e in enumerate(self._entries):
+            if same_justices(e['justices'], justices):
+                return i
+        raise ValueError("No cohort of justices %s." % list(justices))
+
+    def cohort(self, i):
+        """Cohort i as a dict of 'justices' and read-only, memory-mapped 'votes'."""
+        e = self._entries[i]
+        shape = tuple(e['shape'])
+        votes = np.frombuffer(self._map, dtype=np.dtype(e['dtype']), count=shape[0] * shape[1],
+                              offset=self._start + e['offset']).reshape(shape)
+        return {'justices': list(e['justices']), 'votes': votes}
+
+    def courts(self, indices=None):
+        """Cohorts at the given positions (all by default), as a list of cohort dicts."""
+        if indices is None:
+            indices = range(len(self))
+        return [self.cohort(i) for i in indices]
@@ -0,0 +1,493 @@
+# ====================================================================================== #
+# Columnar on-disk tables shared by the data wrappers. A table is a directory holding one
+# raw binary file per column plus a JSON header (meta.json) that records each column's
+# compact encoding; category dictionaries live in per-column sidecar files so the header
+# stays small. Columns are memory-mapped and decoded only when requested. Tables are
+# either written whole from a DataFrame (write_table) or streamed chunk by chunk against a
+# declared schema (TableWriter, ingest_csv). Each write fills a new version subdirectory
+# and then atomically replaces the header, which names the current version, so readers see
+# either the previous table or the new one (see publish_dir).
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import json
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ._paths import META_FILE
+
+FORMAT_VERSION = 2
+
+# Name prefixes of published version subdirectories and of those still being written.
+_VERSION_PREFIX = 'v-'
+_PENDING_PREFIX = 'tmp-'
+
+# Integer storage types tried, smallest first, when narrowing a numeric column.
+_INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+# Rough ratio of peak parser memory to the in-memory size of a parsed chunk, used to turn a
+# memory budget into a chunk size.
+_PARSE_OVERHEAD = 3
+
+
+def fingerprint(path):
+    """Cheap identity of a source file used to decide whether a cache is stale."""
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _smallest_int(lo, hi, reserve_sentinel=False):
+    """Smallest integer type holding [lo, hi], optionally keeping its minimum free."""
+    for t in _INT_TYPES:
+        info = np.iinfo(t)
+        if (info.min + reserve_sentinel) <= lo and hi <= info.max:
+            return np.dtype(t)
+    raise OverflowError("Values do not fit in int64.")
+
+
+def _code_type(n_categories):
+    """Signed integer type for category codes (with -1 marking a missing value)."""
+    return _smallest_int(-1, max(n_categories - 1, 0))
+
+
+def nullable_codes(x):
+    """Float array of integer codes (NaN where missing) as a pandas nullable integer array
+    of the narrowest type. Arrays with non-integral values are returned unchanged.
+    """
+    missing = np.isnan(x)
+    cast = x[~missing]
+    if cast.size and ((cast != np.round(cast)).any() or np.abs(cast).max() >= 2**62):
+        return x
+    t = _smallest_int(cast.min(), cast.max()) if cast.size else np.dtype(np.int8)
+    return pd.arrays.IntegerArray(np.where(missing, 0, x).astype(t), missing)
+
+
+def _encode_column(values):
+    """Choose a compact encoding for one column.
+
+    Parameters
+    ----------
+    values : pd.Series
+
+    Returns
+    -------
+    dict
+        Column spec (encoding and the fields needed to decode it).
+    ndarray
+        Array to write to disk.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.values
+        categories = [str(c) for c in values.cat.categories]
+        return ({'encoding': 'category', 'dtype': _code_type(len(categories)).str,
+                 'categories': categories},
+                codes.astype(_code_type(len(categories))))
+
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return {'encoding': 'plain', 'dtype': np.dtype(bool).str}, values.values.astype(bool)
+
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        x = values.values.astype('datetime64[ns]').view(np.int64)
+        return {'encoding': 'datetime', 'dtype': np.dtype(np.int64).str}, x
+
+    if pd.api.types.is_integer_dtype(values.dtype):
+        x = values.values
+        t = _smallest_int(x.min(), x.max()) if x.size else np.dtype(np.int8)
+        return {'encoding': 'plain', 'dtype': t.str}, x.astype(t)
+
+    if pd.api.types.is_float_dtype(values.dtype):
+        x = values.values.astype(float)
+        missing = np.isnan(x)
+        cast = x[~missing]
+        if cast.size and (cast == np.round(cast)).all() and np.abs(cast).max() < 2**62:
+            # Integer codes stored as float only because of NaN: keep them as narrow ints
+            # with the type's minimum reserved for NaN.
+            t = _smallest_int(cast.min(), cast.max(), reserve_sentinel=True)
+            sentinel = int(np.iinfo(t).min)
+            out = np.full(x.size, sentinel, dtype=t)
+            out[~missing] = cast
+            return {'encoding': 'intna', 'dtype': t.str, 'sentinel': sentinel}, out
+        return {'encoding': 'plain', 'dtype': np.dtype(float).str}, x
+
+    # Anything else (strings, mixed objects) is stored as categorical codes.
+    values = values.astype(object)
+    present = values.notna().values
+    values[present] = values[present].astype(str)
+    codes, categories = pd.factorize(values, sort=True)
+    categories = [str(c) for c in categories]
+    return ({'encoding': 'category', 'dtype': _code_type(len(categories)).str,
+             'categories': categories},
+            codes.astype(_code_type(len(categories))))
+
+
+def _write_categories(dirname, spec, categories):
+    """Move a column's category dictionary out of its spec into a NUL-separated file."""
+    spec['categories_file'] = spec['file'][:-len('.bin')] + '.cat'
+    spec['n_categories'] = len(categories)
+    with open(os.path.join(dirname, spec['categories_file']), 'w', encoding='utf-8') as f:
+        f.write('\0'.join(categories))
+
+
+def _read_categories(dirname, spec):
+    if spec['n_categories'] == 0:
+        return []
+    with open(os.path.join(dirname, spec['categories_file']), encoding='utf-8') as f:
+        return f.read().split('\0')
+
+
+def write_table(path, df, meta=None):
+    """Write a DataFrame as a columnar table directory, replacing any existing one.
+
+    The columns are written into a new version subdirectory that is published with
+    publish_dir, so readers never observe a half-written table.
+
+    Parameters
+    ----------
+    path : str
+        Table directory.
+    df : pd.DataFrame
+    meta : dict, None
+        Extra JSON-serializable fields stored in the header (e.g. source fingerprint).
+    """
+    version = version_dir(path)
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            spec, x = _encode_column(df[name])
+            spec['name'] = str(name)
+            spec['file'] = 'c%03d.bin' % i
+            np.ascontiguousarray(x).tofile(os.path.join(version, spec['file']))
+            if 'categories' in spec:
+                _write_categories(version, spec, spec.pop('categories'))
+            columns.append(spec)
+        header = {'format': FORMAT_VERSION, 'nrows': len(df), 'columns': columns,
+                  'meta': meta or {}}
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+    publish_dir(path, version, META_FILE, header)
+
+
+def version_dir(path):
+    """Create an empty version subdirectory of the store directory path (created if
+    needed) for a writer to fill and then pass to publish_dir.
+    """
+    os.makedirs(path, exist_ok=True)
+    return tempfile.mkdtemp(dir=path, prefix=_PENDING_PREFIX)
+
+
+def publish_dir(path, version, header_file, header):
+    """Make a filled version subdirectory the current contents of the store directory
+    path.
+
+    The header, with its 'data' field naming the version, is written to a temporary file
+    and os.replace()d onto path/header_file, so a reader opening the header sees either
+    the previous store or the new one, complete. The previous version is kept for readers
+    that opened it before the swap and map its files later; older versions, and the files
+    of a store written before versioning, are removed. On failure the version is discarded
+    and the current store is left untouched.
+
+    Parameters
+    ----------
+    path : str
+        Store directory.
+    version : str
+        Directory returned by version_dir, holding the new data files.
+    header_file : str
+        Name of the JSON header in path.
+    header : dict
+        JSON-serializable header. Readers find the data files in data_dir(path, header).
+    """
+    name = _VERSION_PREFIX + os.path.basename(version)[len(_PENDING_PREFIX):]
+    header_path = os.path.join(path, header_file)
+    tmp = None
+    try:
+        previous = None
+        if os.path.isfile(header_path):
+            with open(header_path) as f:
+                previous = json.load(f).get('data', '')
+        os.rename(version, os.path.join(path, name))
+        version = os.path.join(path, name)
+
+        fd, tmp = tempfile.mkstemp(dir=path, prefix=_PENDING_PREFIX, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(header, data=name), f)
+        os.replace(tmp, header_path)
+    except BaseException:
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+
+    for entry in os.listdir(path):
+        full = os.path.join(path, entry)
+        if entry.startswith(_VERSION_PREFIX) and entry not in (name, previous):
+            shutil.rmtree(full, ignore_errors=True)
+        elif (previous == '' and entry != header_file and os.path.isfile(full) and
+              not entry.startswith(_PENDING_PREFIX)):
+            os.remove(full)
+
+
+def data_dir(path, header):
+    """Directory holding the data files of a store published with publish_dir (path itself
+    for stores written before versioning).
+    """
+    return os.path.join(path, header.get('data', ''))
+
+
+class ColumnStore():
+    """Read access to a table written by write_table. Only the header is read on
+    construction; each column is memory-mapped on first access.
+    """
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            Table directory.
+        """
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            header = json.load(f)
+            st = os.fstat(f.fileno())
+        # Size and modification time of the header read, identifying this version of the
+        # table (as LoadCache versions entries).
+        self.version = (st.st_size, st.st_mtime_ns)
+        if header.get('format') != FORMAT_VERSION:
+            raise ValueError("Unsupported columnar table format in %s." % path)
+        self._dir = data_dir(path, header)
+        self.nrows = header['nrows']
+        self.meta = header['meta']
+        self._specs = {c['name']: c for c in header['columns']}
+        self._categories = {}
+        self.columns = [c['name'] for c in header['columns']]
+
+    @classmethod
+    def is_table(cls, path):
+        return os.path.isfile(os.path.join(path, META_FILE))
+
+    def raw(self, name, start=None, stop=None):
+        """Stored (encoded) values of a column, or of rows [start, stop), as a read-only
+        memory-mapped array.
+        """
+        spec = self._specs[name]
+        dtype = np.dtype(spec['dtype'])
+        if self.nrows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self._dir, spec['file']), dtype=dtype, mode='r',
+                         shape=(self.nrows,))[start:stop]
+
+    def categories(self, name):
+        """Categorical dtype of a categorical column, read and validated once."""
+        if name not in self._categories:
+            self._categories[name] = pd.CategoricalDtype(
+                _read_categories(self._dir, self._specs[name]))
+        return self._categories[name]
+
+    def column(self, name, start=None, stop=None):
+        """Decoded column, or rows [start, stop) of it, as a pd.Series."""
+        spec = self._specs[name]
+        x = self.raw(name, start, stop)
+        encoding = spec['encoding']
+        if encoding == 'category':
+            values = pd.Categorical.from_codes(np.asarray(x), dtype=self.categories(name),
+                                               validate=False)
+        elif encoding == 'intna' and spec.get('has_missing', True):
+            values = x.astype(float)
+            values[x == spec['sentinel']] = np.nan
+        elif encoding == 'datetime':
+            values = np.asarray(x).view('datetime64[ns]')
+        else:
+            values = np.asarray(x)
+        return pd.Series(values, name=name)
+
+    def to_frame(self, columns=None, start=None, stop=None):
+        """Decode the given columns (all by default), optionally only rows [start, stop),
+        into a DataFrame.
+        """
+        if columns is None:
+            columns = self.columns
+        return pd.DataFrame({name: self.column(name, start, stop) for name in columns})
+
+
+class TableWriter():
+    """Stream DataFrame chunks into a columnar table with a declared schema.
+
+    Schema values are 'category' (strings, stored as codes), 'datetime' (parsed with
+    date_format), 'float64', or an integer type name ('int8', 'int16', ...) for integer
+    codes that may be missing. Columns absent from the schema are stored as categories.
+    Category codes are re-sorted and narrowed when the writer is closed, so nothing but
+    the category dictionaries is held in memory across chunks.
+
+    As a context manager, the writer is closed on success and aborted on an exception.
+    """
+    def __init__(self, path, schema, meta=None, date_format=None):
+        """
+        Parameters
+        ----------
+        path : str
+            Destination table directory. It is only replaced once close() succeeds.
+        schema : dict
+            Column name -> storage type (see class docstring).
+        meta : dict, None
+            Extra JSON-serializable header fields.
+        date_format : str, None
+            strftime format of 'datetime' columns.
+        """
+        self.path = path
+        self.schema = schema
+        self.meta = meta or {}
+        self.date_format = date_format
+        self.nrows = 0
+        self._tmp = version_dir(path)
+        self._specs = None
+        self._categories = {}
+
+    def _start(self, columns):
+        self._specs = []
+        for i, name in enumerate(columns):
+            kind = self.schema.get(name, 'category')
+            spec = {'name': str(name), 'file': 'c%03d.bin' % i}
+            if kind == 'category':
+                spec.update(encoding='category', dtype=np.dtype(np.int32).str)
+                self._categories[name] = {}
+            elif kind == 'datetime':
+                spec.update(encoding='datetime', dtype=np.dtype(np.int64).str)
+            elif kind == 'float64':
+                spec.update(encoding='plain', dtype=np.dtype(float).str)
+            else:
+                t = np.dtype(kind)
+                spec.update(encoding='intna', dtype=t.str, sentinel=int(np.iinfo(t).min),
+                            has_missing=False)
+            self._specs.append(spec)
+
+    def append(self, df):
+        """Encode one chunk and append it to the column files."""
+        if self._specs is None:
+            self._start(df.columns)
+        for spec in self._specs:
+            x = self._encode(spec, df[spec['name']])
+            with open(os.path.join(self._tmp, spec['file']), 'ab') as f:
+                np.ascontiguousarray(x).tofile(f)
+        self.nrows += len(df)
+
+    def _encode(self, spec, values):
+        encoding = spec['encoding']
+        if encoding == 'category':
+            lookup = self._categories[spec['name']]
+            codes, uniques = pd.factorize(values)
+            mapped = np.array([lookup.setdefault(str(u), len(lookup)) for u in uniques],
+                              dtype=np.int32)
+            out = np.full(len(values), -1, dtype=np.int32)
+            present = codes > -1
+            out[present] = mapped[codes[present]]
+            return out
+        if encoding == 'datetime':
+            date = pd.to_datetime(values, format=self.date_format)
+            return date.values.astype('datetime64[ns]').view(np.int64)
+        if encoding == 'plain':
+            return values.values.astype(float)
+
+        x = values.values.astype(float)
+        missing = np.isnan(x)
+        cast = x[~missing]
+        t = np.dtype(spec['dtype'])
+        info = np.iinfo(t)
+        if cast.size and ((cast != np.round(cast)).any() or
+                          cast.min() <= info.min or cast.max() > info.max):
+            raise ValueError("Column %r does not fit its declared type %s." % (spec['name'], t))
+        out = np.full(x.size, spec['sentinel'], dtype=t)
+        out[~missing] = cast
+        spec['has_missing'] |= bool(missing.any())
+        return out
+
+    def close(self):
+        """Finalize category columns, write the header and move the table into place."""
+        if self._specs is None:
+            raise ValueError("No data was written to %s." % self.path)
+        for spec in self._specs:
+            if spec['encoding'] == 'category':
+                self._finish_categories(spec)
+        header = {'format': FORMAT_VERSION, 'nrows': self.nrows, 'columns': self._specs,
+                  'meta': self.meta}
+        publish_dir(self.path, self._tmp, META_FILE, header)
+
+    def abort(self):
+        """Discard everything written so far, leaving any existing table untouched."""
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _finish_categories(self, spec, block=1 << 20):
+        """Sort a column's categories and rewrite its codes in the narrowest type."""
+        lookup = self._categories.pop(spec['name'])
+        categories = np.array(list(lookup.keys()), dtype=object)
+        order = np.argsort(categories, kind='stable')
+        remap = np.empty(len(categories) + 1, dtype=np.int64)
+        remap[order] = np.arange(len(categories))
+        remap[-1] = -1  # code -1 indexes the last slot
+        t = _code_type(len(categories))
+
+        src = os.path.join(self._tmp, spec['file'])
+        dst = src + '.sorted'
+        codes = np.memmap(src, dtype=np.int32, mode='r') if self.nrows else np.empty(0, np.int32)
+        with open(dst, 'wb') as f:
+            for start in range(0, self.nrows, block):
+                remap[codes[start:start + block]].astype(t).tofile(f)
+        del codes
+        os.replace(dst, src)
+        spec['dtype'] = t.str
+        _write_categories(self._tmp, spec, categories[order].tolist())
+
+
+def ingest_csv(source, path, schema, meta=None, max_memory=256 * 2**20, date_format=None,
+               usecols=None, encoding=None):
+    """Stream a CSV file into a columnar table in chunks sized to a memory budget.
+
+    Parameters
+    ----------
+    source : str
+        CSV file.
+    path : str
+        Destination table directory.
+    schema : dict
+        Column name -> storage type, as for TableWriter.
+    meta : dict, None
+        Extra JSON-serializable header fields.
+    max_memory : int, 256 MiB
+        Approximate bound in bytes on the memory used while parsing one chunk.
+    date_format : str, None
+        strftime format of 'datetime' columns.
+    usecols : list, None
+        Only ingest these columns. By default every column in the file is kept.
+    encoding : str, None
+        Text encoding of the CSV.
+    """
+    header = pd.read_csv(source, nrows=0, encoding=encoding).columns
+    if usecols is not None:
+        header = [c for c in header if c in usecols]
+    # Parse integer codes as float so that missing values survive, and everything that is
+    # not numeric as str; TableWriter narrows both.
+    dtype = {c: (float if schema.get(c, 'category') not in ('category', 'datetime') else str)
+             for c in header}
+
+    sample = pd.read_csv(source, nrows=1000, usecols=header, dtype=dtype, encoding=encoding)
+    row_bytes = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+    chunksize = max(int(max_memory / (_PARSE_OVERHEAD * row_bytes)), 1)
+
+    with TableWriter(path, schema, meta=meta, date_format=date_format) as writer:
+        for chunk in pd.read_csv(source, usecols=header, dtype=dtype, encoding=encoding,
+                                 chunksize=chunksize):
+            writer.append(chunk)
+
@@ -0,0 +1,181 @@
+# ====================================================================================== #
+# Compact vote matrices. Votes only take a handful of integer codes, so they are held as
+# int8 codes plus a bit-packed missing mask (one bit per cell) instead of float64 with NaN
+# or int64 with a fill value, and are converted to numpy or pandas on demand.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+_INT8 = np.iinfo(np.int8)
+
+
+def _as_index(labels):
+    if labels is None or isinstance(labels, pd.Index):
+        return labels
+    return pd.Index(labels)
+
+
+class CompactVotes():
+    """Votes as int8 codes with a bit-packed missing mask and optional row and column
+    labels. Missing cells hold code 0 in `codes`.
+    """
+    def __init__(self, codes, missing=None, index=None, columns=None):
+        """
+        Parameters
+        ----------
+        codes : ndarray
+            Integer vote codes. Cast to int8.
+        missing : ndarray of bool, None
+            Cells without a vote, with the shape of codes. By default none are missing.
+        index : pd.Index, None
+            Row labels.
+        columns : pd.Index, None
+            Column labels (2d only).
+        """
+        codes = np.asarray(codes)
+        if codes.size and (codes.min() < _INT8.min or codes.max() > _INT8.max):
+            raise ValueError("Vote codes do not fit in int8.")
+        self.codes = codes.astype(np.int8)
+        if missing is None:
+            self._mask = None
+        else:
+            missing = np.asarray(missing, dtype=bool)
+            if missing.shape != self.codes.shape:
+                raise ValueError("Mask does not match the shape of the codes.")
+            self.codes[missing] = 0
+            self._mask = np.packbits(missing.ravel()) if missing.any() else None
+        self.index = _as_index(index)
+        self.columns = _as_index(columns)
+
+    @classmethod
+    def from_array(cls, values, missing_value=None, index=None, columns=None):
+        """Compact an array of integral votes.
+
+        Parameters
+        ----------
+        values : ndarray
+            NaN entries of a float array are missing.
+        missing_value : int, None
+            Code that marks missing votes, e.g. -1 in the state tables.
+        index : pd.Index, None
+        columns : pd.Index, None
+
+        Returns
+        -------
+        CompactVotes
+        """
+        values = np.asarray(values)
+        if values.dtype == object:
+            values = values.astype(float)
+        missing = np.isnan(values) if values.dtype.kind == 'f' else np.zeros(values.shape, bool)
+        if missing_value is not None:
+            missing |= values == missing_value
+        if values.dtype.kind == 'f':
+            cast = values[~missing]
+            if (cast != np.round(cast)).any():
+                raise ValueError("Votes must be integer codes.")
+            values = np.where(missing, 0, values)
+        return cls(values, missing, index=index, columns=columns)
+
+    @classmethod
+    def from_parts(cls, codes, packed_mask=None, index=None, columns=None):
+        """CompactVotes over existing int8 codes and bit-packed mask (as stored in `codes`
+        and `_mask`) without copying them, e.g. views of shared memory.
+        """
+        if codes.dtype != np.int8:
+            raise TypeError("Vote codes must be int8, not %s." % codes.dtype)
+        if packed_mask is not None and (packed_mask.dtype != np.uint8 or
+                                        packed_mask.size != (codes.size + 7) // 8):
+            raise ValueError("Packed mask does not match the shape of the codes.")
+        votes = cls.__new__(cls)
+        votes.codes = codes
+        votes._mask = packed_mask
+        votes.index = _as_index(index)
+        votes.columns = _as_index(columns)
+        return votes
+
+    @classmethod
+    def from_frame(cls, df, missing_value=None):
+        """Compact a DataFrame of votes, keeping its index and columns."""
+        return cls.from_array(df.values, missing_value=missing_value, index=df.index,
+                              columns=df.columns)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def ndim(self):
+        return self.codes.ndim
+
+    @property
+    def nbytes(self):
+        """Bytes held by the codes and the packed mask."""
+        return self.codes.nbytes + (0 if self._mask is None else self._mask.nbytes)
+
+    @property
+    def missing(self):
+        """Boolean array of cells without a vote."""
+        if self._mask is None:
+            return np.zeros(self.shape, dtype=bool)
+        return np.unpackbits(self._mask, count=self.codes.size).reshape(self.shape).view(bool)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return '<CompactVotes %s, %d missing, %d bytes>' % (
+            'x'.join(str(n) for n in self.shape), self.missing.sum(), self.nbytes)
+
+    def take(self, rows):
+        """Subset of rows given as indices or a boolean mask."""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.where(rows)[0]
+        return CompactVotes(self.codes[rows], self.missing[rows],
+                            index=None if self.index is None else self.index[rows],
+                            columns=self.columns)
+
+    def to_numpy(self, dtype=float, fill=np.nan):
+        """Votes as a dense array with missing cells set to fill.
+
+        Parameters
+        ----------
+        dtype : type, float
+        fill : scalar, np.nan
+
+        Returns
+        -------
+        ndarray
+        """
+        out = self.codes.astype(dtype)
+        if self._mask is not None:
+            out[self.missing] = fill
+        return out
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_numpy(float if dtype is None else dtype)
+
+    def to_frame(self, dtype=float, fill=np.nan):
+        """Votes as a DataFrame labeled by index and columns. See to_numpy."""
+        if self.ndim != 2:
+            raise ValueError("Only 2d votes convert to a DataFrame.")
+        return pd.DataFrame(self.to_numpy(dtype, fill), index=self.index, columns=self.columns)
+
+
+class SparseVotes(namedtuple('SparseVotes', ['matrix', 'index', 'columns'])):
+    """Votes as a scipy.sparse CSR matrix storing each vote code plus one, so that cells
+    without a vote (code -1) are not stored, with row and column labels.
+    """
+    __slots__ = ()
+
+    def to_numpy(self, dtype=np.int64):
+        """Dense votes with -1 for cells without a vote."""
+        return self.matrix.toarray().astype(dtype) - 1
+
+    def to_frame(self, dtype=np.int64):
+        """Dense votes as a DataFrame labeled by index and columns. See to_numpy."""
+        return pd.DataFrame(self.to_numpy(dtype), index=self.index, columns=self.columns)
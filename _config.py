@@ -10,3 +10,11 @@ DATADR = os.environ.get(
     "SCOTUS_DATA_DIR",
     os.path.expanduser("~/Dropbox/Research/data_sets/scotus"),
 )
+
+# Approximate memory bound (bytes) for streaming raw CSVs into the columnar caches. Lower it
+# with SCOTUS_INGEST_MAX_MEMORY to rebuild caches on small machines.
+INGEST_MAX_MEMORY = int(os.environ.get("SCOTUS_INGEST_MAX_MEMORY", 256 * 2**20))
+
+# Memory budget (bytes) of the process-wide cache of loaded data shared by the wrappers. Set
+# SCOTUS_CACHE_MAX_MEMORY=0 to disable it.
+CACHE_MAX_MEMORY = int(os.environ.get("SCOTUS_CACHE_MAX_MEMORY", 1 << 30))
@@ -6,7 +6,10 @@
 # ====================================================================================== #
 import numpy as np
 
+from .profiling import timed
 
+
+@timed()
 def full_court_vote_sets(df, court_size, min_votes, justice_name_fn):
     """Split a raw vote table into the distinct full-court cohorts that voted together.
 
@@ -14,6 +17,9 @@ def full_court_vote_sets(df, court_size, min_votes, justice_name_fn):
     find every row in which exactly ``court_size`` justices voted, take the unique justice
     subsets, and for each subset keep only the cases where all of its members voted.
 
+    Rows are grouped by a bit-packed participation key, so each cohort's cases are
+    selected with one vectorized lookup instead of a per-row scan.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -30,22 +36,25 @@ def full_court_vote_sets(df, court_size, min_votes, justice_name_fn):
     list of dict
         Each dict has keys 'justices' (list of labels) and 'votes' (ndarray of complete votes).
     """
-    full_votes_ix = np.where((np.isnan(df) == 0).sum(1) == court_size)[0]
-    assert full_votes_ix.size > 0, "There are no full votes!"
+    present = df.notna().values
+    full_votes = present.sum(1) == court_size
+    assert full_votes.any(), "There are no full votes!"
 
-    # Identify each natural court by the sorted set of justice column indices that voted.
-    vote_strings = []
-    for i in full_votes_ix:
-        present = np.where(np.isnan(df.iloc[i, :]) == 0)[0]
-        vote_strings.append(' '.join(str(j) for j in present))
-    vote_strings = np.unique(vote_strings)
+    codes, group_words = _group_rows(_pack_rows(present))
+    cohort_groups = np.unique(codes[full_votes])
+    cohort_words = group_words[cohort_groups]
+    contains = _contains(cohort_words, group_words)
+    cohort_cols = [np.where(m)[0] for m in _unpack_rows(cohort_words, df.shape[1])]
 
-    nat_court_ix = [np.array([int(j) for j in v.split(' ')]) for v in vote_strings]
+    # Natural courts are ordered by their space-joined column indices, as strings.
+    order = sorted(range(len(cohort_cols)),
+                   key=lambda i: ' '.join(str(j) for j in cohort_cols[i]))
 
     courts = []
-    for ix in nat_court_ix:
-        complete_votes = df.iloc[:, ix].dropna()
-        if complete_votes.shape[0] > min_votes:
+    for i in order:
+        rows = contains[i][codes]
+        if rows.sum() > min_votes:
+            complete_votes = df.iloc[rows, cohort_cols[i]]
             courts.append({
                 'justices': [justice_name_fn(c) for c in complete_votes.columns],
                 'votes': complete_votes.values,
@@ -53,15 +62,101 @@ def full_court_vote_sets(df, court_size, min_votes, justice_name_fn):
     return courts
 
 
+# Vote codes allowed in the matrices passed to extract_natural_courts.
+_VOTE_CODES = (-1, 0, 1, 2, 3)
+
+
+def _pack_rows(mask):
+    """Pack each row of a boolean matrix into little-endian uint64 words, so that bit j of
+    word j // 64 is column j.
+
+    Returns
+    -------
+    ndarray
+        (n_rows, n_words) uint64 keys.
+    """
+    n_rows, n_cols = mask.shape
+    n_words = max((n_cols + 63) // 64, 1)
+    packed = np.zeros((n_rows, n_words * 8), dtype=np.uint8)
+    packed[:, :(n_cols + 7) // 8] = np.packbits(mask, axis=1, bitorder='little')
+    return packed.view('<u8')
+
+
+def _pack_sparse_rows(X):
+    """_pack_rows for the participation pattern of a scipy.sparse matrix, i.e. its stored
+    nonzero entries, without densifying it.
+    """
+    coo = X.tocoo()
+    coo.sum_duplicates()
+    coo.eliminate_zeros()
+    words = np.zeros((coo.shape[0], max((coo.shape[1] + 63) // 64, 1)), dtype=np.uint64)
+    cols = coo.col.astype(np.uint64)
+    np.add.at(words, (coo.row, coo.col // 64), np.left_shift(np.uint64(1), cols % np.uint64(64)))
+    return words, coo.data
+
+
+def _unpack_rows(words, n_cols):
+    """Inverse of _pack_rows."""
+    bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=1,
+                         bitorder='little')
+    return bits[:, :n_cols].astype(bool)
+
+
+def _group_rows(words):
+    """Group rows with identical packed keys using hashing rather than sorting.
+
+    Parameters
+    ----------
+    words : ndarray
+        (n_rows, n_words) keys as returned by _pack_rows.
+
+    Returns
+    -------
+    codes : ndarray
+        Group index of each row, numbered by first appearance.
+    group_words : ndarray
+        (n_groups, n_words) key of each group.
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(words[:, 0])
+    for w in range(1, words.shape[1]):
+        word_codes, word_uniques = pd.factorize(words[:, w])
+        codes, uniques = pd.factorize(codes.astype(np.int64) * len(word_uniques) + word_codes)
+    first = np.zeros(codes.max() + 1 if codes.size else 0, dtype=np.int64)
+    first[codes[::-1]] = np.arange(codes.size)[::-1]
+    return codes, words[first]
+
+
+def _contains(cohort_words, group_words):
+    """contains[i, g] is True when every member of cohort i is present in group g's key."""
+    return ((group_words[None, :, :] & cohort_words[:, None, :]) ==
+            cohort_words[:, None, :]).all(2)
+
+
+def _superset_counts(cohort_words, group_words, group_counts):
+    """Number of rows whose participation includes each cohort.
+
+    Computed over the unique participation keys (groups) rather than over rows.
+    """
+    return _contains(cohort_words, group_words).astype(np.int64) @ group_counts
+
+
+@timed()
 def extract_natural_courts(X, only_full_votes=True, threshold_votes='default'):
     """Get indices for unique natural courts identified by unique subsets of voters.
 
+    Each case's participation pattern is packed into an integer key, so unique cohorts and
+    their vote counts come from one hashing pass over the cases and a comparison among the
+    (few) unique keys, instead of a scan of the full matrix per cohort.
+
     Parameters
     ----------
-    X : ndarray or pd.DataFrame
+    X : ndarray, pd.DataFrame, CompactVotes, SparseVotes or scipy.sparse matrix
         Coded vote matrix (e.g. as returned by ``states.State.vote_table``) where values
         in {-1, 0, 1, 2, 3} encode missing/minority/majority/recused/not-participating and
-        -1 marks the absence of a vote.
+        -1 marks the absence of a vote. Sparse matrices store each code plus one, so
+        that entries not stored are -1, and are not densified.
     only_full_votes : bool, True
         If True, only keep cohorts of the maximal observed size (the full court).
     threshold_votes : int or 'default', 'default'
@@ -74,20 +169,38 @@ def extract_natural_courts(X, only_full_votes=True, threshold_votes='default'):
         (column indices belonging to a natural court, number of complete votes)
     """
     import pandas as pd
+    from ._compact import CompactVotes, SparseVotes
 
-    if isinstance(X, pd.DataFrame):
+    if isinstance(X, SparseVotes):
+        X = X.matrix
+    elif isinstance(X, CompactVotes):
+        X = X.to_numpy(np.int8, -1)
+    elif isinstance(X, pd.DataFrame):
         X = X.values
-    if not frozenset(np.unique(X)) <= frozenset((-1, 0, 1, 2, 3)):
+
+    if hasattr(X, 'tocoo'):
+        words, stored = _pack_sparse_rows(X)
+        valid = np.isin(stored, np.array(_VOTE_CODES) + 1)
+    else:
+        words = _pack_rows(X > -1)
+        valid = np.zeros(X.shape, dtype=bool)
+        for code in _VOTE_CODES:
+            valid |= X == code
+    if not valid.all():
         raise ValueError("Vote matrix may only contain the codes -1, 0, 1, 2, 3.")
 
-    nat_courts = [np.where(i)[0].tolist() for i in np.unique(X > -1, axis=0)]
-    if only_full_votes:
-        mx = max(len(nc) for nc in nat_courts)
-        nat_courts = [nc for nc in nat_courts if len(nc) == mx]
+    codes, group_words = _group_rows(words)
+    group_counts = np.bincount(codes, minlength=len(group_words))
 
-    vote_counts = np.zeros(len(nat_courts))
-    for i, nc in enumerate(nat_courts):
-        vote_counts[i] = (X[:, nc] > -1).all(1).sum()
+    # Order cohorts lexicographically by participation mask, as np.unique(..., axis=0) would.
+    cohorts = _unpack_rows(group_words, X.shape[1])
+    order = np.lexsort(cohorts.T[::-1]) if cohorts.shape[1] else np.arange(len(cohorts))
+    if only_full_votes:
+        sizes = cohorts[order].sum(1)
+        order = order[sizes == sizes.max()]
+    nat_courts = [np.where(c)[0].tolist() for c in cohorts[order]]
+    vote_counts = _superset_counts(group_words[order], group_words,
+                                   group_counts).astype(float)
 
     if not threshold_votes:
         return list(zip(nat_courts, vote_counts))
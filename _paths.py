@@ -0,0 +1,37 @@
+# ====================================================================================== #
+# Locations of the data sets under DATADR, and state listing that reads only the header of
+# the consolidated state store. Only the standard library is imported here, so short-lived
+# workers can resolve paths and list states without loading numpy or pandas.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import json
+
+from ._config import DATADR
+
+# JSON header of a columnar table directory (see _columnar).
+META_FILE = 'meta.json'
+
+# Consolidated columnar store of all states (rows sorted by state, with a state -> row range
+# index in its header) and the older directory of per-state pickles, still read if present.
+STATE_STORE = 'us_state_courts'
+LEGACY_PICKLE_DIR = 'us_state_court_pickles'
+
+
+def scdb_paths(legacy=False, year=2024):
+    """Columnar cache directory and source CSV name for one SCDB release."""
+    if legacy:
+        return (os.path.join(DATADR, 'scotus_cache', 'legacy'),
+                'SCDB_Legacy_04_justiceCentered_Citation.csv')
+    return (os.path.join(DATADR, 'scotus_cache', str(year)),
+            f'SCDB_{year}_01_justiceCentered_Citation.csv')
+
+
+def list_possible_states():
+    """Sorted list of state codes for which data is available."""
+    header = os.path.join(DATADR, STATE_STORE, META_FILE)
+    if os.path.isfile(header):
+        with open(header) as f:
+            return sorted(json.load(f)['meta']['offsets'])
+    files = os.listdir(os.path.join(DATADR, LEGACY_PICKLE_DIR))
+    return sorted(f[:-2] for f in files)
@@ -0,0 +1,166 @@
+# ====================================================================================== #
+# Asyncio counterparts of the loaders, for event-loop servers. Each load runs in an
+# executor (the loop's default thread pool unless one is given), so file reads and decoding
+# overlap across courts and never block the loop; the batch loaders bound the number of
+# loads in flight with a semaphore. Loads share the process-wide cache of loaded data.
+#   tables = await load_states(['CA', 'NY'], concurrency=8)
+#   courts = await HighCourt.aget_court('canada')
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import asyncio
+import functools
+
+# Loads in flight per batch call unless given.
+DEFAULT_CONCURRENCY = 8
+
+
+async def run_blocking(fn, *args, executor=None, **kwargs):
+    """Await fn(*args, **kwargs) run in an executor.
+
+    Parameters
+    ----------
+    fn : callable
+        Must be picklable (e.g. a module-level function) if executor is a process pool.
+    *args
+    executor : concurrent.futures.Executor, None
+        By default, the running loop's default executor (a thread pool).
+    **kwargs
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def _gather_bounded(keys, fn, concurrency, executor, **kwargs):
+    """{key: fn(key, **kwargs)} with at most concurrency (DEFAULT_CONCURRENCY if None)
+    calls running at once.
+    """
+    if concurrency is None:
+        concurrency = DEFAULT_CONCURRENCY
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1, not %r." % (concurrency,))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(key):
+        async with semaphore:
+            return await run_blocking(fn, key, executor=executor, **kwargs)
+    results = await asyncio.gather(*(one(k) for k in keys))
+    return dict(zip(keys, results))
+
+
+def _state_vote_table(state, **kwargs):
+    from .states import State
+    return State(state).vote_table(**kwargs)
+
+
+async def load_state(state, executor=None, **kwargs):
+    """State(state).vote_table(**kwargs) without blocking the loop."""
+    return await run_blocking(_state_vote_table, state, executor=executor, **kwargs)
+
+
+async def load_states(states=None, concurrency=DEFAULT_CONCURRENCY, executor=None,
+                      **kwargs):
+    """Vote tables of many state courts, loaded concurrently.
+
+    Parameters
+    ----------
+    states : list of str, None
+        State codes. By default every state from list_possible_states().
+    concurrency : int, DEFAULT_CONCURRENCY
+        Maximum number of states loading at once.
+    executor : concurrent.futures.Executor, None
+        E.g. a ProcessPoolExecutor to decode on several cores. By default the loop's
+        default thread pool.
+    **kwargs
+        Passed to State.vote_table.
+
+    Returns
+    -------
+    dict
+        State code -> vote table (or tuple, as returned by State.vote_table), in the order
+        of states.
+    """
+    if states is None:
+        from ._paths import list_possible_states
+        states = await run_blocking(list_possible_states, executor=executor)
+    return await _gather_bounded(list(states), _state_vote_table, concurrency, executor,
+                                 **kwargs)
+
+
+def _get_court(name, compact=False):
+    from .high_courts import HighCourt
+    return HighCourt.get_court(name, compact=compact)
+
+
+async def get_court(name, compact=False, executor=None):
+    """HighCourt.get_court without blocking the loop."""
+    return await run_blocking(_get_court, name, compact=compact, executor=executor)
+
+
+async def get_courts(names=None, compact=False, concurrency=DEFAULT_CONCURRENCY,
+                     executor=None):
+    """HighCourt.get_court for several countries, loaded concurrently.
+
+    Parameters
+    ----------
+    names : list of str, None
+        Countries. By default every one in high_courts.COUNTRIES.
+    compact : bool, False
+    concurrency : int, DEFAULT_CONCURRENCY
+        Maximum number of countries loading at once.
+    executor : concurrent.futures.Executor, None
+
+    Returns
+    -------
+    dict
+        Country name -> list of natural-court vote sets.
+    """
+    if names is None:
+        from .high_courts import COUNTRIES
+        names = COUNTRIES
+    return await _gather_bounded(list(names), _get_court, concurrency, executor,
+                                 compact=compact)
+
+
+def _scotus_data(**kwargs):
+    from .scotus import ScotusData
+    return ScotusData(**kwargs)
+
+
+async def scotus_data(executor=None, **kwargs):
+    """ScotusData(**kwargs), which may rebuild its cache, without blocking the loop. The
+    instance's accessors are synchronous; run heavy ones with run_blocking.
+    """
+    return await run_blocking(_scotus_data, executor=executor, **kwargs)
+
+
+def _conference_report_votes():
+    from .scotus import ConferenceReportVotes
+    return ConferenceReportVotes()
+
+
+async def conference_report_votes(executor=None):
+    """ConferenceReportVotes() without blocking the loop."""
+    return await run_blocking(_conference_report_votes, executor=executor)
+
+
+def _load_conference_report_votes(court_index, compact=False):
+    from .scotus import ScotusData
+    return ScotusData.load_conference_report_votes(court_index, compact)
+
+
+async def load_all_conference_report_votes(compact=False, concurrency=DEFAULT_CONCURRENCY,
+                                           executor=None):
+    """Conference and report votes of every court in COURT_NAMES, loaded concurrently. See
+    ScotusData.load_conference_report_votes.
+
+    Returns
+    -------
+    dict
+        Court name -> (confv, finv, full_votes_ix).
+    """
+    from .scotus import COURT_NAMES
+
+    loaded = await _gather_bounded(list(range(len(COURT_NAMES))),
+                                   _load_conference_report_votes, concurrency, executor,
+                                   compact=compact)
+    return {COURT_NAMES[i]: votes for i, votes in loaded.items()}
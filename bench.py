@@ -0,0 +1,222 @@
+# ====================================================================================== #
+# Benchmarks of the setup routines and accessors on synthetic data (see synthetic.py).
+# Each benchmark runs in a fresh interpreter with SCOTUS_DATA_DIR pointing at the data, so
+# that module-level caches and the data directory are those of a cold start, and reports
+# wall and CPU time over repeats plus the tracemalloc peak of one extra run.
+#   python -m scotus bench [NAME ...] [--scale S] [--repeat N] [--json OUT] [--baseline B]
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import sys
+import json
+import tempfile
+import subprocess
+from collections import namedtuple
+
+# setup: statements run once before timing; stmt: the timed statements. {pkg} is the
+# package name.
+Benchmark = namedtuple('Benchmark', ['setup', 'stmt'])
+
+# Setup routines come first so that the accessors below them read fresh caches.
+BENCHMARKS = {
+    'setup_scdb': Benchmark('from {pkg} import scotus as m', 'm.setup_scdb()'),
+    'setup_warren_votes': Benchmark('from {pkg} import scotus as m',
+                                    'm.setup_warren_votes(disp=False)'),
+    'setup_warren_votes_by_court': Benchmark('from {pkg} import scotus as m',
+                                             'm.setup_warren_votes_by_court()'),
+    'setup_us_states': Benchmark('from {pkg} import states as m', 'm.setup_us_states()'),
+    'setup_australia': Benchmark('from {pkg} import high_courts as m', 'm.setup_australia()'),
+    'setup_india': Benchmark('from {pkg} import high_courts as m', 'm.setup_india()'),
+    'setup_canada': Benchmark('from {pkg} import high_courts as m', 'm.setup_canada()'),
+    'full_court_vote_sets': Benchmark(
+        'from {pkg} import high_courts as m\n'
+        'from {pkg}._courts_common import full_court_vote_sets\n'
+        "df = m._load_dual_issue('HCJD_Canada.dta', True)",
+        "full_court_vote_sets(df, 9, 20, lambda c: c.split('_')[0])"),
+    'ScotusData.maj_vote_table': Benchmark('from {pkg} import scotus as m',
+                                           'm.ScotusData().maj_vote_table()'),
+    'ScotusData.case_metadata': Benchmark('from {pkg} import scotus as m',
+                                          'm.ScotusData().case_metadata()'),
+    'ScotusData.second_rehnquist_court': Benchmark('from {pkg} import scotus as m',
+                                                   'm.ScotusData().second_rehnquist_court()'),
+    'ConferenceReportVotes': Benchmark(
+        'from {pkg} import scotus as m',
+        'c = m.ConferenceReportVotes()\n'
+        'for court in c.conference_ideology_votes_by_court:\n'
+        '    c.conference_and_report(court)'),
+    'load_all_conference_report_votes': Benchmark(
+        'from {pkg} import scotus as m', 'm.ScotusData.load_all_conference_report_votes()'),
+    'State.vote_table': Benchmark('from {pkg} import states as m',
+                                  "m.State('CA').vote_table()"),
+    'extract_natural_courts': Benchmark(
+        'from {pkg} import states as m\n'
+        'from {pkg}._courts_common import extract_natural_courts\n'
+        "X = m.State('CA').vote_table()",
+        'extract_natural_courts(X)'),
+    'HighCourt.get_court': Benchmark('from {pkg} import high_courts as m',
+                                     "m.HighCourt.get_court('canada')"),
+    'HighCourt.get_cohort': Benchmark('from {pkg} import high_courts as m',
+                                      "m.HighCourt.get_cohort('canada', 0)['votes'].sum()"),
+}
+
+# The shared cache of loaded data is cleared before each run, so that runs time loading
+# rather than cache hits.
+_SCRIPT = """
+import sys, time, json, tracemalloc
+from {pkg}._cache import clear_cache
+{setup}
+def _stmt():
+{stmt}
+wall, cpu = [], []
+for _ in range({repeat}):
+    clear_cache()
+    t0, c0 = time.perf_counter(), time.process_time()
+    _stmt()
+    wall.append(time.perf_counter() - t0)
+    cpu.append(time.process_time() - c0)
+clear_cache()
+tracemalloc.start()
+_stmt()
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+print(json.dumps({{'wall': wall, 'cpu': cpu, 'peak_bytes': peak}}))
+"""
+
+# Builds every cache and exits non-zero, naming the targets, if any was not built.
+_BUILD_SCRIPT = """
+import sys
+from {pkg} import _build
+status = _build.build(jobs=1)
+bad = sorted((n, s) for n, s in status.items() if s not in ('built', 'up to date'))
+if bad:
+    sys.exit('Build incomplete: ' + ', '.join('%s (%s)' % b for b in bad))
+"""
+
+
+def _package():
+    """Package name and the directory to import it from."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    return __name__.rpartition('.')[0] or os.path.basename(here), os.path.dirname(here)
+
+
+def _run_script(script, data_dir):
+    """Run a script (with {pkg} already filled in) against data_dir and return its
+    output."""
+    env = dict(os.environ, SCOTUS_DATA_DIR=os.path.abspath(data_dir))
+    out = subprocess.run([sys.executable, '-c', script], cwd=_package()[1], env=env,
+                         capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else
+                           "Benchmark exited with status %d." % out.returncode)
+    return out.stdout
+
+
+def run_benchmark(name, data_dir, repeat=3):
+    """Time one benchmark in a fresh interpreter.
+
+    Parameters
+    ----------
+    name : str
+        Key of BENCHMARKS.
+    data_dir : str
+    repeat : int, 3
+        Timed runs.
+
+    Returns
+    -------
+    dict
+        'name', 'best' and 'mean' wall time (s), 'cpu' (mean CPU time, s) and 'peak_mb'
+        (tracemalloc peak of one more run).
+    """
+    pkg = _package()[0]
+    b = BENCHMARKS[name]
+    stmt = '\n'.join('    ' + line for line in b.stmt.format(pkg=pkg).splitlines())
+    script = _SCRIPT.format(setup=b.setup.format(pkg=pkg), stmt=stmt, repeat=repeat, pkg=pkg)
+    r = json.loads(_run_script(script, data_dir).splitlines()[-1])
+    return {'name': name,
+            'best': min(r['wall']),
+            'mean': sum(r['wall']) / len(r['wall']),
+            'cpu': sum(r['cpu']) / len(r['cpu']),
+            'peak_mb': r['peak_bytes'] / 2**20}
+
+
+def prepare(data_dir, scale=1, seed=0):
+    """Generate synthetic data in data_dir, unless SCDB data is already there, and build
+    every cache from it.
+
+    Raises
+    ------
+    RuntimeError
+        If any build target failed, was skipped or lacked its sources, so that benchmarks
+        never run against missing or stale caches.
+    """
+    from . import synthetic
+
+    if not any(f.startswith('SCDB_') for f in os.listdir(data_dir)):
+        synthetic.generate(data_dir, scale=scale, seed=seed)
+    _run_script(_BUILD_SCRIPT.format(pkg=_package()[0]), data_dir)
+
+
+def run(names=None, data_dir=None, scale=1, repeat=3, seed=0, disp=True):
+    """Run benchmarks on synthetic data.
+
+    Parameters
+    ----------
+    names : list of str, None
+        Benchmarks to run, in BENCHMARKS order. By default all of them.
+    data_dir : str, None
+        Data directory. Synthetic data is generated there if it has no SCDB file. By
+        default, a temporary directory.
+    scale : float, 1
+        Size of generated data; see synthetic.generate.
+    repeat : int, 3
+    seed : int, 0
+    disp : bool, True
+        Print each result as it finishes.
+
+    Returns
+    -------
+    list of dict
+        See run_benchmark.
+    """
+    unknown = set(names or ()) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError("Unrecognized benchmarks: %s" % ', '.join(sorted(unknown)))
+    names = list(BENCHMARKS) if names is None else [n for n in BENCHMARKS if n in names]
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp(prefix='scotus_bench_')
+    os.makedirs(data_dir, exist_ok=True)
+    prepare(data_dir, scale=scale, seed=seed)
+
+    results = []
+    for name in names:
+        results.append(run_benchmark(name, data_dir, repeat=repeat))
+        if disp:
+            print(format_result(results[-1]), flush=True)
+    return results
+
+
+def format_result(r):
+    return '%-36s best %8.3fs  mean %8.3fs  cpu %8.3fs  peak %8.1f MB' % (
+        r['name'], r['best'], r['mean'], r['cpu'], r['peak_mb'])
+
+
+def compare(results, baseline, tolerance=.2):
+    """Benchmarks whose best time regressed against a baseline.
+
+    Parameters
+    ----------
+    results : list of dict
+    baseline : list of dict
+        Earlier output of run, e.g. loaded from the JSON written by `bench --json`.
+    tolerance : float, .2
+        Allowed fractional slowdown.
+
+    Returns
+    -------
+    list of tuple
+        (name, baseline best, new best) of each regression.
+    """
+    before = {r['name']: r['best'] for r in baseline}
+    return [(r['name'], before[r['name']], r['best']) for r in results
+            if r['name'] in before and r['best'] > before[r['name']] * (1 + tolerance)]
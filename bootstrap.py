@@ -0,0 +1,211 @@
+# ====================================================================================== #
+# Bootstrap and subsampling of vote matrices, e.g. the complete votes of a natural court.
+# Resamples are drawn in batches and each is reduced to a vector of case weights, so a
+# batch of statistics is one matrix product of the weights with per-case features. Batches
+# are spread over a process pool, each with its own seed spawned from one SeedSequence, so
+# results do not depend on the number of workers.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .vote_stats import densify, to_spins
+
+# Per-case features of the built-in statistics, set in each worker by _init_worker.
+_WORKER_DATA = None
+
+
+def _features(s, p, stat):
+    """Per-case numerator and denominator features so that a statistic over a weighted
+    set of cases is (w @ numer) / (w @ denom).
+
+    Parameters
+    ----------
+    s : ndarray
+        Cases x justices spins, 0 where missing.
+    p : ndarray
+        1 where a vote is present.
+    stat : str
+        'mean' (<s_i>), 'correlation' (<s_i s_j>) or 'k_votes' (distribution of the number
+        of +1 votes per case).
+
+    Returns
+    -------
+    numer, denom : ndarray
+        (cases, features) arrays.
+    shape : tuple
+        Shape of one replicate of the statistic.
+    """
+    n_cases, n = s.shape
+    if stat == 'mean':
+        return s, p, (n,)
+    if stat == 'correlation':
+        return ((s[:, :, None] * s[:, None, :]).reshape(n_cases, n * n),
+                (p[:, :, None] * p[:, None, :]).reshape(n_cases, n * n), (n, n))
+    if stat == 'k_votes':
+        numer = np.zeros((n_cases, n + 1))
+        numer[np.arange(n_cases), (s == 1).sum(1)] = 1
+        return numer, np.ones((n_cases, n + 1)), (n + 1,)
+    raise ValueError("Unrecognized statistic %r." % stat)
+
+
+def resample_indices(rng, n_cases, n_samples, size=None, replace=True):
+    """Batch of resampled case indices.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+    n_cases : int
+    n_samples : int
+        Number of resamples (rows).
+    size : int, None
+        Cases per resample. Defaults to n_cases.
+    replace : bool, True
+        Sample with replacement (bootstrap) or without (subsampling, size < n_cases).
+
+    Returns
+    -------
+    ndarray
+        (n_samples, size) indices.
+    """
+    size = n_cases if size is None else size
+    if replace:
+        return rng.integers(n_cases, size=(n_samples, size))
+    if size > n_cases:
+        raise ValueError("Cannot subsample %d of %d cases without replacement." %
+                         (size, n_cases))
+    return rng.random((n_samples, n_cases)).argpartition(size - 1, axis=1)[:, :size]
+
+
+def _case_weights(ix, n_cases):
+    """Number of times each case appears in each resample, as an (n_samples, n_cases)
+    array."""
+    n_samples = ix.shape[0]
+    offsets = np.arange(n_samples)[:, None] * n_cases
+    return np.bincount((ix + offsets).ravel(),
+                       minlength=n_samples * n_cases).reshape(n_samples, n_cases)
+
+
+def _replicates(data, seed, n_samples, size, replace):
+    """Statistic for one batch of resamples drawn with the given SeedSequence."""
+    rng = np.random.default_rng(seed)
+    kind = data[0]
+    if kind == 'features':
+        numer, denom, shape = data[1:]
+        w = _case_weights(resample_indices(rng, numer.shape[0], n_samples, size, replace),
+                          numer.shape[0]).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = (w @ numer) / (w @ denom)
+        return out.reshape((n_samples,) + shape)
+    stat, s = data[1:]
+    return np.asarray(stat(s[resample_indices(rng, s.shape[0], n_samples, size, replace)]))
+
+
+def _init_worker(data):
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def _worker_replicates(seed, n_samples, size, replace):
+    return _replicates(_WORKER_DATA, seed, n_samples, size, replace)
+
+
+def confidence_interval(replicates, alpha=.05, estimate=None, method='percentile'):
+    """Two-sided confidence interval from bootstrap replicates.
+
+    Parameters
+    ----------
+    replicates : ndarray
+        Replicates along the first axis.
+    alpha : float, .05
+        1 - alpha is the coverage.
+    estimate : ndarray, None
+        Statistic on the original sample; required for the 'basic' interval (ValueError
+        otherwise).
+    method : str, 'percentile'
+        'percentile' or 'basic' (reflected percentile).
+
+    Returns
+    -------
+    lo, hi : ndarray
+        NaN replicates are ignored.
+    """
+    lo, hi = np.nanquantile(replicates, [alpha / 2, 1 - alpha / 2], axis=0)
+    if method == 'percentile':
+        return lo, hi
+    if method == 'basic':
+        if estimate is None:
+            raise ValueError("The basic interval needs the original estimate.")
+        return 2 * estimate - hi, 2 * estimate - lo
+    raise ValueError("Unrecognized interval method %r." % method)
+
+
+def bootstrap(X, stat='mean', n_boot=1000, codes=(-1, 1), replace=True, size=None,
+              alpha=.05, seed=None, jobs=1, chunk_size=250):
+    """Bootstrap (or subsample) the cases of a vote matrix.
+
+    Parameters
+    ----------
+    X : ndarray, pd.DataFrame, CompactVotes, SparseVotes or scipy.sparse matrix
+        Case x justice votes, e.g. a natural court's complete votes.
+    stat : str or callable, 'mean'
+        'mean' (<s_i> per justice), 'correlation' (<s_i s_j>, each over the cases in
+        which both voted) or 'k_votes' (fraction of cases with k = 0..n votes of +1). A
+        callable receives a batch of resampled spin matrices (resamples x cases x
+        justices, 0 for missing votes) and returns one statistic per resample; it must be
+        picklable (defined at module level) when jobs > 1.
+    n_boot : int, 1000
+        Number of resamples.
+    codes : tuple, (-1, 1)
+        (lo, hi) vote codes mapped to spins -1 and +1. See vote_stats.pair_stats.
+    replace : bool, True
+        If False, subsample size cases without replacement.
+    size : int, None
+        Cases per resample. Defaults to all cases.
+    alpha : float, .05
+        Confidence intervals cover 1 - alpha.
+    seed : int or np.random.SeedSequence, None
+        Root seed. Each batch of chunk_size resamples draws from its own spawned child, so
+        results are reproducible for any number of jobs.
+    jobs : int, 1
+        Worker processes. None uses every CPU; 1 runs in this process.
+    chunk_size : int, 250
+        Resamples per batch.
+
+    Returns
+    -------
+    dict
+        'estimate': statistic on the original cases, 'replicates': (n_boot, ...) array,
+        'ci': (lo, hi) percentile interval, 'se': standard error.
+    """
+    s, p, _ = to_spins(X, codes)
+    s, p = densify(s), densify(p)
+    if callable(stat):
+        data = ('callable', stat, s)
+        estimate = np.asarray(stat(s[None]))[0]
+    else:
+        numer, denom, shape = _features(s, p, stat)
+        data = ('features', numer, denom, shape)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            estimate = (numer.sum(0) / denom.sum(0)).reshape(shape)
+
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    sizes = [chunk_size] * (n_boot // chunk_size)
+    if n_boot % chunk_size:
+        sizes.append(n_boot % chunk_size)
+    seeds = root.spawn(len(sizes))
+
+    if jobs == 1 or len(sizes) == 1:
+        batches = [_replicates(data, sq, n, size, replace) for sq, n in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(data,)) as pool:
+            batches = list(pool.map(_worker_replicates, seeds, sizes,
+                                    [size] * len(sizes), [replace] * len(sizes)))
+    replicates = np.concatenate(batches)
+    return {'estimate': estimate,
+            'replicates': replicates,
+            'ci': confidence_interval(replicates, alpha),
+            'se': np.nanstd(replicates, axis=0, ddof=1)}
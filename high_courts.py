@@ -1,7 +1,7 @@
 # ====================================================================================== #
 # Voting data for national high courts other than the U.S. (Canada, Australia, India).
-# Provides access to the pickled court records and the setup routines that build them
-# from the raw HCJD Stata files.
+# Provides access to the per-country cohort stores (see _cohorts) and the setup routines
+# that build them from the raw HCJD Stata files.
 # Author: Eddie Lee, edlee@alumni.princeton.edu
 # 2016-05-16
 # ====================================================================================== #
@@ -13,17 +13,29 @@ import numpy as np
 import pandas as pd
 
 from ._config import DATADR
+from ._compact import CompactVotes
 from ._courts_common import full_court_vote_sets
+from ._cohorts import CohortStore, same_justices, write_cohorts
+from ._cache import cached
+from .profiling import span, timed
 
 log = logging.getLogger(__name__)
 
-# Pickle file and full-court size per supported country.
+# Cohort store, legacy pickle (read when no store has been built) and full-court size per
+# supported country.
+_STORE_FILES = {
+    'canada': 'canada_full_court_votes.cohorts',
+    'australia': 'australian_full_court_votes.cohorts',
+    'india': 'india_full_court_votes.cohorts',
+}
 _COURT_FILES = {
     'canada': 'canada_full_court_votes.p',
     'australia': 'australian_full_court_votes.p',
     'india': 'india_full_court_votes.p',
 }
 _COURT_SIZES = {'canada': 9, 'australia': 7, 'india': 9}
+# Canonical names of the supported countries.
+COUNTRIES = tuple(_STORE_FILES)
 
 
 def _resolve_country(name):
@@ -39,14 +51,109 @@ def _resolve_country(name):
 
 
 class HighCourt():
-    """Access to pickled high-court voting records for Canada, Australia, and India."""
+    """Access to the natural-court voting records for Canada, Australia, and India."""
+
+    @classmethod
+    def get_court(cls, name, compact=False):
+        """Return the list of natural-court vote sets for the named country.
+
+        Parameters
+        ----------
+        name : str
+        compact : bool, False
+            If True, each court's 'votes' are CompactVotes labeled by its justices.
+
+        Returns
+        -------
+        list of dict
+            The vote arrays are read-only; from a cohort store they are memory-mapped.
+        """
+        store = cls.store(name)
+        if store is None:
+            path = cls._legacy_path(name)
+            courts = cached(path, lambda: _read_courts(path), 'courts')
+        else:
+            courts = store.courts()
+        if compact:
+            for court in courts:
+                court['votes'] = _compact(court)
+        return courts
 
     @classmethod
-    def get_court(cls, name):
-        """Return the list of natural-court vote sets for the named country."""
+    def get_cohort(cls, name, cohort, compact=False):
+        """Return one natural court of the named country, reading only its votes.
+
+        Parameters
+        ----------
+        name : str
+        cohort : int or list of str
+            Position in cohort_index(name), or the justices of the cohort (in any order).
+        compact : bool, False
+            If True, 'votes' are CompactVotes labeled by the justices.
+
+        Returns
+        -------
+        dict
+            'justices' and read-only 'votes', as in get_court.
+        """
+        store = cls.store(name)
+        if store is None:
+            courts = cls.get_court(name)
+            if not isinstance(cohort, (int, np.integer)):
+                cohort = _find_cohort(courts, cohort)
+            court = courts[cohort]
+        else:
+            if not isinstance(cohort, (int, np.integer)):
+                cohort = store.find(cohort)
+            court = store.cohort(cohort)
+        if compact:
+            court['votes'] = _compact(court)
+        return court
+
+    @classmethod
+    def cohort_index(cls, name):
+        """Table of the named country's natural courts, one row per cohort, with
+        'justices', 'n_justices', 'n_votes' and 'offset' (byte position of the votes in
+        the cohort store, -1 when read from a legacy pickle). See CohortStore.index.
+        """
+        store = cls.store(name)
+        if store is not None:
+            return store.index()
+        courts = cls.get_court(name)
+        return pd.DataFrame({'justices': [tuple(c['justices']) for c in courts],
+                             'n_justices': [c['votes'].shape[1] for c in courts],
+                             'n_votes': [c['votes'].shape[0] for c in courts],
+                             'offset': -1})
+
+    @classmethod
+    def store(cls, name):
+        """CohortStore of the named country, opened once per process while the file is
+        unchanged, or None if only a legacy pickle has been built.
+
+        Raises
+        ------
+        FileNotFoundError
+            If neither the store nor the legacy pickle exists.
+        """
         country = _resolve_country(name)
-        with open(os.path.join(DATADR, _COURT_FILES[country]), 'rb') as f:
-            return pickle.load(f)['courts']
+        path = os.path.join(DATADR, _STORE_FILES[country])
+        if not os.path.isfile(path):
+            legacy = cls._legacy_path(country)
+            if os.path.isfile(legacy):
+                return None
+            raise FileNotFoundError("No %s votes: neither %s nor the legacy %s exists. Build "
+                                    "them with setup_%s()." % (country, path, legacy, country))
+        return cached(path, lambda: _open_store(path), 'cohort_store')
+
+    @classmethod
+    def _legacy_path(cls, name):
+        return os.path.join(DATADR, _COURT_FILES[_resolve_country(name)])
+
+    @classmethod
+    async def aget_court(cls, name, compact=False, executor=None):
+        """get_court run in an executor, for use from an event loop. See aio.get_court."""
+        from .aio import get_court
+        return await get_court(name, compact=compact, executor=executor)
 
     @classmethod
     def full_court_size(cls, name):
@@ -55,22 +162,33 @@ class HighCourt():
 
     @classmethod
     def save_court(cls, name, courts):
-        """Overwrite the pickled vote records for the named country."""
-        country = _resolve_country(name)
-        path = os.path.join(DATADR, _COURT_FILES[country])
-        if os.path.isfile(path):
-            os.remove(path)
-        with open(path, 'wb') as f:
-            pickle.dump({'courts': courts}, f, -1)
+        """Overwrite the cohort store for the named country. The new store is renamed into
+        place, so concurrent readers never see a partial file.
+        """
+        path = os.path.join(DATADR, _STORE_FILES[_resolve_country(name)])
+        with span('cohorts.write', courts) as s:
+            write_cohorts(path, courts)
+            s.output(path)
+
+
+def _compact(court):
+    return CompactVotes.from_array(court['votes'], columns=court['justices'])
+
+
+def _find_cohort(courts, justices):
+    for i, court in enumerate(courts):
+        if same_justices(court['justices'], justices):
+            return i
+    raise ValueError("No cohort of justices %s." % list(justices))
 
 
 # ====================================================================================== #
-# Setup routines that build the pickled records from the raw HCJD Stata files.           #
+# Setup routines that build the cohort stores from the raw HCJD Stata files.             #
 # ====================================================================================== #
+@timed()
 def setup_australia(min_votes=20):
-    """Build australian_full_court_votes.p from HCJD_Australia.dta (7-justice courts)."""
-    df = pd.read_stata(os.path.join(DATADR, 'original_data_files', 'HCJD_Australia.dta'),
-                       convert_categoricals=False)
+    """Build australian_full_court_votes.cohorts from HCJD_Australia.dta (7-justice courts)."""
+    df = _read_hcjd('HCJD_Australia.dta')
 
     # Vote columns contain 'v_'.
     df = df[np.sort([c for c in df.columns if 'v_' in c])]
@@ -81,8 +199,9 @@ def setup_australia(min_votes=20):
     HighCourt.save_court('australia', courts)
 
 
+@timed()
 def setup_india(keepv2=True, min_votes=20):
-    """Build india_full_court_votes.p from HCJD_India.dta (9-justice courts)."""
+    """Build india_full_court_votes.cohorts from HCJD_India.dta (9-justice courts)."""
     df = _load_dual_issue('HCJD_India.dta', keepv2)
     courts = full_court_vote_sets(df, court_size=9, min_votes=min_votes,
                                   justice_name_fn=lambda c: c.split('_')[0])
@@ -90,8 +209,9 @@ def setup_india(keepv2=True, min_votes=20):
     HighCourt.save_court('india', courts)
 
 
+@timed()
 def setup_canada(keepv2=True, min_votes=20):
-    """Build canada_full_court_votes.p from HCJD_Canada.dta (9-justice courts)."""
+    """Build canada_full_court_votes.cohorts from HCJD_Canada.dta (9-justice courts)."""
     df = _load_dual_issue('HCJD_Canada.dta', keepv2)
     courts = full_court_vote_sets(df, court_size=9, min_votes=min_votes,
                                   justice_name_fn=lambda c: c.split('_')[0])
@@ -101,8 +221,7 @@ def setup_canada(keepv2=True, min_votes=20):
 
 def _load_dual_issue(filename, keepv2):
     """Load an HCJD Stata file, keeping issue-1 votes and optionally stacking issue-2 votes."""
-    df = pd.read_stata(os.path.join(DATADR, 'original_data_files', filename),
-                       convert_categoricals=False)
+    df = _read_hcjd(filename)
     # Vote columns end in v1 / v2 (votes on issues 1 and 2).
     v1_cols = np.sort([c for c in df.columns if 'v1' in c])
     if keepv2:
@@ -115,5 +234,21 @@ def _load_dual_issue(filename, keepv2):
     return df[v1_cols]
 
 
+def _open_store(path):
+    with span('cohorts.open', path):
+        return CohortStore(path)
+
+
+def _read_courts(path):
+    with open(path, 'rb') as f, span('pickle.load', path) as s:
+        return s.output(pickle.load(f)['courts'])
+
+
+def _read_hcjd(filename):
+    path = os.path.join(DATADR, 'original_data_files', filename)
+    with span('pd.read_stata', path) as s:
+        return s.output(pd.read_stata(path, convert_categoricals=False))
+
+
 if __name__ == '__main__':
     setup_canada(keepv2=False)
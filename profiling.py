@@ -0,0 +1,270 @@
+# ====================================================================================== #
+# Opt-in instrumentation of the loaders and transforms. Each instrumented stage records its
+# wall time, CPU time, input and output sizes and, while tracemalloc is tracing, its peak
+# allocation, into a per-process list of records. Recording is off unless SCOTUS_PROFILE is
+# set (to "memory" to trace allocations as well) or a `profile()` block is active; when off,
+# a span costs one flag check.
+#   with profiling.profile() as records:
+#       ScotusData().maj_vote_table()
+#   profiling.report()
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import sys
+import json
+import time
+import threading
+import functools
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# Records kept per process; the oldest are dropped beyond this.
+MAX_RECORDS = 100000
+
+_MODE = os.environ.get('SCOTUS_PROFILE', '').lower()
+# Number of active reasons to record (the environment counts as one).
+_active = int(_MODE not in ('', '0', 'false'))
+_RECORDS = deque(maxlen=MAX_RECORDS)
+# Record lists of the open profile() blocks.
+_BLOCKS = []
+_LOCK = threading.Lock()
+# Per-thread stack of open spans, for nesting and peak memory propagation.
+_local = threading.local()
+
+if _MODE == 'memory' and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def enabled():
+    """True if spans are currently recorded."""
+    return _active > 0
+
+
+def size_of(obj):
+    """Bytes held in memory by an array, DataFrame, CompactVotes, sparse matrix, string, or
+    a list, tuple or dict of them, or None if unknown. Strings are sized as objects, never
+    looked up as file paths.
+    """
+    if obj is None:
+        return None
+    if isinstance(obj, (str, bytes)):
+        return sys.getsizeof(obj)
+    if hasattr(obj, 'indptr'):
+        return int(obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes)
+    if hasattr(obj, 'nbytes'):
+        return int(obj.nbytes)
+    if hasattr(obj, 'columns') and hasattr(obj, 'memory_usage'):
+        return int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, (list, tuple)):
+        sizes = [n for n in map(size_of, obj) if n is not None]
+        return sum(sizes) if sizes else None
+    if isinstance(obj, dict):
+        return size_of(list(obj.values()))
+    return None
+
+
+def _source_size(source):
+    """Size of a span's input: the file's size for a path, else size_of(source)."""
+    if isinstance(source, (str, os.PathLike)):
+        try:
+            return os.path.getsize(source)
+        except OSError:
+            return None
+    return size_of(source)
+
+
+class _Span():
+    """An open instrumented stage. Call `output(obj)` to record what it produced."""
+    __slots__ = ('record', '_wall', '_cpu', '_base', '_peak')
+
+    def __init__(self, name, source, meta):
+        self.record = {'name': name, 'in_bytes': _source_size(source), 'out_bytes': None,
+                       'shape': None, 'thread': threading.current_thread().name}
+        self.record.update(meta)
+
+    def output(self, obj):
+        self.record['out_bytes'] = size_of(obj)
+        shape = getattr(obj, 'shape', None)
+        if shape is not None:
+            self.record['shape'] = list(shape)
+        return obj
+
+    def __enter__(self):
+        stack = _stack()
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, peak)
+            tracemalloc.reset_peak()
+            self._base = self._peak = current
+        else:
+            self._base = None
+        stack.append(self)
+        self.record['depth'] = len(stack) - 1
+        self._wall, self._cpu = time.perf_counter(), time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.record['wall'] = time.perf_counter() - self._wall
+        self.record['cpu'] = time.thread_time() - self._cpu
+        stack = _stack()
+        stack.pop()
+        if self._base is not None and tracemalloc.is_tracing():
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            self.record['peak_bytes'] = self._peak - self._base
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, self._peak)
+        else:
+            self.record['peak_bytes'] = None
+        self.record['error'] = exc[0].__name__ if exc[0] is not None else None
+        with _LOCK:
+            _RECORDS.append(self.record)
+            for block in _BLOCKS:
+                block.append(self.record)
+        return False
+
+
+class _NullSpan():
+    __slots__ = ()
+
+    def output(self, obj):
+        return obj
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def span(name, source=None, **meta):
+    """Context manager that records one stage, if recording is enabled.
+
+    Parameters
+    ----------
+    name : str
+        Stage name, e.g. 'states.vote_table'.
+    source : str or object, None
+        Input: a file path (its size is recorded) or an object with a size.
+    **meta
+        Extra JSON-serializable fields for the record.
+
+    Returns
+    -------
+    context manager
+        Yields an object whose `output(obj)` records the size and shape of the result
+        and returns obj.
+    """
+    if not _active:
+        return _NULL_SPAN
+    return _Span(name, source, meta)
+
+
+def timed(name=None):
+    """Decorator recording each call of a function as a span named after it."""
+    def decorator(fn):
+        label = name or '%s.%s' % (fn.__module__.rpartition('.')[2], fn.__qualname__)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return fn(*args, **kwargs)
+            with _Span(label, None, {}) as s:
+                return s.output(fn(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile(memory=False):
+    """Record spans within the block.
+
+    Parameters
+    ----------
+    memory : bool, False
+        Also trace allocations with tracemalloc (slower) for each span's peak.
+
+    Yields
+    ------
+    list of dict
+        Records of the spans that finish within the block, appended as they finish.
+    """
+    global _active
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    block = []
+    with _LOCK:
+        _active += 1
+        _BLOCKS.append(block)
+    try:
+        yield block
+    finally:
+        with _LOCK:
+            _active -= 1
+            _BLOCKS.remove(block)
+        if started:
+            tracemalloc.stop()
+
+
+def records(name=None):
+    """Copies of the recorded spans, optionally only those whose name starts with name."""
+    with _LOCK:
+        out = [dict(r) for r in _RECORDS]
+    if name is not None:
+        out = [r for r in out if r['name'].startswith(name)]
+    return out
+
+
+def reset():
+    """Drop every record."""
+    with _LOCK:
+        _RECORDS.clear()
+
+
+def report(data=None):
+    """Summary per stage.
+
+    Parameters
+    ----------
+    data : list of dict, None
+        By default every record of this process.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by stage name, sorted by total wall time: number of calls, total and
+        maximum wall time, total CPU time, maximum peak allocation and total input and
+        output bytes.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(records() if data is None else list(data),
+                      columns=['name', 'wall', 'cpu', 'peak_bytes', 'in_bytes', 'out_bytes'])
+    out = df.groupby('name').agg(calls=('wall', 'size'), wall=('wall', 'sum'),
+                                 max_wall=('wall', 'max'), cpu=('cpu', 'sum'),
+                                 peak_bytes=('peak_bytes', 'max'),
+                                 in_bytes=('in_bytes', 'sum'), out_bytes=('out_bytes', 'sum'))
+    return out.sort_values('wall', ascending=False)
+
+
+def dump(path=None, data=None):
+    """Write records (by default every record of this process) as JSON to a path, or to
+    stdout if path is None."""
+    out = {'pid': os.getpid(), 'argv': sys.argv,
+           'records': records() if data is None else list(data)}
+    if path is None:
+        json.dump(out, sys.stdout, indent=1)
+        return
+    with open(path, 'w') as f:
+        json.dump(out, f, indent=1)
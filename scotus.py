@@ -9,25 +9,35 @@
 # Author: Eddie Lee, edlee@alumni.princeton.edu
 # ====================================================================================== #
 import os
+import json
+import shutil
 import pickle
 import logging
+import threading
+from collections.abc import Mapping
 
 import numpy as np
 import pandas as pd
 
-from ._config import DATADR
+from ._config import DATADR, INGEST_MAX_MEMORY
+from ._paths import scdb_paths
+from ._columnar import (ColumnStore, data_dir, fingerprint, ingest_csv, nullable_codes,
+                        publish_dir, version_dir)
+from ._compact import CompactVotes
+from ._cache import cached
+from .profiling import span, timed
 
 log = logging.getLogger(__name__)
 
 
 def _load_legacy_pickle(path):
     """Load a pickle, falling back to latin1 for files written under Python 2."""
-    with open(path, 'rb') as f:
+    with open(path, 'rb') as f, span('pickle.load', path) as s:
         try:
-            return pickle.load(f)
+            return s.output(pickle.load(f))
         except UnicodeDecodeError:
             f.seek(0)
-            return pickle.load(f, encoding='latin1')
+            return s.output(pickle.load(f, encoding='latin1'))
 
 # Natural courts for which conference/report .mat files are available, in chronological order.
 COURT_NAMES = ['waite1', 'waite2', 'waite3', 'FMVinsonVinson', 'SMintonVinson',
@@ -41,6 +51,63 @@ NICE_COURT_NAMES = ['Waite/Waite', 'Harlan/Waite', 'Gray/Waite', 'Vinson/Vinson'
                     'Breyer/Rehnquist', 'Kagan/Roberts']
 SECOND_REHNQUIST_COURT = ['JPStevens', 'SGBreyer', 'RBGinsburg', 'DHSouter', 'AMKennedy',
                           'SDOConnor', 'WHRehnquist', 'AScalia', 'CThomas']
+# From Breyer's appointment to Roberts' appointment.
+SECOND_REHNQUIST_DATES = ('1994-08-03', '2005-09-29')
+# Column order of SECOND_REHNQUIST_COURT from liberal to conservative by Martin-Quinn score.
+SECOND_REHNQUIST_MQ_ORDER = [0, 2, 3, 1, 5, 4, 6, 7, 8]
+
+# Vote type names accepted by the natural-court accessors -> SCDB vote column.
+_VOTE_TYPES = {'maj': 'majority', 'dir': 'direction'}
+
+# Per-justice vote columns of the justice-centered SCDB table that are pivoted into
+# case x justice matrices.
+VOTE_COLUMNS = ('vote', 'majority', 'direction')
+
+# Columns of the justice-centered SCDB table that vary by justice within a case; the rest
+# describe the case (see ScotusData.case_metadata).
+JUSTICE_COLUMNS = ('justice', 'justiceName', 'vote', 'opinion', 'direction', 'majority',
+                   'firstAgreement', 'secondAgreement')
+
+# Storage types for the justice-centered SCDB CSV columns (see _columnar.TableWriter).
+# Integer codes may be missing; columns not listed here are stored as categories.
+SCDB_DATE_FORMAT = '%m/%d/%Y'
+SCDB_SCHEMA = {
+    'caseId': 'category', 'docketId': 'category', 'caseIssuesId': 'category',
+    'voteId': 'category', 'dateDecision': 'datetime', 'decisionType': 'int8',
+    'usCite': 'category', 'sctCite': 'category', 'ledCite': 'category',
+    'lexisCite': 'category', 'term': 'int16', 'naturalCourt': 'int16', 'chief': 'category',
+    'docket': 'category', 'caseName': 'category', 'dateArgument': 'datetime',
+    'dateRearg': 'datetime', 'petitioner': 'int16', 'petitionerState': 'int8',
+    'respondent': 'int16', 'respondentState': 'int8', 'jurisdiction': 'int8',
+    'adminAction': 'int16', 'adminActionState': 'int8', 'threeJudgeFdc': 'int8',
+    'caseOrigin': 'int16', 'caseOriginState': 'int8', 'caseSource': 'int16',
+    'caseSourceState': 'int8', 'lcDisagreement': 'int8', 'certReason': 'int8',
+    'lcDisposition': 'int8', 'lcDispositionDirection': 'int8', 'declarationUncon': 'int8',
+    'caseDisposition': 'int8', 'caseDispositionUnusual': 'int8', 'partyWinning': 'int8',
+    'precedentAlteration': 'int8', 'voteUnclear': 'int8', 'issue': 'int32',
+    'issueArea': 'int8', 'decisionDirection': 'int8', 'decisionDirectionDissent': 'int8',
+    'authorityDecision1': 'int8', 'authorityDecision2': 'int8', 'lawType': 'int8',
+    'lawSupp': 'int16', 'lawMinor': 'category', 'majOpinWriter': 'int16',
+    'majOpinAssigner': 'int16', 'splitVote': 'int8', 'majVotes': 'int8', 'minVotes': 'int8',
+    'justice': 'int16', 'justiceName': 'category', 'vote': 'int8', 'opinion': 'int8',
+    'direction': 'int8', 'majority': 'int8', 'firstAgreement': 'int16',
+    'secondAgreement': 'int16',
+}
+
+# Per-court store of the Warren-era votes written by setup_warren_votes_by_court: an index
+# file plus one .npy file per court and matrix kind, in the version subdirectory the index
+# names (see _columnar.publish_dir). The single pickle it replaces is still read when the
+# store is absent.
+WARREN_BY_COURT_DIR = 'warren_conf_votes_bycourt'
+WARREN_BY_COURT_PICKLE = 'warren_conf_votes_bycourt.p'
+WARREN_INDEX_FILE = 'index.json'
+# Matrix kind (key prefix in the by-court pickle) -> ConferenceReportVotes field.
+_WARREN_KINDS = {'confVotes': 'conference_votes_by_court',
+                 'confIdeVotes': 'conference_ideology_votes_by_court',
+                 'rptVotes': 'report_votes_by_court',
+                 'rptIdeVotes': 'report_ideology_votes_by_court',
+                 'mrtVotes': 'extra_merit_votes_by_court',
+                 'mrtPresent': 'extra_merit_present_by_court'}
 
 # The 20 justices that appear in the Warren-era (vinwar) data set, sorted.
 WARREN_JUSTICE_NAMES = np.sort(['mar', 'fort', 'gold', 'bw', 'stwt', 'whit', 'brn', 'har',
@@ -57,7 +124,10 @@ class ConferenceReportVotes():
         Fields
         ------
         extra_merit_votes_by_court
-            Extra merit votes listed chronologically by column before the final conference vote.
+            Extra merit votes before the final conference vote as an int8 cases x rounds x
+            justices array, rounds in chronological order.
+        extra_merit_present_by_court
+            cases x rounds mask of the extra merit rounds that were held.
         conference_votes_by_court
             Final conference votes.
         conference_ideology_votes_by_court
@@ -73,18 +143,35 @@ class ConferenceReportVotes():
         courts
             List of natural court titles.
         """
-        data = _load_legacy_pickle(os.path.join(DATADR, 'warren_conf_votes_bycourt.p'))
-        self.extra_merit_votes_by_court = data['mrtVotesByCourt']
-        self.conference_votes_by_court = data['confVotesByCourt']
-        self.conference_ideology_votes_by_court = data['confIdeVotesByCourt']
+        path = os.path.join(DATADR, WARREN_BY_COURT_DIR)
+        if os.path.isfile(os.path.join(path, WARREN_INDEX_FILE)):
+            self._open_store(path)
+        else:
+            self._load_pickle(os.path.join(DATADR, WARREN_BY_COURT_PICKLE))
+
+    def _open_store(self, path):
+        """Read the per-court index. Matrices are loaded on first access to each court."""
+        index_file = os.path.join(path, WARREN_INDEX_FILE)
+        with open(index_file) as f:
+            index = json.load(f)
+        self.courts = index['courts']
+        self.justices_by_court = {c: np.array(index['justices'][c]) for c in self.courts}
+        self.justice_index_by_court = {c: np.array(index['justice_index'][c])
+                                       for c in self.courts}
+        for kind, field in _WARREN_KINDS.items():
+            setattr(self, field, _CourtMatrices(data_dir(path, index), index['files'], kind))
+
+    def _load_pickle(self, path):
+        """Read every court from the single by-court pickle."""
+        data = cached(path, lambda: _read_warren_by_court_pickle(path), 'warren_by_court')
+        for kind, field in _WARREN_KINDS.items():
+            setattr(self, field, data[kind + 'ByCourt'])
         self.justices_by_court = data['justicesByCourt']
-        self.report_votes_by_court = data['rptVotesByCourt']
-        self.report_ideology_votes_by_court = data['rptIdeVotesByCourt']
         self.justice_index_by_court = data['justiceIxByCourt']
-
         self.courts = list(self.extra_merit_votes_by_court.keys())
 
-    def conference_and_report(self, court_name, ideological=True, include_extra_merits=False):
+    def conference_and_report(self, court_name, ideological=True, include_extra_merits=False,
+                              compact=False):
         """Return the final conference and report votes for a specified court.
 
         Parameters
@@ -93,7 +180,12 @@ class ConferenceReportVotes():
         ideological : bool, True
             If True, return votes coded by ideological direction, else by outcome.
         include_extra_merits : bool, False
-            If True, also append the extra merit votes for the court.
+            If True, also append the extra merit votes for the court, an int8 cases x
+            rounds x justices array that is 0 in rounds that were not held (see
+            extra_merit_present_by_court).
+        compact : bool, False
+            If True, return each table as CompactVotes labeled by the court's justices. In
+            the extra merit votes, rounds that were not held are missing.
 
         Returns
         -------
@@ -109,9 +201,99 @@ class ConferenceReportVotes():
 
         if include_extra_merits:
             result.append(self.extra_merit_votes_by_court[court_name])
+        if compact:
+            justices = self.justices_by_court[court_name]
+            result[:2] = [CompactVotes.from_array(v, columns=justices) for v in result[:2]]
+            if include_extra_merits:
+                absent = ~self.extra_merit_present_by_court[court_name]
+                result[2] = CompactVotes(result[2], np.broadcast_to(absent[:, :, None],
+                                                                    result[2].shape))
         return result
 
 
+class _CourtMatrices(Mapping):
+    """Read-only court name -> matrix mapping over one matrix kind of the per-court Warren
+    store. Each matrix is memory-mapped on first access and kept in the process-wide cache.
+    """
+    def __init__(self, path, files, kind):
+        self._path = path
+        self._files = files
+        self._kind = kind
+
+    def __getitem__(self, court):
+        if court not in self._files:
+            raise KeyError(court)
+        return _load_court_matrix(
+            os.path.join(self._path, '%s_%s.npy' % (self._files[court], self._kind)))
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+
+def _load_court_matrix(path):
+    """Read-only memory map of one stored matrix, from the process-wide cache while the file
+    is unchanged.
+    """
+    def load():
+        with span('np.load', path) as s:
+            return s.output(np.load(path, mmap_mode='r'))
+    return cached(path, load, 'npy')
+
+
+def _read_warren_by_court_pickle(path):
+    """The single by-court pickle, with extra merit votes converted to arrays."""
+    data = _load_legacy_pickle(path)
+    if 'mrtPresentByCourt' not in data:  # written before merit votes were stored as arrays
+        data['mrtPresentByCourt'] = {}
+        for court, votes in data['mrtVotesByCourt'].items():
+            data['mrtVotesByCourt'][court], data['mrtPresentByCourt'][court] = \
+                _merit_votes_from_objects(votes, len(data['justicesByCourt'][court]))
+    return data
+
+
+def _read_conference_report_mat(name):
+    """Raw conference and report votes from <name>_confra_idevotes.mat.
+
+    The first read converts the .mat file into an .npz sidecar that records the source's
+    size and modification time; later reads use the sidecar while it matches, so MATLAB
+    parsing (and the scipy import) is skipped. A sidecar without its .mat file is used as
+    is.
+
+    Returns
+    -------
+    confv, finv : ndarray
+        Votes as stored, with -1 for missing.
+    """
+    source = os.path.join(DATADR, '%s_confra_idevotes.mat' % name)
+    sidecar = os.path.join(DATADR, '%s_confra_idevotes.npz' % name)
+    fp = fingerprint(source) if os.path.isfile(source) else None
+    if os.path.isfile(sidecar):
+        with span('np.load', sidecar), np.load(sidecar) as f:
+            if fp is None or f['source'].tolist() == [fp['size'], fp['mtime_ns']]:
+                return f['confv'], f['finv']
+
+    import scipy.io as sio
+
+    with span('sio.loadmat', source):
+        indata = sio.loadmat(source)
+    confv = finv = None
+    for k in list(indata.keys()):
+        if k.rfind('all') >= 0:
+            if k.rfind('conf') >= 0:
+                confv = indata[k]
+            else:
+                finv = indata[k]
+
+    tmp = '%s.tmp-%d-%d' % (sidecar, os.getpid(), threading.get_ident())
+    with open(tmp, 'wb') as f:
+        np.savez(f, confv=confv, finv=finv, source=[fp['size'], fp['mtime_ns']])
+    os.replace(tmp, sidecar)
+    return confv, finv
+
+
 class ScotusData():
     """Wrapper for access to the modern Supreme Court Database (SCDB). Votes are
     considered in the {-1, 1} basis.
@@ -121,55 +303,217 @@ class ScotusData():
         Parameters
         ----------
         rebase : bool, False
-            Rebuild the cached pickle from the source CSV. Set this when fetching a new year.
+            Rebuild the cached table from the source CSV. The cache is also rebuilt
+            automatically whenever the source CSV changes.
         legacy : bool, False
             Load the SCDB legacy data set instead of the modern one.
         year : int, 2024
             Release year of the SCDB modern data set.
         """
-        if legacy:
-            self.fname = os.path.join(DATADR, 'scotus_table_legacy.p')
-            self.datafile = 'SCDB_Legacy_04_justiceCentered_Citation.csv'
-        else:
-            self.fname = os.path.join(DATADR, 'scotus_table.p')
-            self.datafile = f'SCDB_{year}_01_justiceCentered_Citation.csv'
+        self._table = None
+        self._reset_derived()
+        self.legacy = legacy
+        self.year = year
+        self.cache_dir, self.datafile = scdb_paths(legacy=legacy, year=year)
 
-        if (not os.path.isfile(self.fname)) or rebase:
+        if rebase or not self._cache_is_current():
             self.rebase_data()
+        self.store = ColumnStore(self.cache_dir)
+        self._mq = None
+
+    def _cache_is_current(self):
+        """True if the columnar cache exists and was built from the current source CSV. A
+        cache without its source CSV (e.g. a copied data directory) is taken as is.
+        """
+        if not ColumnStore.is_table(self.cache_dir):
+            return False
         try:
-            with open(self.fname, 'rb') as f:
-                self.table = pickle.load(f)['table']
-        except UnicodeDecodeError:
-            self.rebase_data()
-            with open(self.fname, 'rb') as f:
-                self.table = pickle.load(f)['table']
-        self.setup_MQ_score()
-
-    def rebase_data(self):
-        """Reload the data table from the SCDB CSV (justice-centered citation) and cache it."""
-        log.info("Rebasing data from %s...", os.path.join(DATADR, self.datafile))
-        table = pd.read_csv(os.path.join(DATADR, self.datafile), encoding='latin1')
-        with open(self.fname, 'wb') as f:
-            pickle.dump({'table': table}, f, -1)
+            store = ColumnStore(self.cache_dir)
+        except ValueError:  # written in an older format
+            return False
+        source = os.path.join(DATADR, self.datafile)
+        if not os.path.isfile(source):
+            return True
+        return store.meta.get('source') == fingerprint(source)
+
+    def rebase_data(self, max_memory=INGEST_MAX_MEMORY):
+        """Reload the data table from the SCDB CSV (justice-centered citation) and cache it
+        as a columnar table keyed by release and source fingerprint. See setup_scdb.
+
+        Parameters
+        ----------
+        max_memory : int, INGEST_MAX_MEMORY
+            Approximate bound in bytes on memory used while parsing.
+        """
+        setup_scdb(legacy=self.legacy, year=self.year, max_memory=max_memory)
+        self.store = ColumnStore(self.cache_dir)
+        self._table = None
+        self._reset_derived()
         log.info("Done.")
 
-    def maj_vote_table(self):
-        """Votes of each justice by case with majority orientation."""
-        return pd.pivot_table(self.table.loc[:, ('caseId', 'justiceName', 'majority')],
-                              columns='justiceName', index='caseId',
-                              fill_value=np.nan, dropna=False)
+    @property
+    def table(self):
+        """Full justice-centered table. Decoding every column is expensive; the accessors
+        read only the columns they need.
+        """
+        if self._table is None:
+            self._table = self.store.to_frame()
+        return self._table
+
+    @table.setter
+    def table(self, df):
+        self._table = df
+        self._reset_derived()
+
+    def _reset_derived(self):
+        """Drop the memoized vote matrices, per-case metadata and case indexes."""
+        self._vote_matrices = None
+        self._case_columns = {}
+        self._case_index = None
+
+    def _column(self, name):
+        """One column of the justice-centered table, read lazily from the cache."""
+        if self._table is not None:
+            return self._table[name]
+        return self.store.column(name)
+
+    def _build_vote_matrices(self):
+        """Scatter every column in VOTE_COLUMNS into dense case x justice arrays.
+
+        caseId and justiceName are factorized once (sorted, matching pd.pivot_table) and
+        shared by all vote columns. Duplicate (case, justice) rows, if any, are averaged as
+        pivot_table would. The result is memoized until the next rebase_data(), and
+        shared between instances reading the same cache through the process-wide cache.
+
+        Returns
+        -------
+        tuple
+            (case index, justice index, dict of column name -> 2d float ndarray,
+             row of each case's first entry in the justice-centered table,
+             case of each row in the justice-centered table or -1 if it has no caseId)
+
+        """
+        if self._vote_matrices is None:
+            self._vote_matrices = self._shared('vote_matrices', self._scatter_votes)
+        return self._vote_matrices
+
+    def _shared(self, name, build, *options):
+        """Result of build(), instrumented and, while the data come from the columnar cache
+        rather than a table assigned in memory, shared across instances through the
+        process-wide cache.
+        """
+        def load():
+            with span('scotus.' + name) as s:
+                return s.output(build())
+        if self._table is not None:
+            return load()
+        return cached(self.cache_dir, load, ('ScotusData', name) + options,
+                      version=self.store.version)
+
+    def _scatter_votes(self):
+        case_codes, cases = pd.factorize(self._column('caseId'), sort=True)
+        justice_codes, justices = pd.factorize(self._column('justiceName'), sort=True)
+        keep = (case_codes > -1) & (justice_codes > -1)
+        shape = (len(cases), len(justices))
+        size = shape[0] * shape[1]
+        flat = case_codes[keep] * shape[1] + justice_codes[keep]
+        unique_cells = np.bincount(flat, minlength=size).max() <= 1
+
+        matrices = {}
+        for col in VOTE_COLUMNS:
+            values = self._column(col).values[keep].astype(float)
+            cast = ~np.isnan(values)
+            if unique_cells:
+                m = np.full(size, np.nan)
+                m[flat[cast]] = values[cast]
+            else:
+                total = np.bincount(flat[cast], weights=values[cast], minlength=size)
+                count = np.bincount(flat[cast], minlength=size)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    m = total / count
+            matrices[col] = m.reshape(shape)
+
+        # Case metadata come from any of the case's rows, including rows without a justice
+        # name, so every case has a first row.
+        rows = np.where(case_codes > -1)[0]
+        first_rows = np.full(shape[0], -1, dtype=np.int64)
+        first_rows[case_codes[rows][::-1]] = rows[::-1]
+        return (pd.Index(np.asarray(cases), name='caseId'),
+                pd.Index(np.asarray(justices), name='justiceName'),
+                matrices, first_rows, case_codes)
+
+    def _pivoted(self, col, compact=False):
+        """Case x justice table for one vote column, laid out like pd.pivot_table."""
+        cases, justices, matrices = self._build_vote_matrices()[:3]
+        columns = pd.MultiIndex.from_product([[col], justices], names=[None, 'justiceName'])
+        if compact:
+            return CompactVotes.from_array(matrices[col], index=cases, columns=columns)
+        return pd.DataFrame(matrices[col], index=cases, columns=columns, copy=True)
+
+    def maj_vote_table(self, compact=False):
+        """Votes of each justice by case with majority orientation.
 
-    def dir_vote_table(self):
-        """Votes of each justice by case with ideological orientation."""
-        return pd.pivot_table(self.table.loc[:, ('caseId', 'justiceName', 'direction')],
-                              columns='justiceName', index='caseId',
-                              fill_value=np.nan, dropna=False)
+        Parameters
+        ----------
+        compact : bool, False
+            If True, return CompactVotes (int8 codes with a missing mask) instead of a
+            float DataFrame with NaN for missing votes.
+        """
+        return self._pivoted('majority', compact)
 
-    def vote_table(self):
-        """Raw vote of each justice by case."""
-        return pd.pivot_table(self.table.loc[:, ('caseId', 'justiceName', 'vote')],
-                              columns='justiceName', index='caseId',
-                              fill_value=np.nan, dropna=False)
+    def dir_vote_table(self, compact=False):
+        """Votes of each justice by case with ideological orientation. See maj_vote_table."""
+        return self._pivoted('direction', compact)
+
+    def vote_table(self, compact=False):
+        """Raw vote of each justice by case. See maj_vote_table."""
+        return self._pivoted('vote', compact)
+
+    def case_metadata(self, columns=None):
+        """Per-case metadata, one row per case aligned with the vote tables.
+
+        Case-level columns of the justice-centered table are deduplicated by taking each
+        case's first non-missing entry. Integer codes keep their compact type, as nullable
+        integers when values are missing. Each column is built once and memoized until the
+        next rebase_data().
+
+        Parameters
+        ----------
+        columns : list of str, None
+            Columns to return. By default every column not in JUSTICE_COLUMNS.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by caseId.
+        """
+        if columns is None:
+            names = self._table.columns if self._table is not None else self.store.columns
+            columns = [c for c in names if c != 'caseId' and c not in JUSTICE_COLUMNS]
+        cases = self._build_vote_matrices()[0]
+        return pd.DataFrame({c: self._case_column(c) for c in columns}, index=cases)
+
+    def _case_column(self, name):
+        if name not in self._case_columns:
+            first_rows, row_cases = self._build_vote_matrices()[3:]
+            self._case_columns[name] = self._shared(
+                'case_column', lambda: self._first_case_values(name, first_rows, row_cases),
+                name)
+        return self._case_columns[name]
+
+    def _first_case_values(self, name, first_rows, row_cases):
+        """First non-missing entry of a column for each case."""
+        column = self._column(name).values
+        values = column[first_rows]
+        if values.dtype.kind == 'f':
+            gaps = np.isnan(values)
+            if gaps.any():
+                # fall back to the first entry of the case that has a value
+                filled = np.where(~np.isnan(column) & (row_cases > -1))[0][::-1]
+                values[row_cases[filled]] = column[filled]
+                values[~gaps] = column[first_rows[~gaps]]
+            values = nullable_codes(values)
+        return values
 
     def issue_table(self, detailed=False):
         """Legal issue per case.
@@ -179,47 +523,206 @@ class ScotusData():
         detailed : bool, False
             If True, return the specific legal issue, else the broad legal issue area.
         """
-        col = 'issue' if detailed else 'issueArea'
-        return pd.pivot_table(self.table.loc[:, ('caseId', col)],
-                              index='caseId', fill_value=np.nan, dropna=False)
+        return self.case_metadata(['issue' if detailed else 'issueArea'])
 
     def term_table(self):
         """SCOTUS term per case."""
-        return pd.pivot_table(self.table.loc[:, ('caseId', 'term')],
-                              index='caseId', fill_value=np.nan, dropna=False)
+        return self.case_metadata(['term'])
 
     def natural_court(self):
         """Natural court designation per case."""
-        return pd.pivot_table(self.table.loc[:, ('caseId', 'naturalCourt')],
-                              index='caseId', fill_value=np.nan, dropna=False)
+        return self.case_metadata(['naturalCourt'])
 
     def justice_names(self):
         """All justice names ordered alphabetically."""
-        return np.unique(self.table.justiceName)
+        return np.unique(np.asarray(self._column('justiceName')))
 
     def setup_MQ_score(self):
-        """Build the Martin-Quinn ideology score lookup keyed by justice name."""
-        df = pd.read_csv(os.path.join(DATADR, 'justices.csv'))
-        ref = {}
-        for n in np.unique(df['justiceName']):
-            mask = (df['justiceName'] == n).values
-            ref[n] = (df['term'].iloc[mask].values, df['post_mn'].iloc[mask].values)
-        self.mqdict = ref
+        """Load the Martin-Quinn ideology scores into a dense justice x term table. Called
+        on first use of MQ_score or mqdict.
+        """
+        path = os.path.join(DATADR, 'justices.csv')
+        self._mq = cached(path, lambda: _read_mq_scores(path), 'mq')
+
+    @property
+    def mqdict(self):
+        """Martin-Quinn (terms, scores) arrays keyed by justice name."""
+        if self._mq is None:
+            self.setup_MQ_score()
+        if 'dict' not in self._mq:
+            df = self._mq['table']
+            self._mq['dict'] = {n: (g['term'].values, g['post_mn'].values)
+                                for n, g in df.groupby('justiceName', sort=True)}
+        return self._mq['dict']
 
     def MQ_score(self, name, year=None):
-        """Martin-Quinn ideology score for a justice.
+        """Martin-Quinn ideology score for a justice, or for many (justice, term) pairs.
 
         Parameters
         ----------
-        name : str
-        year : int or None
-            If None, return the full (terms, scores) arrays for the justice. Otherwise
-            return the single score for that term.
+        name : str or array-like of str
+        year : int, array-like of int, or None
+            If None, return the full (terms, scores) arrays for the single justice name.
+            Otherwise return the score for that term. Arrays of names and years are
+            broadcast against each other and looked up in one vectorized call. Float
+            years are accepted if they are whole numbers (e.g. 1990.0).
+
+        Returns
+        -------
+        float, tuple of ndarray, or ndarray
+            For array input, an array of scores with NaN for pairs that have no score.
+
+        Raises
+        ------
+        KeyError
+            For a single unknown name.
+        ValueError
+            For a single (name, year) pair without a score, or a non-integral year.
         """
-        terms, scores = self.mqdict[name]
         if year is None:
-            return terms, scores
-        return scores[terms.tolist().index(year)]
+            return self.mqdict[name]
+        if self._mq is None:
+            self.setup_MQ_score()
+        mq = self._mq
+
+        years = _as_terms(year)
+        if np.ndim(name) == 0 and years.ndim == 0:
+            code = mq['justices'].get_loc(name)
+            col = int(years) - mq['first_term']
+            if not (0 <= col < mq['served'].shape[1] and mq['served'][code, col]):
+                raise ValueError("No Martin-Quinn score for %s in %s." % (name, year))
+            return mq['scores'][code, col]
+
+        names, years = np.broadcast_arrays(np.asarray(name, dtype=object), years)
+        codes = mq['justices'].get_indexer(names.ravel()).reshape(names.shape)
+        cols = years - mq['first_term']
+        valid = (codes > -1) & (cols >= 0) & (cols < mq['scores'].shape[1])
+        out = np.full(names.shape, np.nan)
+        out[valid] = mq['scores'][codes[valid], cols[valid]]
+        return out
+
+    def _build_case_index(self):
+        """Lookups from natural court and term to vote matrix rows and a date-sorted row
+        order, built from the per-case metadata. Memoized until the next rebase_data().
+        """
+        if self._case_index is not None:
+            return self._case_index
+        court = self._case_column('naturalCourt')
+        term = pd.array(self._case_column('term')).to_numpy(dtype=float, na_value=np.nan)
+        date = pd.to_datetime(self._case_column('dateDecision')).values
+        date_order = np.argsort(date, kind='stable')
+
+        rows = pd.Series(np.arange(date.size))
+        self._case_index = {'term': term,
+                            'court_rows': rows.groupby(court).indices,
+                            'term_rows': rows.groupby(term).indices,
+                            'date_order': date_order,
+                            'sorted_dates': date[date_order]}
+        return self._case_index
+
+    def _select_cases(self, court_id=None, date_range=None, term=None):
+        """Sorted vote-matrix rows of the cases matching every given filter."""
+        index = self._build_case_index()
+        selected = []
+        if court_id is not None:
+            selected.append(index['court_rows'].get(court_id, np.zeros(0, dtype=np.int64)))
+        if term is not None:
+            first, last = (term, term) if np.ndim(term) == 0 else term
+            selected.append(np.concatenate(
+                [np.zeros(0, dtype=np.int64)] +
+                [r for t, r in index['term_rows'].items() if first <= t <= last]))
+        if date_range is not None:
+            lo, hi = np.searchsorted(index['sorted_dates'],
+                                     pd.to_datetime(list(date_range)).values)
+            selected.append(index['date_order'][lo:hi])
+        if not selected:
+            return np.arange(index['date_order'].size)
+        rows = np.sort(selected[0])
+        for r in selected[1:]:
+            rows = np.intersect1d(rows, r, assume_unique=True)
+        return rows
+
+    def natural_court_votes(self,
+                            court_id=None,
+                            justices=None,
+                            date_range=None,
+                            term=None,
+                            vote_type='maj',
+                            n_voters=None,
+                            sort_by='mq',
+                            return_case_ix=False,
+                            return_justices_ix=False):
+        """Voting record of a natural court, selected by SCDB natural court code, by a set
+        of justices, by decision dates and/or by terms. Cases are looked up through
+        per-case indexes built once per instance.
+
+        Parameters
+        ----------
+        court_id : int, None
+            SCDB naturalCourt code.
+        justices : list of str, None
+            Justices forming the court. By default, every justice with a vote in the
+            selected cases.
+        date_range : tuple, None
+            (first, end) decision dates; end is exclusive.
+        term : int or tuple, None
+            A term or an inclusive (first, last) range of terms.
+        vote_type : str, 'maj'
+            'maj' (majority orientation) or 'dir' (ideological direction).
+        n_voters : int, None
+            Number of justices that must cast a vote (code 1 or 2). By default, all of them.
+        sort_by : str or None, 'mq'
+            'mq' orders justices from liberal to conservative by their mean Martin-Quinn
+            score over the returned cases' terms. None keeps the given (or alphabetical)
+            order.
+        return_case_ix : bool, False
+            If True, also return a boolean mask of the selected cases over all cases.
+        return_justices_ix : bool, False
+            If True, also return the column indices of the justices in the vote table.
+
+        Returns
+        -------
+        pd.DataFrame
+            Votes indexed by caseId with one column per justice.
+        ndarray, optional
+            Case mask, if return_case_ix is True.
+        ndarray, optional
+            Justice column indices, if return_justices_ix is True.
+        """
+        if vote_type not in _VOTE_TYPES:
+            raise NotImplementedError
+        if sort_by not in ('mq', None):
+            raise ValueError("Unrecognized sort_by option: %r" % sort_by)
+        cases, all_justices, matrices = self._build_vote_matrices()[:3]
+        votes = matrices[_VOTE_TYPES[vote_type]]
+        rows = self._select_cases(court_id=court_id, date_range=date_range, term=term)
+
+        if justices is None:
+            cols = np.where(~np.isnan(votes[rows]).all(0))[0]
+        else:
+            cols = np.array([all_justices.get_loc(n) for n in justices], dtype=np.int64)
+        sub = votes[rows][:, cols]
+        n_cast = ((sub == 1) | (sub == 2)).sum(1)
+        keep = n_cast == (len(cols) if n_voters is None else n_voters)
+        rows, sub = rows[keep], sub[keep]
+
+        order = np.arange(len(cols))
+        if sort_by == 'mq' and rows.size:
+            terms = self._build_case_index()['term'][rows]
+            scores = self.MQ_score(np.asarray(all_justices[cols])[:, None], terms[None, :])
+            order = np.argsort(np.nanmean(scores, axis=1), kind='stable')
+
+        output = [pd.DataFrame(sub[:, order], index=cases[rows],
+                               columns=all_justices[cols[order]])]
+        if not (return_case_ix or return_justices_ix):
+            return output[0]
+        if return_case_ix:
+            case_ix = np.zeros(len(cases), dtype=bool)
+            case_ix[rows] = True
+            output.append(case_ix)
+        if return_justices_ix:
+            output.append(cols[order])
+        return tuple(output)
 
     def second_rehnquist_court(self,
                                vote_type='maj',
@@ -228,7 +731,7 @@ class ScotusData():
                                sorted_by_mq=False,
                                n_voters=9):
         """Voting record for the Second Rehnquist Court (1994-2005). Data set size K=909
-        when vote_type='maj'.
+        when vote_type='maj'. See natural_court_votes for the general query.
 
         Parameters
         ----------
@@ -248,50 +751,34 @@ class ScotusData():
         tuple
             (votes,) plus any requested indices.
         """
-        if vote_type == 'maj':
-            vote_type = 'majority'
-            subTable = self.maj_vote_table()[vote_type][SECOND_REHNQUIST_COURT]
-            cols = self.maj_vote_table()[vote_type].columns
-        elif vote_type == 'dir':
-            vote_type = 'direction'
-            subTable = self.dir_vote_table()[vote_type][SECOND_REHNQUIST_COURT]
-            cols = self.dir_vote_table()[vote_type].columns
-        else:
-            raise NotImplementedError
-
-        # Vote codes 1 and 2 mark a cast (majority/minority) vote; only keep cases where the
-        # requested number of members cast such a vote.
-        if n_voters == 9:
-            ix = (((subTable == 1) | (subTable == 2)).sum(1) == n_voters).values
-        else:
-            # With fewer than 9 members we must also bound by date, using Breyer's appointment
-            # and the appointment of Roberts.
-            ix = ((pd.to_datetime(self.table.dateDecision) >= '1994-08-03') &
-                  (pd.to_datetime(self.table.dateDecision) < '2005-09-29')).values
-            case_id = np.unique(self.table['caseId'].loc[ix])
-
-            ix = ((((subTable == 1) | (subTable == 2)).sum(1) == n_voters).values &
-                  [i in case_id for i in subTable.index])
+        # With fewer than 9 members we must also bound by date, using Breyer's appointment
+        # and the appointment of Roberts.
+        subTable, ix, cols = self.natural_court_votes(
+            justices=SECOND_REHNQUIST_COURT,
+            date_range=None if n_voters == 9 else SECOND_REHNQUIST_DATES,
+            vote_type=vote_type, n_voters=n_voters, sort_by=None,
+            return_case_ix=True, return_justices_ix=True)
 
         if sorted_by_mq:
-            # Reorder the 9 columns from liberal to conservative by Martin-Quinn score.
-            subTable = subTable.iloc[:, [0, 2, 3, 1, 5, 4, 6, 7, 8]]
+            subTable = subTable.iloc[:, SECOND_REHNQUIST_MQ_ORDER]
 
-        output = [subTable.loc[ix]]
+        output = [subTable]
         if return_case_ix:
             output.append(ix)
         if return_justices_ix:
-            output.append(np.array([cols.get_loc(n) for n in SECOND_REHNQUIST_COURT]))
+            output.append(cols)
         return tuple(output)
 
     @staticmethod
-    def load_conference_report_votes(court_index):
+    def load_conference_report_votes(court_index, compact=False):
         """Load conference and report votes for one natural court from its .mat file.
 
         Parameters
         ----------
         court_index : int
             Index into COURT_NAMES.
+        compact : bool, False
+            If True, return the votes as CompactVotes instead of float arrays.
 
         Returns
         -------
@@ -300,24 +787,47 @@ class ScotusData():
         full_votes_ix : ndarray of bool
             Rows with complete records in both conference and report votes.
         """
-        import scipy.io as sio
-
         name = COURT_NAMES[court_index]
-        indata = sio.loadmat(os.path.join(DATADR, '%s_confra_idevotes' % name))
-        confv = finv = None
-        for k in list(indata.keys()):
-            if k.rfind('all') >= 0:
-                if k.rfind('conf') >= 0:
-                    confv = indata[k].astype(float)
-                    confv[confv == -1] = np.nan
-                else:
-                    finv = indata[k].astype(float)
-                    finv[finv == -1] = np.nan
+        path = os.path.join(DATADR, '%s_confra_idevotes.mat' % name)
+        if not os.path.isfile(path):
+            path = os.path.join(DATADR, '%s_confra_idevotes.npz' % name)
+        confv, finv = cached(path, lambda: _read_conference_report_mat(name),
+                             'conference_report')
+        confv = confv.astype(float)
+        confv[confv == -1] = np.nan
+        finv = finv.astype(float)
+        finv[finv == -1] = np.nan
 
         full_votes_ix = np.logical_and((np.isnan(confv) == 0).sum(1) == 9,
                                        (np.isnan(finv) == 0).sum(1) == 9)
+        if compact:
+            confv, finv = CompactVotes.from_array(confv), CompactVotes.from_array(finv)
         return confv, finv, full_votes_ix
 
+    @staticmethod
+    def load_all_conference_report_votes(compact=False, jobs=None):
+        """Load the conference and report votes of every court in COURT_NAMES, reading the
+        files concurrently. See load_conference_report_votes.
+
+        Parameters
+        ----------
+        compact : bool, False
+            If True, return the votes as CompactVotes instead of float arrays.
+        jobs : int, None
+            Number of threads; by default one per court.
+
+        Returns
+        -------
+        dict
+            Court name -> (confv, finv, full_votes_ix).
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=jobs or len(COURT_NAMES)) as pool:
+            loaded = pool.map(lambda i: ScotusData.load_conference_report_votes(i, compact),
+                              range(len(COURT_NAMES)))
+            return dict(zip(COURT_NAMES, loaded))
+
     def october_2015_term(self):
         """October 2015 term during which Scalia died. Data from the SCOTUSblog stat pack.
         +1 is a vote with the majority, -1 against the majority, 0 a recusal. This data is
@@ -328,14 +838,60 @@ class ScotusData():
 
 
 # ====================================================================================== #
-# Setup routines that build the pickled Warren-era data.                                 #
+# Setup routines that build the cached SCDB table and the pickled Warren-era data.       #
 # ====================================================================================== #
+def _read_mq_scores(path):
+    """Martin-Quinn scores from justices.csv as a dense justice x term table."""
+    with span('pd.read_csv', path) as s:
+        df = s.output(pd.read_csv(path))
+    codes, justices = pd.factorize(df['justiceName'], sort=True)
+    terms = df['term'].values.astype(np.int64)
+    first_term = terms.min()
+    scores = np.full((len(justices), terms.max() - first_term + 1), np.nan)
+    served = np.zeros(scores.shape, dtype=bool)
+    # Assign in reverse so that the first row wins for any repeated (justice, term).
+    scores[codes[::-1], terms[::-1] - first_term] = df['post_mn'].values[::-1]
+    served[codes, terms - first_term] = True
+    return {'justices': pd.Index(np.asarray(justices)), 'first_term': first_term,
+            'scores': scores, 'served': served, 'table': df}
+
+
+def _as_terms(year):
+    """Terms as int64, accepting whole-number floats such as 1990.0."""
+    years = np.asarray(year)
+    if years.dtype.kind == 'f':
+        if not (np.isfinite(years) & (years == np.round(years))).all():
+            raise ValueError("Terms must be whole years, not %r." % (year,))
+    elif years.dtype.kind not in 'iu':
+        raise TypeError("Terms must be integers, not %r." % (year,))
+    return years.astype(np.int64)
+
+
+@timed()
+def setup_scdb(legacy=False, year=2024, max_memory=INGEST_MAX_MEMORY):
+    """Build the columnar cache that ScotusData reads from the SCDB justice-centered CSV.
+
+    The CSV is streamed in chunks against SCDB_SCHEMA, so peak memory stays near
+    max_memory regardless of the file size.
+    """
+    cache_dir, datafile = scdb_paths(legacy=legacy, year=year)
+    source = os.path.join(DATADR, datafile)
+    log.info("Rebasing data from %s...", source)
+    with span('columnar.ingest_csv', source):
+        ingest_csv(source, cache_dir, SCDB_SCHEMA,
+                   meta={'datafile': datafile, 'source': fingerprint(source)},
+                   max_memory=max_memory, date_format=SCDB_DATE_FORMAT, encoding='latin1')
+
+
+@timed()
 def setup_warren_votes(disp=True):
     """Build the flat Warren-era conference/report vote pickle (warren_conf_votes.p) from
     the vinwar source. Conference and report votes are binarized (deny/affirm -> -1,
-    grant/reverse -> 1, conservative -> -1, liberal -> 1, missing -> 0).
+    grant/reverse -> 1, conservative -> -1, liberal -> 1, missing -> 0). Extra merit votes
+    are stored as an int8 cases x rounds x justices array ('mrtVotes', binarized the same
+    way) with a cases x rounds mask of the rounds that were held ('mrtPresent').
     """
-    df = pd.read_pickle(os.path.join(DATADR, 'vinwar_stata_EDL.xlsx.p'))
+    df = _read_vinwar()
     names = WARREN_JUSTICE_NAMES
 
     # Find merits votes.
@@ -358,47 +914,47 @@ def setup_warren_votes(disp=True):
     confVotes = _collect('2r')
     confIdeVotes = _collect('2dir')
 
-    confVoteDate = df['votedat2'].values
-    rptVoteDate = df['votedat3'].values
+    confVoteDate = df['votedat2'].values.copy()
+    rptVoteDate = df['votedat3'].values.copy()
     confVoteDate[confVoteDate == '1582-10-14'] = pd.Timestamp(1900, 1, 1)
     rptVoteDate[rptVoteDate == '1582-10-14'] = pd.Timestamp(1900, 1, 1)
 
     # Binarize the conference and report votes.
-    for votes in (rptVotes, rptIdeVotes, confVotes, confIdeVotes):
-        votes.fillna('', inplace=True)
-    for votes in (rptVotes, confVotes):
-        votes.replace({'deny/affirm': -1, 'grant/reverse': 1, '': 0}, inplace=True)
-    for votes in (rptIdeVotes, confIdeVotes):
-        votes.replace({'conservative': -1, 'liberal': 1, '': 0}, inplace=True)
-
-    # Save extra merit votes in an object array; each of the (up to 5) columns holds either
-    # -1 (no vote) or a vector of len(names) giving the votes for that merit round.
-    mrtVotes = (np.zeros((len(df), 5), dtype=int) - 1).astype(object)
+    outcome = {'deny/affirm': -1, 'grant/reverse': 1}
+    ideology = {'conservative': -1, 'liberal': 1}
+    rptVotes, confVotes = [_binarize_votes(v, outcome) for v in (rptVotes, confVotes)]
+    rptIdeVotes, confIdeVotes = [_binarize_votes(v, ideology)
+                                 for v in (rptIdeVotes, confIdeVotes)]
+
+    # Extra merit votes: raw values as a cases x rounds x justices array for the (up to 5)
+    # rounds, with a mask of the rounds that hold a merits vote.
+    raw = np.empty((len(df), 5, len(names)), dtype=object)
+    present = np.zeros((len(df), 5), dtype=bool)
     for i in range(3, 8):
-        extra_merits_ix = (df['votetyp%d' % i] == 'MRTS').values
-        log.info("%d merits votes in col %d", extra_merits_ix.sum(), i)
-        this_vote = np.vstack([df[n + '%dr' % i].values for n in names]).T
-        for ix in np.where(extra_merits_ix)[0]:
-            mrtVotes[ix, i - 3] = this_vote[ix]
+        present[:, i - 3] = (df['votetyp%d' % i] == 'MRTS').values
+        log.info("%d merits votes in col %d", present[:, i - 3].sum(), i)
+        raw[:, i - 3] = np.vstack([df[n + '%dr' % i].values for n in names]).T
 
-    mrtVotes = _shift_merit_votes(mrtVotes)
+    raw, mrtPresent = _shift_merit_votes(raw, present)
     if disp:
-        _show_bad_merit_votes(mrtVotes)
-    _fix_merit_votes(mrtVotes)
+        _show_bad_merit_votes(raw, mrtPresent)
+    raw = _fix_merit_votes(raw)
     if disp:
-        _show_bad_merit_votes(mrtVotes)
-    _binarize_merit_votes(mrtVotes)
+        _show_bad_merit_votes(raw, mrtPresent)
+    mrtVotes = _binarize_merit_votes(raw, mrtPresent)
 
     with open(os.path.join(DATADR, 'warren_conf_votes.p'), 'wb') as f:
         pickle.dump({'rptVotes': rptVotes, 'rptIdeVotes': rptIdeVotes,
                      'confVotes': confVotes, 'confIdeVotes': confIdeVotes,
                      'confVoteDate': confVoteDate, 'rptVoteDate': rptVoteDate,
-                     'mrtVotes': mrtVotes}, f, -1)
+                     'mrtVotes': mrtVotes, 'mrtPresent': mrtPresent}, f, -1)
 
 
+@timed()
 def setup_warren_votes_by_court():
-    """Split the flat warren_conf_votes.p into per-natural-court matrices and write
-    warren_conf_votes_bycourt.p (the file ConferenceReportVotes reads).
+    """Split the flat warren_conf_votes.p into per-natural-court matrices and write the
+    warren_conf_votes_bycourt/ store that ConferenceReportVotes reads (an index plus one
+    .npy file per court and matrix kind).
 
     Ported from the prototyping notebook
     "2017-05-09 prototyping import of conference votes.ipynb" (cells 8-13). Two stages:
@@ -418,10 +974,13 @@ def setup_warren_votes_by_court():
     confVotes = flat['confVotes']
     rptIdeVotes = flat['rptIdeVotes']
     rptVotes = flat['rptVotes']
-    mrtVotes = flat['mrtVotes']
+    if 'mrtPresent' in flat:
+        mrtVotes, mrtPresent = flat['mrtVotes'], flat['mrtPresent']
+    else:  # written before merit votes were stored as arrays
+        mrtVotes, mrtPresent = _merit_votes_from_objects(flat['mrtVotes'], len(names))
 
     # Re-derive the natural-court label per row, aligned with the vote tables above.
-    src = pd.read_pickle(os.path.join(DATADR, 'vinwar_stata_EDL.xlsx.p'))
+    src = _read_vinwar()
     merits_ix = ((src['votetyp2'] == 'MRTS') | (src['votetyp2'] == '1RTS')).values
     report_ix = (src['votetyp3'] == 'REPT').values
     natct = src['natct'].loc[merits_ix | report_ix].values
@@ -477,7 +1036,7 @@ def setup_warren_votes_by_court():
         court_names.append(matched)
 
     confIdeByCourt, rptByCourt, confByCourt, rptIdeByCourt = {}, {}, {}, {}
-    mrtByCourt, justicesByCourt, justiceIxByCourt = {}, {}, {}
+    mrtByCourt, mrtPresentByCourt, justicesByCourt, justiceIxByCourt = {}, {}, {}, {}
     for i, u in enumerate(uniq9):
         cols = np.where(u)[0]
         key = str(i)
@@ -498,11 +1057,8 @@ def setup_warren_votes_by_court():
         rptByCourt[key] = rptByCourt[key][full_vote_ix]
         confIdeByCourt[key] = confIdeByCourt[key][full_vote_ix]
         confByCourt[key] = confByCourt[key][full_vote_ix]
-        mrtByCourt[key] = mrtVotes[full_vote_ix]
-        for v in mrtByCourt[key]:
-            for j, vj in enumerate(v):
-                if not isinstance(vj, int):
-                    v[j] = vj[justiceIxByCourt[key]]
+        mrtByCourt[key] = mrtVotes[full_vote_ix][:, :, justiceIxByCourt[key]]
+        mrtPresentByCourt[key] = mrtPresent[full_vote_ix]
 
     # Rename anonymous keys to their matched court name; drop cohorts with no match.
     for i, ct in enumerate(court_names):
@@ -513,79 +1069,140 @@ def setup_warren_votes_by_court():
             rptByCourt[ct] = rptByCourt[key]
             rptIdeByCourt[ct] = rptIdeByCourt[key]
             mrtByCourt[ct] = mrtByCourt[key]
+            mrtPresentByCourt[ct] = mrtPresentByCourt[key]
             justicesByCourt[ct] = justicesByCourt[key]
             justiceIxByCourt[ct] = justiceIxByCourt[key]
         del confByCourt[key], confIdeByCourt[key]
         del rptByCourt[key], rptIdeByCourt[key]
-        del mrtByCourt[key]
+        del mrtByCourt[key], mrtPresentByCourt[key]
         del justicesByCourt[key], justiceIxByCourt[key]
 
-    with open(os.path.join(DATADR, 'warren_conf_votes_bycourt.p'), 'wb') as f:
-        pickle.dump({'confIdeVotesByCourt': confIdeByCourt, 'rptVotesByCourt': rptByCourt,
-                     'confVotesByCourt': confByCourt, 'rptIdeVotesByCourt': rptIdeByCourt,
-                     'mrtVotesByCourt': mrtByCourt, 'justicesByCourt': justicesByCourt,
-                     'justiceIxByCourt': justiceIxByCourt}, f, -1)
+    _write_warren_by_court({'confVotes': confByCourt, 'confIdeVotes': confIdeByCourt,
+                            'rptVotes': rptByCourt, 'rptIdeVotes': rptIdeByCourt,
+                            'mrtVotes': mrtByCourt, 'mrtPresent': mrtPresentByCourt},
+                           justicesByCourt, justiceIxByCourt)
+
+
+def _read_vinwar():
+    """The Warren-era vinwar source table."""
+    path = os.path.join(DATADR, 'vinwar_stata_EDL.xlsx.p')
+    with span('pd.read_pickle', path) as s:
+        return s.output(pd.read_pickle(path))
+
+
+def _write_warren_by_court(by_kind, justices, justice_ix):
+    """Write the per-court store that ConferenceReportVotes reads, replacing any previous
+    one atomically (see _columnar.publish_dir).
+
+    Parameters
+    ----------
+    by_kind : dict
+        Matrix kind (a key of _WARREN_KINDS) -> {court: ndarray}.
+    justices : dict
+        Court -> justice names, in the order of the court's columns.
+    justice_ix : dict
+        Court -> column indices of its justices in the full vote matrix.
+    """
+    path = os.path.join(DATADR, WARREN_BY_COURT_DIR)
+    courts = list(justices)
+    files = {c: 'court%02d' % i for i, c in enumerate(courts)}
+    version = version_dir(path)
+    try:
+        for kind, matrices in by_kind.items():
+            for c in courts:
+                m = np.ascontiguousarray(matrices[c])
+                if m.dtype == object:
+                    raise ValueError("%s for %s is not numeric." % (kind, c))
+                np.save(os.path.join(version, '%s_%s.npy' % (files[c], kind)), m)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+    publish_dir(path, version, WARREN_INDEX_FILE,
+                {'courts': courts, 'files': files,
+                 'justices': {c: [str(j) for j in justices[c]] for c in courts},
+                 'justice_index': {c: [int(j) for j in justice_ix[c]] for c in courts}})
+
+
+def _merit_votes_from_objects(mrtVotes, n_justices):
+    """Convert the object array of extra merit votes written by older versions of
+    setup_warren_votes (cases x rounds, each -1 or a vector of binarized votes) into an int8
+    cases x rounds x justices array and the mask of rounds present.
+    """
+    present = np.array([[not isinstance(v, int) for v in row] for row in mrtVotes],
+                       dtype=bool).reshape(mrtVotes.shape)
+    votes = np.zeros(mrtVotes.shape + (n_justices,), dtype=np.int8)
+    if present.any():
+        votes[present] = np.vstack(mrtVotes[present]).astype(float)
+    return votes, present
 
 
 # =================================== #
 # Helpers for setup_warren_votes().   #
 # =================================== #
-def _binarize_merit_votes(mrtVotes):
-    """In-place: grant/reverse -> 1, deny/affirm -> -1, anything else -> 0."""
-    for v in mrtVotes:
-        for i in v:
-            if isinstance(i, int):  # missing merit vote
-                break
-            for ix, j in enumerate(i):
-                if j == 'grant/reverse':
-                    i[ix] = 1
-                elif j == 'deny/affirm':
-                    i[ix] = -1
-                else:
-                    i[ix] = 0
-
-
-def _fix_merit_votes(mrtVotes):
-    """In-place: convert numeric merit codes back to their canonical strings.
-    Per vinwar_codebook.pdf, grant/reverse=1 and deny/affirm=2.
+def _binarize_votes(votes, codes):
+    """Map vote labels to codes, e.g. {'conservative': -1, 'liberal': 1}; anything else,
+    including missing votes, becomes 0.
     """
-    for v in mrtVotes:
-        for i in v:
-            if isinstance(i, int):  # missing merit vote
-                break
-            for ix, j in enumerate(i):
-                if j == 1 or j == '1.0':
-                    i[ix] = 'grant/reverse'
-                elif j == 2 or j == '2.0':
-                    i[ix] = 'deny/affirm'
-                elif j == 'nan':
-                    i[ix] = np.nan
-
-
-def _show_bad_merit_votes(mrtVotes):
-    """Log the unique non-canonical merit vote values for inspection."""
-    cast = np.vstack([v for v in mrtVotes.ravel() if not isinstance(v, int)]).ravel()
-    cast = np.array([v for v in cast if _is_cast_vote(v)])
-    log.info("Problematic merit votes: %s", np.unique(cast))
-
-
-def _is_cast_vote(v):
-    """Return False only for the missing-vote sentinel -1."""
-    if isinstance(v, str):
-        return True
-    return v != -1
-
-
-def _shift_merit_votes(mrtVotes):
-    """Push all cast votes to the leftmost columns, then drop the now-empty trailing two."""
-    for r in mrtVotes:
-        last_filled_ix = -1
-        for counter in range(5):
-            if (not isinstance(r[counter], int)) and (counter > last_filled_ix):
-                r[last_filled_ix] = r[counter]
-                r[counter] = -1
-                last_filled_ix += 1
-    return mrtVotes[:, :3]
+    values = votes.values
+    return pd.DataFrame(np.select([values == k for k in codes], list(codes.values()), 0),
+                        index=votes.index, columns=votes.columns)
+
+
+def _shift_merit_votes(raw, present):
+    """Push the rounds that were held to the leftmost columns, keeping their order, and drop
+    the trailing two columns.
+
+    Parameters
+    ----------
+    raw : ndarray
+        cases x 5 x justices merit votes.
+    present : ndarray
+        cases x 5 mask of rounds that were held.
+
+    Returns
+    -------
+    raw : ndarray
+        cases x 3 x justices.
+    present : ndarray
+        cases x 3.
+    """
+    target = np.cumsum(present, axis=1) - 1
+    keep = present & (target < 3)
+    case_ix, round_ix = np.where(keep)
+    shifted = np.empty((raw.shape[0], 3, raw.shape[2]), dtype=raw.dtype)
+    shifted[case_ix, target[keep]] = raw[case_ix, round_ix]
+    shifted_present = np.zeros((raw.shape[0], 3), dtype=bool)
+    shifted_present[case_ix, target[keep]] = True
+    return shifted, shifted_present
+
+
+def _fix_merit_votes(raw):
+    """Convert numeric merit codes back to their canonical strings. Per vinwar_codebook.pdf,
+    grant/reverse=1 and deny/affirm=2; the string 'nan' becomes NaN.
+    """
+    fixed = raw.astype(object)
+    fixed[(fixed == 1) | (fixed == '1.0')] = 'grant/reverse'
+    fixed[(fixed == 2) | (fixed == '2.0')] = 'deny/affirm'
+    fixed[fixed == 'nan'] = np.nan
+    return fixed
+
+
+def _binarize_merit_votes(raw, present):
+    """int8 merit votes: grant/reverse -> 1, deny/affirm -> -1, anything else (including
+    rounds that were not held) -> 0.
+    """
+    votes = np.zeros(raw.shape, dtype=np.int8)
+    votes[raw == 'grant/reverse'] = 1
+    votes[raw == 'deny/affirm'] = -1
+    votes[~present] = 0
+    return votes
+
+
+def _show_bad_merit_votes(raw, present):
+    """Log the unique non-canonical merit vote values in rounds that were held."""
+    cast = raw[present].ravel()
+    bad = cast[(cast != 'grant/reverse') & (cast != 'deny/affirm')]
+    log.info("Problematic merit votes: %s", np.unique(bad.astype(str)))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,258 @@
+# ====================================================================================== #
+# Vote matrices in shared memory for process pools. The publishing process copies a court's
+# compact votes (int8 codes and the packed missing mask), its row and column labels and any
+# per-case metadata into multiprocessing.shared_memory blocks once, and passes workers a
+# small picklable handle. Workers attach to the blocks and get numpy views of them, so
+# memory does not grow with the number of workers.
+#   with share_votes(data.maj_vote_table(compact=True), data.case_metadata()) as handle:
+#       pool.map(task, [handle] * n)          # task calls attach_votes(handle)
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import threading
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from ._compact import CompactVotes
+
+# Blocks created by this process, by handle, until release_votes.
+_PUBLISHED = {}
+# Courts attached in this process, by the name of their codes block.
+_ATTACHED = {}
+_LOCK = threading.Lock()
+
+
+class SharedVotes(namedtuple('SharedVotes', ['codes', 'mask', 'index', 'columns',
+                                             'metadata'])):
+    """Picklable handle to votes published with share_votes. Array fields are
+    (block name, dtype, shape) specs; labels and metadata are lists of encoded columns.
+    Use as a context manager in the publishing process to release the blocks on exit.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        release_votes(self)
+        return False
+
+
+SharedCourt = namedtuple('SharedCourt', ['votes', 'metadata'])
+
+
+def _put(array, blocks):
+    """Copy a numeric, boolean, datetime or fixed-width string array into a new block and
+    return its spec.
+    """
+    array = np.ascontiguousarray(array)
+    if array.dtype == object:
+        raise TypeError("Object arrays cannot be shared; encode them first.")
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(shm)
+    view = np.ndarray(array.shape, array.dtype, buffer=shm.buf)
+    view[...] = array
+    del view
+    return (shm.name, array.dtype.str, array.shape)
+
+
+def _put_categories(categories, name, blocks):
+    categories = np.asarray(categories)
+    if categories.dtype == object:
+        if not all(isinstance(c, str) for c in categories):
+            raise TypeError("Column %r holds objects other than strings." % name)
+        categories = categories.astype(str)
+    return _put(categories, blocks)
+
+
+def _put_column(values, blocks):
+    """Encoded column, keyed by kind: ('array', spec), ('masked', data, mask),
+    ('category', codes, categories), ('strings', codes, categories, dtype) for string and
+    object columns (code -1 where missing) or ('datetimetz', utc, tz).
+
+    Parameters
+    ----------
+    values : pd.Series
+    blocks : list
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return ('category', _put(values.cat.codes.values, blocks),
+                _put_categories(values.cat.categories, values.name, blocks))
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        utc = values.dt.tz_convert('UTC').dt.tz_localize(None)
+        return ('datetimetz', _put(utc.values, blocks), str(values.dtype.tz))
+    if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+        codes, categories = pd.factorize(values)
+        return ('strings', _put(codes, blocks),
+                _put_categories(categories, values.name, blocks), str(values.dtype))
+    array = values.array
+    if isinstance(array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray,
+                          pd.arrays.BooleanArray)):
+        return ('masked', _put(array._data, blocks), _put(array._mask, blocks))
+    return ('array', _put(np.asarray(values), blocks))
+
+
+def _put_index(index, blocks):
+    if index is None:
+        return None
+    levels = [index.get_level_values(i) for i in range(index.nlevels)]
+    return ([_put_column(pd.Series(level), blocks) for level in levels], list(index.names))
+
+
+def share_votes(votes, metadata=None):
+    """Publish votes and per-case metadata in shared memory.
+
+    Parameters
+    ----------
+    votes : CompactVotes, pd.DataFrame or ndarray
+        Case x justice votes. DataFrames and arrays are compacted first (see
+        CompactVotes.from_array).
+    metadata : pd.DataFrame, None
+        Per-case columns, e.g. ScotusData.case_metadata(). Numeric, datetime, nullable
+        integer and categorical columns are shared as is. String columns are stored as
+        codes into fixed-width unicode categories, with missing values kept missing, and
+        tz-aware datetimes as UTC plus their zone. Columns of other Python objects raise
+        TypeError.
+
+    Returns
+    -------
+    SharedVotes
+        Handle to pass to workers. The blocks live until release_votes(handle), or the end
+        of a `with` block on the handle.
+    """
+    if isinstance(votes, pd.DataFrame):
+        votes = CompactVotes.from_frame(votes)
+    elif not isinstance(votes, CompactVotes):
+        votes = CompactVotes.from_array(votes)
+
+    blocks = []
+    try:
+        handle = SharedVotes(
+            _put(votes.codes, blocks),
+            None if votes._mask is None else _put(votes._mask, blocks),
+            _put_index(votes.index, blocks),
+            _put_index(votes.columns, blocks),
+            None if metadata is None else
+            ([(c, _put_column(metadata[c], blocks)) for c in metadata.columns],
+             _put_index(metadata.index, blocks)))
+    except BaseException:
+        _unlink(blocks)
+        raise
+    with _LOCK:
+        _PUBLISHED[handle.codes[0]] = blocks
+    return handle
+
+
+def _unlink(blocks):
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+
+def release_votes(handle):
+    """Free the blocks of a handle published by this process. Workers that are still
+    attached keep their mappings until they detach.
+    """
+    with _LOCK:
+        blocks = _PUBLISHED.pop(handle.codes[0], [])
+    _unlink(blocks)
+
+
+def _open(name):
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:  # Python < 3.13 always registers with the resource tracker
+        return shared_memory.SharedMemory(name)
+
+
+def _get(spec, blocks):
+    """Read-only view of a block."""
+    name, dtype, shape = spec
+    shm = _open(name)
+    blocks.append(shm)
+    view = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    view.flags.writeable = False
+    return view
+
+
+def _get_column(encoded, blocks):
+    kind = encoded[0]
+    if kind == 'category':
+        return pd.Categorical.from_codes(_get(encoded[1], blocks),
+                                         categories=_get(encoded[2], blocks), validate=False)
+    if kind == 'strings':
+        values = pd.Categorical.from_codes(_get(encoded[1], blocks),
+                                           categories=_get(encoded[2], blocks).astype(object),
+                                           validate=False)
+        return pd.array(values.astype(object), dtype=pd.api.types.pandas_dtype(encoded[3]))
+    if kind == 'datetimetz':
+        return pd.DatetimeIndex(_get(encoded[1], blocks)).tz_localize('UTC').tz_convert(
+            encoded[2]).array
+    if kind == 'masked':
+        data, mask = _get(encoded[1], blocks), _get(encoded[2], blocks)
+        if data.dtype == bool:
+            return pd.arrays.BooleanArray(data, mask)
+        if data.dtype.kind == 'f':
+            return pd.arrays.FloatingArray(data, mask)
+        return pd.arrays.IntegerArray(data, mask)
+    return _get(encoded[1], blocks)
+
+
+def _get_index(encoded, blocks):
+    if encoded is None:
+        return None
+    levels, names = encoded
+    levels = [_get_column(level, blocks) for level in levels]
+    if len(levels) == 1:
+        return pd.Index(levels[0], name=names[0])
+    return pd.MultiIndex.from_arrays(levels, names=names)
+
+
+def attach_votes(handle):
+    """Votes and metadata published with share_votes, as views of the shared blocks. Each
+    process attaches once per handle; later calls return the same objects.
+
+    Parameters
+    ----------
+    handle : SharedVotes
+
+    Returns
+    -------
+    SharedCourt
+        'votes': CompactVotes whose codes and mask are read-only views of shared memory;
+        'metadata': DataFrame of the per-case columns (None if none were published), with
+        numeric columns backed by shared memory.
+    """
+    key = handle.codes[0]
+    with _LOCK:
+        if key in _ATTACHED:
+            return _ATTACHED[key][0]
+        blocks = []
+        votes = CompactVotes.from_parts(
+            _get(handle.codes, blocks),
+            None if handle.mask is None else _get(handle.mask, blocks),
+            index=_get_index(handle.index, blocks), columns=_get_index(handle.columns, blocks))
+        metadata = None
+        if handle.metadata is not None:
+            columns, index = handle.metadata
+            metadata = pd.DataFrame({c: _get_column(encoded, blocks) for c, encoded in columns},
+                                    index=_get_index(index, blocks), copy=False)
+        court = SharedCourt(votes, metadata)
+        _ATTACHED[key] = (court, blocks)
+    return court
+
+
+def detach_votes(handle):
+    """Drop this process's attachment to a handle. Views obtained from it must no longer
+    be used.
+    """
+    with _LOCK:
+        court, blocks = _ATTACHED.pop(handle.codes[0], (None, []))
+    del court
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:  # views still referenced elsewhere; unmapped when freed
+            pass
@@ -1,7 +1,7 @@
 # ====================================================================================== #
 # U.S. state supreme court voting data (State Supreme Court Data Project).
-# Provides access to the per-state pickled records plus the setup routine that splits the
-# master file into per-state pickles.
+# Provides access to the per-state records plus the setup routine that consolidates the
+# master file into one memory-mapped columnar store indexed by state.
 # Author: Eddie Lee, edlee@alumni.princeton.edu
 # ====================================================================================== #
 import os
@@ -11,7 +11,12 @@ import numpy as np
 import pandas as pd
 
 from ._config import DATADR
+from ._paths import META_FILE, STATE_STORE, LEGACY_PICKLE_DIR, list_possible_states
+from ._columnar import ColumnStore, fingerprint, write_table
+from ._compact import CompactVotes, SparseVotes
 from ._courts_common import extract_natural_courts
+from ._cache import cached
+from .profiling import span, timed
 
 log = logging.getLogger(__name__)
 
@@ -36,10 +41,62 @@ _NAME_FIXES = {
 }
 
 
-def list_possible_states():
-    """Sorted list of state codes for which a pickle is available."""
-    files = os.listdir(os.path.join(DATADR, 'us_state_court_pickles'))
-    return sorted(f[:-2] for f in files)
+def _open_store():
+    """The consolidated state store, or None if only per-state pickles exist."""
+    path = os.path.join(DATADR, STATE_STORE)
+    if ColumnStore.is_table(path):
+        return cached(path, lambda: ColumnStore(path), 'ColumnStore',
+                      version_path=os.path.join(path, META_FILE))
+    return None
+
+
+def _stack_slots(columns):
+    """Interleave per-slot label columns into one (case, slot)-raveled array. Categorical
+    columns sharing a dictionary (as in the consolidated store) are stacked by code.
+    """
+    categories = [c.cat.categories if isinstance(c.dtype, pd.CategoricalDtype) else None
+                  for c in columns]
+    if categories[0] is not None and all(c is not None and c.equals(categories[0])
+                                         for c in categories):
+        codes = np.column_stack([c.cat.codes.values for c in columns]).ravel()
+        return pd.Categorical.from_codes(codes, categories=categories[0])
+    return np.column_stack([c.values for c in columns]).ravel()
+
+
+def _cell_votes(flat, votes):
+    """One vote code per (case, justice) cell.
+
+    Parameters
+    ----------
+    flat : ndarray
+        Raveled (case, justice) index of each vote.
+    votes : ndarray
+        Vote codes.
+
+    Returns
+    -------
+    cells : ndarray
+        Distinct raveled cell indices.
+    codes : ndarray
+        int8 vote code per cell. Repeated entries for the same cell are averaged as
+        pd.pivot_table would; if the average is not a vote code the cell is NO_DATA.
+    """
+    repeated = pd.Series(flat).duplicated(keep=False).values
+    cells, codes = flat[~repeated], votes[~repeated]
+    if repeated.any():
+        mean = pd.Series(votes[repeated]).groupby(flat[repeated]).mean()
+        integral = (mean == np.round(mean)).values
+        cells = np.concatenate([cells, mean.index.values])
+        codes = np.concatenate([codes, np.where(integral, mean.values, NO_DATA)])
+    return cells, codes.astype(np.int8)
+
+
+def _scatter_votes(flat, votes, shape):
+    """Scatter vote codes into a dense int8 matrix filled with NO_DATA. See _cell_votes."""
+    table = np.full(shape[0] * shape[1], NO_DATA, dtype=np.int8)
+    cells, codes = _cell_votes(flat, votes)
+    table[cells] = codes
+    return table.reshape(shape)
 
 
 class State():
@@ -51,11 +108,35 @@ class State():
             Two-letter state code.
         """
         self.state = state
-        self.fname = os.path.join(DATADR, 'us_state_court_pickles', '%s.p' % state)
-        if not os.path.isfile(self.fname):
-            raise ValueError("Invalid state: %r" % state)
+        self.store = _open_store()
+        if self.store is not None:
+            self.fname = None
+            if state not in self.store.meta['offsets']:
+                raise ValueError("Invalid state: %r" % state)
+        else:
+            self.fname = os.path.join(DATADR, LEGACY_PICKLE_DIR, '%s.p' % state)
+            if not os.path.isfile(self.fname):
+                raise ValueError("Invalid state: %r" % state)
 
-    def vote_table(self, clean=True, return_code=False, return_year=False):
+    def _read_columns(self, columns):
+        """This state's rows of the given source columns. From the consolidated store, the
+        columns are sliced out of shared memory-mapped files. Decoded columns are kept in
+        the process-wide cache while the store (or pickle) is unchanged.
+        """
+        def load():
+            with span('states.read_columns', self.fname, state=self.state) as s:
+                if self.store is not None:
+                    start, stop = self.store.meta['offsets'][self.state]
+                    return s.output(self.store.to_frame(columns, start, stop))
+                return s.output(pd.read_pickle(self.fname).loc[:, columns])
+        options = ('state_columns', self.state, tuple(columns))
+        if self.store is not None:
+            return cached(self.store.path, load, options, version=self.store.version)
+        return cached(self.fname, load, options)
+
+    @timed()
+    def vote_table(self, clean=True, return_code=False, return_year=False, compact=False,
+                   sparse=False):
         """Convert the default format into a table where rows are individual cases and each
         justice has a column. Many entries will be empty.
 
@@ -67,45 +148,92 @@ class State():
             If True, label columns by justice code instead of justice name.
         return_year : bool, False
             If True, also return a table of years per citation (access with X['year'].values).
+        compact : bool, False
+            If True, return the votes as CompactVotes in which no-data cells are missing
+            instead of an int64 DataFrame.
+        sparse : bool, False
+            If True, return SparseVotes, a CSR matrix storing code + 1 for each vote with
+            citation and justice labels. The dense table is never built.
 
         Returns
         -------
-        pd.DataFrame
+        pd.DataFrame, CompactVotes or SparseVotes
             Vote codes: -1 no data, 0 minority, 1 majority, 2 recused, 3 not participating.
+            Slots without a justice label are dropped.
         pd.DataFrame, optional
-            Years, if return_year is True.
+            Years, if clean and return_year are True.
         """
-        df = pd.read_pickle(self.fname)
+        label_col = 'J%d_Code' if return_code else 'J%d_Name'
+        slots = range(1, N_JUSTICE_SLOTS + 1)
+        df = self._read_columns(['LexisNexisCitationNumber', 'Year'] +
+                                ['J%d_Vote' % i for i in slots] +
+                                [label_col % i for i in slots])
 
-        label_col, label_key = ('J%d_Code', 'code') if return_code else ('J%d_Name', 'name')
-        subtables = []
-        for i in range(1, N_JUSTICE_SLOTS + 1):
-            cols = ('LexisNexisCitationNumber', 'Year', 'J%d_Vote' % i, label_col % i)
-            sub = df.loc[:, cols].rename(columns={cols[0]: 'citation', cols[1]: 'year',
-                                                  cols[2]: 'vote', cols[3]: label_key})
-            subtables.append(sub)
-        fullTable = pd.concat(subtables, axis=0)
+        citation_codes, citations = pd.factorize(df['LexisNexisCitationNumber'], sort=True)
+        # Justice labels and votes as (case, slot) arrays, raveled case by case.
+        label_codes, labels = pd.factorize(_stack_slots([df[label_col % i] for i in slots]),
+                                           sort=True)
+        votes = np.column_stack([df['J%d_Vote' % i].values for i in slots]).astype(float)
+        labels = np.asarray(labels)
 
         if not return_code:
-            # Address some data-coding bugs in the justice names.
-            for wrong, right in _NAME_FIXES.get(self.state, {}).items():
-                fullTable.loc[(fullTable['name'] == wrong).values, 'name'] = right
-
-        voteTable = pd.pivot_table(fullTable, columns=label_key, index='citation',
-                                   fill_value=NO_DATA, dropna=False)['vote']
-        if not return_code:
+            # Address some data-coding bugs in the justice names, then merge the corrected
+            # names with any existing ones.
+            fixes = _NAME_FIXES.get(self.state, {})
+            if fixes:
+                remap, labels = pd.factorize(np.array([fixes.get(n, n) for n in labels],
+                                                      dtype=object), sort=True)
+                labels = np.asarray(labels)
+                label_codes = np.where(label_codes > -1, remap[label_codes], -1)
             # Throw out any blank justice names.
-            voteTable = voteTable.loc[:, voteTable.columns != '']
+            blank = np.where(labels == '')[0]
+            if blank.size:
+                label_codes = np.where(label_codes == blank[0], -1,
+                                       label_codes - (label_codes > blank[0]))
+                labels = np.delete(labels, blank[0])
+
+        rows = np.repeat(citation_codes, N_JUSTICE_SLOTS)
+        votes = votes.ravel()
+        valid = (rows > -1) & (label_codes > -1) & ~np.isnan(votes)
+        shape = (len(citations), len(labels))
+        flat = rows[valid] * shape[1] + label_codes[valid]
+        index = pd.Index(np.asarray(citations), name='citation')
+        columns = pd.Index(labels, name='code' if return_code else 'name')
 
-        if not clean:
+        if sparse:
+            from scipy.sparse import csr_matrix
+
+            cells, codes = _cell_votes(flat, votes[valid])
+            keep = (codes == MINORITY) | (codes == MAJORITY) if clean else codes != NO_DATA
+            matrix = csr_matrix((codes[keep] + 1, np.divmod(cells[keep], shape[1])),
+                                shape=shape, dtype=np.int8)
+            voteTable = SparseVotes(matrix, index, columns)
+        else:
+            voteTable = _scatter_votes(flat, votes[valid], shape)
+            if clean:
+                voteTable[(voteTable != MINORITY) & (voteTable != MAJORITY)] = NO_DATA
+            if compact:
+                voteTable = CompactVotes(voteTable, voteTable == NO_DATA, index=index,
+                                         columns=columns)
+            else:
+                voteTable = pd.DataFrame(voteTable.astype(np.int64), index=index,
+                                         columns=columns)
+        if not (clean and return_year):
             return voteTable
 
-        voteTable[((voteTable != MINORITY) & (voteTable != MAJORITY)).values] = NO_DATA
-        if return_year:
-            year = pd.pivot_table(fullTable, index='citation')
-            assert len(year) == len(voteTable)
-            return voteTable, year
-        return voteTable
+        # Mean year per citation, from the same factorization as the vote table.
+        keep = citation_codes > -1
+        year = (np.bincount(citation_codes[keep], weights=df['Year'].values[keep].astype(float),
+                            minlength=shape[0]) /
+                np.bincount(citation_codes[keep], minlength=shape[0]))
+        return voteTable, pd.DataFrame({'year': year}, index=voteTable.index)
+
+    async def avote_table(self, executor=None, **kwargs):
+        """vote_table run in an executor, for use from an event loop. With a process pool,
+        use aio.load_state, which sends only the state code to the worker.
+        """
+        from .aio import run_blocking
+        return await run_blocking(self.vote_table, executor=executor, **kwargs)
 
     @classmethod
     def extract_nat_courts(cls, X, only_full_votes=True, threshold_votes='default'):
@@ -123,22 +251,47 @@ class State():
         return cols
 
 
+@timed()
 def setup_us_states():
-    """Load the master file and split it by state into us_state_court_pickles/.
+    """Load the master file and write every state's records into the consolidated
+    us_state_courts/ store, with rows grouped by state and a state -> row range index.
 
     State Supreme Court Data Project: http://www.ruf.rice.edu/~pbrace/statecourt/
     """
-    cached = os.path.join(DATADR, 'state_supreme_court_v2.p')
-    if os.path.isfile(cached):
-        df = pd.read_pickle(cached)
+    pickled = os.path.join(DATADR, 'state_supreme_court_v2.p')
+    source = os.path.join(DATADR, 'state_supreme_court_v2.dta')
+    if os.path.isfile(pickled):
+        with span('pd.read_pickle', pickled) as s:
+            df = s.output(pd.read_pickle(pickled))
+        source = pickled
     else:
         log.info("Unable to find pickled stat file. Loading from stata...")
-        df = pd.read_stata(os.path.join(DATADR, 'state_supreme_court_v2.dta'))
+        with span('pd.read_stata', source) as s:
+            df = s.output(pd.read_stata(source))
         log.info("Caching to pickle...")
-        df.to_pickle(cached)
+        df.to_pickle(pickled)
     assert np.unique(df['state']).size == 52, "Expected 50 states + DC + national."
 
-    for state in np.unique(df['state']):
-        fname = os.path.join(DATADR, 'us_state_court_pickles', '%s.p' % state)
-        log.info("Saving %s.", fname)
-        df[(df['state'] == state).values].to_pickle(fname)
+    state = df['state'].astype(str).values
+    order = np.argsort(state, kind='stable')
+    states, starts = np.unique(state[order], return_index=True)
+    stops = np.append(starts[1:], len(df))
+    offsets = {s: [int(a), int(b)] for s, a, b in zip(states, starts, stops)}
+
+    slots = range(1, N_JUSTICE_SLOTS + 1)
+    name_cols = ['J%d_Name' % i for i in slots]
+    columns = (['LexisNexisCitationNumber', 'Year'] + ['J%d_Vote' % i for i in slots] +
+               ['J%d_Code' % i for i in slots] + name_cols)
+    table = df.iloc[order].loc[:, columns].reset_index(drop=True)
+    # Share one name dictionary across the slots. Names are coded as strings, but missing
+    # names stay missing rather than becoming 'nan'.
+    for c in name_cols:
+        table[c] = table[c].map(str, na_action='ignore')
+    names = sorted(pd.unique(np.concatenate([table[c].dropna().values for c in name_cols])))
+    for c in name_cols:
+        table[c] = pd.Categorical(table[c], categories=names)
+
+    path = os.path.join(DATADR, STATE_STORE)
+    log.info("Saving %s.", path)
+    with span('columnar.write_table', table):
+        write_table(path, table, meta={'offsets': offsets, 'source': fingerprint(source)})
@@ -0,0 +1,243 @@
+# ====================================================================================== #
+# Synthetic data directory for tests and benchmarks. Writes schema-faithful stand-ins for
+# every raw source the setup routines read (SCDB CSV, justices.csv, HCJD Stata files, the
+# state master file, the Warren vinwar pickle and the conference/report .mat files) at a
+# configurable scale, so the whole package can be exercised without the private data.
+# Votes are random; only the layout, codes and natural-court structure are realistic.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# Rows of each source at scale 1, roughly the size of the real data sets.
+BASE_SIZES = {'scdb': 9000, 'hcjd': 5000, 'state': 2000, 'warren': 3000, 'mat': 300}
+
+# Consecutive SCDB natural courts: (naturalCourt, first day, members). Codes and start dates
+# follow the naturalCourt variable of the SCDB codebook (modern database, Release 2024_01),
+# from the Thomas court (Rehnquist 4) to the Alito court (Roberts 2).
+SCDB_ERAS = [
+    (1704, '1991-10-23', ['HABlackmun', 'BRWhite', 'JPStevens', 'SDOConnor', 'WHRehnquist',
+                          'AScalia', 'AMKennedy', 'DHSouter', 'CThomas']),
+    (1705, '1993-08-10', ['HABlackmun', 'JPStevens', 'SDOConnor', 'WHRehnquist', 'AScalia',
+                          'AMKennedy', 'DHSouter', 'CThomas', 'RBGinsburg']),
+    (1706, '1994-08-03', ['JPStevens', 'SGBreyer', 'RBGinsburg', 'DHSouter', 'AMKennedy',
+                          'SDOConnor', 'WHRehnquist', 'AScalia', 'CThomas']),
+    (1801, '2005-09-29', ['JGRoberts', 'JPStevens', 'SDOConnor', 'AScalia', 'AMKennedy',
+                          'DHSouter', 'CThomas', 'RBGinsburg', 'SGBreyer']),
+    (1802, '2006-01-31', ['JGRoberts', 'JPStevens', 'AScalia', 'AMKennedy', 'DHSouter',
+                          'CThomas', 'RBGinsburg', 'SGBreyer', 'SAAlito']),
+]
+
+SCDB_LAST_DATE = '2009-08-08'
+
+# 50 states, DC and the national aggregate, as in the State Supreme Court Data Project.
+STATE_CODES = ['AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL',
+               'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT',
+               'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI',
+               'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY', 'DC', 'US']
+_SURNAMES = ['Adams', 'Baker', 'Clark', 'Davis', 'Evans', 'Ford', 'Green', 'Hill', 'Irwin',
+             'King', 'Lee']
+
+
+def _panel(rng, n_cases, n_justices, court_size, p_absent=0.):
+    """Presence of each justice in each case for a court whose membership slides through
+    the justices over time, one seat at a time, with occasional absences.
+
+    Returns
+    -------
+    present : ndarray
+        (n_cases, n_justices) bool.
+    court : ndarray
+        Index of the natural court (window offset) of each case.
+    """
+    court = (np.arange(n_cases) * (n_justices - court_size + 1)) // n_cases
+    j = np.arange(n_justices)
+    present = (j >= court[:, None]) & (j < court[:, None] + court_size)
+    if p_absent:
+        present &= rng.random(present.shape) >= p_absent
+    return present, court
+
+
+def write_scdb(path, n_cases, rng, year=2024):
+    """SCDB_<year>_01_justiceCentered_Citation.csv with every column of SCDB_SCHEMA."""
+    from .scotus import SCDB_SCHEMA, SCDB_DATE_FORMAT
+
+    starts = pd.to_datetime([e[1] for e in SCDB_ERAS])
+    span = (pd.Timestamp(SCDB_LAST_DATE) - starts[0]).days
+    dates = starts[0] + pd.to_timedelta(np.sort(rng.integers(0, span, n_cases)), unit='D')
+    era = np.searchsorted(starts.values, dates.values, side='right') - 1
+    members = np.array([e[2] for e in SCDB_ERAS])
+    names = sorted(set(members.ravel()))
+
+    case = np.repeat(np.arange(n_cases), 9)
+    justice_name = members[era].ravel()
+    term = np.where(dates.month >= 10, dates.year, dates.year - 1)
+    case_id = np.array(['%d-%04d' % (t, i) for i, t in enumerate(term)], dtype=object)
+
+    columns = {}
+    for col, kind in SCDB_SCHEMA.items():
+        if kind == 'category':
+            columns[col] = np.array(['%s-%d' % (col, v) for v in rng.integers(0, 50, n_cases)],
+                                    dtype=object)[case]
+        elif kind == 'datetime':
+            columns[col] = (dates - pd.to_timedelta(rng.integers(0, 120, n_cases), unit='D')
+                            ).strftime(SCDB_DATE_FORMAT).values[case]
+        else:
+            high = {'int8': 10, 'int16': 300, 'int32': 150000}[kind]
+            values = rng.integers(1, high, n_cases)[case].astype(float)
+            values[rng.random(values.size) < .02] = np.nan
+            columns[col] = values
+    columns.update({
+        'caseId': case_id[case], 'dateDecision': dates.strftime(SCDB_DATE_FORMAT).values[case],
+        'term': term[case], 'naturalCourt': np.array([e[0] for e in SCDB_ERAS])[era][case],
+        'chief': np.where(np.array([e[0] for e in SCDB_ERAS])[era][case] < 1800, 'Rehnquist',
+                          'Roberts'),
+        'justiceName': justice_name,
+        'justice': np.searchsorted(names, justice_name) + 80,
+    })
+    # Justice-level votes; recused justices have rows without votes.
+    voted = rng.random(case.size) >= .03
+    majority = np.where(rng.random(case.size) < .25, 1., 2.)
+    columns['majority'] = np.where(voted, majority, np.nan)
+    columns['direction'] = np.where(voted, rng.integers(1, 3, case.size), np.nan)
+    columns['vote'] = np.where(voted, rng.integers(1, 9, case.size), np.nan)
+
+    df = pd.DataFrame({col: columns[col] for col in SCDB_SCHEMA})
+    df.to_csv(os.path.join(path, f'SCDB_{year}_01_justiceCentered_Citation.csv'),
+              index=False, encoding='latin1')
+
+    # Martin-Quinn scores for every justice and term.
+    terms = np.arange(term.min() - 5, term.max() + 1)
+    mq = pd.DataFrame({'justiceName': np.repeat(names, terms.size),
+                       'term': np.tile(terms, len(names)),
+                       'post_mn': rng.normal(size=len(names) * terms.size)})
+    mq.to_csv(os.path.join(path, 'justices.csv'), index=False)
+
+
+def write_hcjd(path, n_cases, rng):
+    """original_data_files/HCJD_{Canada,Australia,India}.dta."""
+    outdir = os.path.join(path, 'original_data_files')
+    os.makedirs(outdir, exist_ok=True)
+    # Justice labels avoid the characters the setup routines parse column names by.
+    names = ['J%s%s' % (chr(65 + i // 26), chr(65 + i % 26)) for i in range(30)]
+
+    for country, court_size, dual in (('Canada', 9, True), ('Australia', 7, False),
+                                      ('India', 9, True)):
+        df = {'caseid': np.arange(n_cases), 'year': 1970 + np.arange(n_cases) * 40 // n_cases}
+        for issue in ((1, 2) if dual else (1,)):
+            present, _ = _panel(rng, n_cases, len(names), court_size, p_absent=.05)
+            votes = np.where(present, rng.integers(0, 2, present.shape), np.nan)
+            for j, name in enumerate(names):
+                col = '%s_v%d' % (name, issue) if dual else 'v_%s' % name
+                df[col] = votes[:, j]
+        pd.DataFrame(df).to_stata(os.path.join(outdir, 'HCJD_%s.dta' % country),
+                                  write_index=False)
+
+
+def write_states(path, n_cases, rng):
+    """state_supreme_court_v2.p, the master file of all 52 state courts, in shuffled row
+    order. Maryland carries one of the known name misspellings.
+    """
+    from .states import N_JUSTICE_SLOTS
+
+    frames = []
+    for state in STATE_CODES:
+        names = np.array(_SURNAMES[:11] + ['J. Murrphy' if state == 'MD' else 'Young'],
+                         dtype=object)
+        present, _ = _panel(rng, n_cases, len(names), 7, p_absent=.05)
+        # Each case lists its sitting justices in the first slots.
+        order = np.argsort(~present, axis=1, kind='stable')[:, :N_JUSTICE_SLOTS]
+        filled = np.take_along_axis(present, order, axis=1)
+        citation = np.array(['%s%06d' % (state, i) for i in range(n_cases)], dtype=object)
+        # A few citations cover several rows, as in the source data.
+        dup = rng.random(n_cases) < .02
+        citation[dup] = citation[rng.integers(0, n_cases, dup.sum())]
+        df = {'state': state, 'LexisNexisCitationNumber': citation,
+              'Year': 1995 + np.arange(n_cases) * 15 // n_cases}
+        for i in range(N_JUSTICE_SLOTS):
+            df['J%d_Name' % (i + 1)] = np.where(filled[:, i], names[order[:, i]], '')
+            df['J%d_Code' % (i + 1)] = np.where(filled[:, i], order[:, i] + 100., np.nan)
+            vote = rng.choice([0., 1., 1., 1., 2., 3.], size=n_cases)
+            vote[rng.random(n_cases) < .02] = np.nan
+            df['J%d_Vote' % (i + 1)] = np.where(filled[:, i], vote, np.nan)
+        frames.append(pd.DataFrame(df))
+    master = pd.concat(frames, ignore_index=True)
+    master = master.iloc[rng.permutation(len(master))].reset_index(drop=True)
+    master.to_pickle(os.path.join(path, 'state_supreme_court_v2.p'))
+
+
+def write_warren(path, n_cases, rng):
+    """vinwar_stata_EDL.xlsx.p, the Warren-era source read by setup_warren_votes."""
+    from .scotus import WARREN_JUSTICE_NAMES
+
+    names = WARREN_JUSTICE_NAMES
+    present, court = _panel(rng, n_cases, len(names), 9, p_absent=.03)
+    df = {'natct': np.array(['natct%02d' % c for c in court], dtype=object),
+          'votetyp2': rng.choice(np.array(['MRTS', '1RTS', 'CERT'], dtype=object), n_cases,
+                                 p=[.6, .3, .1]),
+          'votetyp3': rng.choice(np.array(['REPT', ''], dtype=object), n_cases, p=[.8, .2]),
+          'votedat2': rng.choice(np.array(['1960-01-01', '1582-10-14'], dtype=object),
+                                 n_cases, p=[.95, .05]),
+          'votedat3': np.full(n_cases, '1960-02-01', dtype=object)}
+    for i in range(4, 8):
+        df['votetyp%d' % i] = rng.choice(np.array(['MRTS', ''], dtype=object), n_cases,
+                                         p=[.3, .7])
+
+    labels = {'r': ['deny/affirm', 'grant/reverse'], 'dir': ['conservative', 'liberal']}
+    # Merit rounds mix canonical labels with the numeric codes the setup routine repairs.
+    merit_labels = ['grant/reverse', 'deny/affirm', 1., 2., '1.0', '2.0', 'nan']
+    for j, name in enumerate(names):
+        for suffix, options in (('2r', labels['r']), ('2dir', labels['dir']),
+                                ('3r', labels['r']), ('3dir', labels['dir'])):
+            votes = rng.choice(np.array(options, dtype=object), n_cases)
+            df[name + suffix] = np.where(present[:, j], votes, np.nan)
+        for i in range(4, 8):
+            votes = rng.choice(np.array(merit_labels, dtype=object), n_cases)
+            df[name + '%dr' % i] = np.where(present[:, j], votes, np.nan)
+    pd.DataFrame(df).astype(object).to_pickle(os.path.join(path, 'vinwar_stata_EDL.xlsx.p'))
+
+
+def write_conference_report_mats(path, n_cases, rng):
+    """<court>_confra_idevotes.mat for every court in COURT_NAMES."""
+    import scipy.io as sio
+    from .scotus import COURT_NAMES
+
+    for name in COURT_NAMES:
+        sio.savemat(os.path.join(path, '%s_confra_idevotes.mat' % name),
+                    {'confvotes_all': rng.choice([-1, 0, 1], size=(n_cases, 9), p=[.05, .45, .5]),
+                     'finvotes_all': rng.choice([-1, 0, 1], size=(n_cases, 9), p=[.05, .45, .5])})
+
+
+def generate(path, scale=1, seed=0, year=2024):
+    """Write a synthetic data directory that every setup routine and accessor can run on.
+
+    Parameters
+    ----------
+    path : str
+        Directory to write into (created if needed). Point SCOTUS_DATA_DIR at it.
+    scale : float, 1
+        Multiplier on BASE_SIZES, e.g. 1, 10 or 100.
+    seed : int, 0
+    year : int, 2024
+        SCDB release year in the CSV name.
+
+    Returns
+    -------
+    dict
+        Rows (cases) written per source.
+    """
+    os.makedirs(path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    sizes = {k: max(int(v * scale), 50) for k, v in BASE_SIZES.items()}
+    log.info("Writing synthetic data to %s at scale %s.", path, scale)
+    write_scdb(path, sizes['scdb'], rng, year=year)
+    write_hcjd(path, sizes['hcjd'], rng)
+    write_states(path, sizes['state'], rng)
+    write_warren(path, sizes['warren'], rng)
+    write_conference_report_mats(path, sizes['mat'], rng)
+    return sizes
@@ -0,0 +1,69 @@
+# ====================================================================================== #
+# Asyncio loaders: bounded concurrency, and state and high-court loading from a temporary
+# data directory.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from . import aio, high_courts, states, synthetic, _paths
+from .high_courts import HighCourt
+
+
+def test_gather_bounded():
+    lock = threading.Lock()
+    running = [0, 0]  # current, maximum
+
+    def load(key, scale=1):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(.02)
+        with lock:
+            running[0] -= 1
+        return key * scale
+
+    with ThreadPoolExecutor(8) as executor:
+        out = asyncio.run(aio._gather_bounded(list(range(10)), load, 3, executor, scale=2))
+    assert out == {i: 2 * i for i in range(10)}
+    assert 1 < running[1] <= 3
+    with pytest.raises(ValueError):
+        asyncio.run(aio._gather_bounded([1], load, 0, None))
+
+
+def test_get_courts(tmp_path, monkeypatch):
+    monkeypatch.setattr(high_courts, 'DATADR', str(tmp_path))
+    votes = {}
+    for name in high_courts.COUNTRIES:
+        votes[name] = np.random.default_rng(0).integers(0, 2, (5, 3))
+        HighCourt.save_court(name, [{'justices': ['a', 'b', 'c'], 'votes': votes[name]}])
+
+    courts = asyncio.run(aio.get_courts(['india', 'australia'], concurrency=2))
+    assert list(courts) == ['india', 'australia']
+    assert all((courts[k][0]['votes'] == votes[k]).all() for k in courts)
+    assert list(asyncio.run(aio.get_courts())) == ['canada', 'australia', 'india']
+
+    court = asyncio.run(HighCourt.aget_court('canada', compact=True))
+    assert list(court[0]['votes'].columns) == ['a', 'b', 'c']
+
+
+def test_load_states(tmp_path, monkeypatch):
+    for module in (_paths, states):
+        monkeypatch.setattr(module, 'DATADR', str(tmp_path))
+    synthetic.write_states(str(tmp_path), 20, np.random.default_rng(0))
+    states.setup_us_states()
+
+    tables = asyncio.run(aio.load_states(['NY', 'CA'], concurrency=2, return_code=True))
+    assert list(tables) == ['NY', 'CA']
+    for state, table in tables.items():
+        assert table.equals(states.State(state).vote_table(return_code=True))
+    assert list(asyncio.run(aio.load_states())) == _paths.list_possible_states()
+
+    with ThreadPoolExecutor(2) as executor:
+        table = asyncio.run(states.State('MD').avote_table(executor=executor, clean=False))
+    assert table.equals(states.State('MD').vote_table(clean=False))
@@ -0,0 +1,52 @@
+# ====================================================================================== #
+# Tests for the batched bootstrap on a synthetic complete vote matrix.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import numpy as np
+import pytest
+
+from .bootstrap import bootstrap, confidence_interval, resample_indices
+
+
+def _correlation(batch):
+    return np.einsum('bki,bkj->bij', batch, batch) / batch.shape[1]
+
+
+def test_bootstrap():
+    X = np.random.default_rng(0).choice([-1, 1], size=(120, 5))
+    result = bootstrap(X, 'correlation', n_boot=300, seed=3, chunk_size=64)
+    assert result['replicates'].shape == (300, 5, 5)
+    np.testing.assert_allclose(result['estimate'], X.T @ X / len(X))
+    lo, hi = result['ci']
+    assert (lo <= result['estimate'] + 1e-12).all() and (result['estimate'] <= hi + 1e-12).all()
+
+    # Seeds are spawned per batch, so the worker count does not change the replicates, and
+    # the weighted statistics match evaluating a statistic on the resampled matrices.
+    parallel = bootstrap(X, 'correlation', n_boot=300, seed=3, chunk_size=64, jobs=2)
+    np.testing.assert_array_equal(parallel['replicates'], result['replicates'])
+    direct = bootstrap(X, _correlation, n_boot=300, seed=3, chunk_size=64)
+    np.testing.assert_allclose(direct['replicates'], result['replicates'])
+
+    k_votes = bootstrap(X, 'k_votes', n_boot=50, seed=3)
+    np.testing.assert_allclose(k_votes['replicates'].sum(1), 1)
+
+
+def test_resample_indices():
+    rng = np.random.default_rng(0)
+    ix = resample_indices(rng, 10, 20, size=6, replace=False)
+    assert ix.shape == (20, 6)
+    assert all(len(np.unique(row)) == 6 for row in ix)
+
+
+def test_confidence_interval():
+    replicates = np.random.default_rng(0).normal(1, .1, size=(500, 3))
+    lo, hi = confidence_interval(replicates)
+    blo, bhi = confidence_interval(replicates, estimate=np.ones(3), method='basic')
+    np.testing.assert_allclose(blo, 2 - hi)
+    np.testing.assert_allclose(bhi, 2 - lo)
+    with pytest.raises(ValueError):
+        confidence_interval(replicates, method='basic')
+    with pytest.raises(ValueError):
+        confidence_interval(replicates, method='bca')
+    with pytest.raises(ValueError):
+        bootstrap(np.ones((4, 2)), 'median', n_boot=2)
@@ -0,0 +1,30 @@
+# ====================================================================================== #
+# Tests for the build orchestrator's dependency ordering and up-to-date checks.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+
+from . import _build
+
+
+def test_build_plan(tmp_path, monkeypatch):
+    monkeypatch.setattr(_build, 'DATADR', str(tmp_path))
+    assert _build._ordered(['warren-by-court'], _build.targets()) == ['warren-votes',
+                                                                       'warren-by-court']
+
+    source = tmp_path / 'SCDB_2024_01_justiceCentered_Citation.csv'
+    source.write_text('caseId\n')
+    status = _build.build(dry_run=True)
+    # Only targets whose sources exist are selected by default.
+    assert status == {'scdb': 'would build'}
+
+    # Once the output exists and the manifest matches the source, the target is skipped.
+    os.makedirs(tmp_path / 'scotus_cache' / '2024')
+    _build._save_manifest({'scdb:2024': _build._source_fingerprints(_build.targets()['scdb'])})
+    assert _build.build(['scdb'], dry_run=True) == {'scdb': 'up to date'}
+    os.utime(source, ns=(0, 0))
+    assert _build.build(['scdb'], dry_run=True) == {'scdb': 'would build'}
+
+    # Dependents of a target without sources are skipped.
+    assert _build.build(['warren-by-court'], dry_run=True) == {
+        'warren-votes': 'missing sources', 'warren-by-court': 'skipped'}
@@ -0,0 +1,133 @@
+# ====================================================================================== #
+# Process-wide cache of loaded data: versioning by file fingerprint, LRU eviction under a
+# memory budget, read-only views and single loading under concurrent misses, and loads
+# shared by the data wrappers on a small synthetic data directory.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from . import _paths, scotus, states, synthetic
+from ._cache import LoadCache, cache_info, clear_cache
+
+
+def test_load_cache(tmp_path):
+    cache = LoadCache(max_memory=2000)
+    paths = [str(tmp_path / ('%d.npy' % i)) for i in range(3)]
+    for p in paths:
+        np.save(p, np.zeros(100))
+    calls = []
+
+    def loader(p):
+        def load():
+            calls.append(p)
+            return {'votes': np.load(p), 'frame': pd.DataFrame({'a': [1, 2]})}
+        return load
+
+    a = cache.get(paths[0], loader(paths[0]))
+    b = cache.get(paths[0], loader(paths[0]))
+    assert calls == [paths[0]] and cache.info()['hits'] == 1
+    # Values are shared but read-only, and containers are per caller.
+    assert np.shares_memory(a['votes'], b['votes']) and not a['votes'].flags.writeable
+    a['votes'] = None
+    a['frame']['b'] = 0
+    c = cache.get(paths[0], loader(paths[0]))
+    assert c['votes'] is not None and list(c['frame'].columns) == ['a']
+    # Options are part of the key.
+    cache.get(paths[0], loader(paths[0]), options='other')
+    assert calls == [paths[0]] * 2
+
+    # A changed file is read again.
+    np.save(paths[0], np.ones(101))
+    os.utime(paths[0], ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert cache.get(paths[0], loader(paths[0]))['votes'].sum() == 101
+
+    # Each entry holds ~800 bytes, so the least recently used one is dropped.
+    cache.clear()
+    for p in paths:
+        cache.get(p, loader(p))
+    assert cache.info()['entries'] == 2
+    del calls[:]
+    cache.get(paths[0], loader(paths[0]))
+    cache.get(paths[2], loader(paths[2]))
+    assert calls == [paths[0]]
+    cache.resize(0)
+    assert cache.info()['entries'] == 0
+
+
+def test_load_cache_concurrent(tmp_path):
+    cache = LoadCache()
+    path = str(tmp_path / 'x.npy')
+    np.save(path, np.arange(10))
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(.05)
+        return np.load(path)
+
+    with ThreadPoolExecutor(8) as pool:
+        out = list(pool.map(lambda _: cache.get(path, load), range(8)))
+    assert len(calls) == 1 and all(x is out[0] for x in out)
+
+    # A value too large to cache is still loaded once for the threads waiting on it.
+    del calls[:]
+    cache.resize(8)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: cache.get(path, load, 'big'), range(8)))
+    assert len(calls) == 1 and cache.info()['entries'] == 0
+
+
+def test_strings_are_not_sized_as_files(tmp_path):
+    big = tmp_path / 'AScalia'
+    np.save(big, np.zeros(10**5))
+    path = str(tmp_path / 'names.npy')
+    np.save(path, np.zeros(1))
+    cache = LoadCache(max_memory=10**5)
+    # A label naming a large file counts as a short string, so the entry fits the budget.
+    cache.get(path, lambda: [str(big) + '.npy', 'CThomas'])
+    assert cache.info()['entries'] == 1 and cache.info()['nbytes'] < 1000
+
+
+def test_missing_file_is_loaded_uncached(tmp_path):
+    cache = LoadCache()
+    assert cache.get(str(tmp_path / 'absent.npz'), lambda: 'fallback') == 'fallback'
+    with pytest.raises(FileNotFoundError, match='source.mat'):
+        cache.get(str(tmp_path / 'absent.npz'),
+                  lambda: open(str(tmp_path / 'source.mat'), 'rb'))
+    assert cache.info()['entries'] == 0
+
+
+def test_wrappers_share_loads(tmp_path, monkeypatch):
+    for module in (_paths, scotus, states):
+        monkeypatch.setattr(module, 'DATADR', str(tmp_path))
+    rng = np.random.default_rng(0)
+    synthetic.write_scdb(str(tmp_path), 200, rng)
+    synthetic.write_states(str(tmp_path), 50, rng)
+    states.setup_us_states()
+    clear_cache()
+
+    # A second instance reuses the first one's load.
+    votes = scotus.ScotusData().maj_vote_table()
+    misses = cache_info()['misses']
+    assert scotus.ScotusData().maj_vote_table().equals(votes)
+    table = states.State('CA').vote_table()
+    misses_states = cache_info()['misses']
+    assert misses_states > misses
+    assert states.State('CA').vote_table().equals(table)
+    assert cache_info()['misses'] == misses_states
+
+    # A rebuilt store is read again, including by instances opened before the rebuild.
+    old = states.State('CA')
+    states.setup_us_states()
+    assert states.State('CA').vote_table().equals(table)
+    assert cache_info()['misses'] > misses_states
+    assert old.vote_table().equals(table)
+    data = scotus.ScotusData(rebase=True)
+    misses = cache_info()['misses']
+    assert data.maj_vote_table().equals(votes) and cache_info()['misses'] > misses
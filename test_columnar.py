@@ -0,0 +1,85 @@
+# ====================================================================================== #
+# Tests for the columnar on-disk table format.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ._columnar import META_FILE, ColumnStore, ingest_csv, write_table
+
+
+def test_round_trip(tmp_path):
+    df = pd.DataFrame({'caseId': ['1946-001', '1946-001', None, '1947-002'],
+                       'term': [1946, 1946, 1946, 1947],
+                       'majority': [2., np.nan, 1., 2.],
+                       'score': [.5, -1.25, np.nan, 3.],
+                       'date': pd.to_datetime(['1946-11-18', None, '1946-12-09', '1947-01-06'])})
+    path = str(tmp_path / 'table')
+    write_table(path, df, meta={'source': 'x'})
+
+    store = ColumnStore(path)
+    assert store.meta == {'source': 'x'} and store.nrows == 4
+    # Integer codes are narrowed on disk, even when NaN forced them to float.
+    assert store.raw('term').dtype == np.int16
+    assert store.raw('majority').dtype == np.int8
+
+    out = store.to_frame()
+    assert out['caseId'].astype(object).tolist()[:2] == ['1946-001', '1946-001']
+    assert out['caseId'].isna().tolist() == [False, False, True, False]
+    assert out['term'].tolist() == df['term'].tolist()
+    np.testing.assert_array_equal(out['majority'].values, df['majority'].values)
+    np.testing.assert_array_equal(out['score'].values, df['score'].values)
+    assert out['date'].equals(df['date'].astype('datetime64[ns]'))
+
+
+def test_ingest_csv_in_chunks(tmp_path):
+    df = pd.DataFrame({'caseId': ['%d-%03d' % (1950 + i % 7, i) for i in range(500)][::-1],
+                       'dateDecision': ['11/%02d/1950' % (1 + i % 28) for i in range(500)],
+                       'majority': [np.nan if i % 11 == 0 else 1 + i % 2 for i in range(500)],
+                       'term': [1950 + i % 7 for i in range(500)],
+                       'extra': ['x%d' % (i % 3) for i in range(500)]})
+    source = str(tmp_path / 'votes.csv')
+    df.to_csv(source, index=False)
+    path = str(tmp_path / 'table')
+    schema = {'caseId': 'category', 'dateDecision': 'datetime', 'majority': 'int8',
+              'term': 'int16'}
+    # A tiny budget forces many chunks; categories must still come out globally sorted.
+    ingest_csv(source, path, schema, max_memory=2000, date_format='%m/%d/%Y')
+
+    out = ColumnStore(path).to_frame()
+    assert out['caseId'].astype(object).tolist() == df['caseId'].tolist()
+    assert list(out['caseId'].cat.categories) == sorted(df['caseId'])
+    assert out['dateDecision'].equals(pd.to_datetime(df['dateDecision'], format='%m/%d/%Y')
+                                      .astype('datetime64[ns]'))
+    np.testing.assert_array_equal(out['majority'].values, df['majority'].values)
+    assert out['term'].dtype == np.int16 and out['term'].tolist() == df['term'].tolist()
+    assert out['extra'].astype(object).tolist() == df['extra'].tolist()
+
+
+def test_publish_keeps_previous_version(tmp_path):
+    path = str(tmp_path / 'table')
+    write_table(path, pd.DataFrame({'a': [1, 2]}))
+    old = ColumnStore(path)
+    write_table(path, pd.DataFrame({'a': [3, 4, 5]}))
+    # A store opened before the swap still reads its own version.
+    assert old.to_frame()['a'].tolist() == [1, 2]
+    assert ColumnStore(path).to_frame()['a'].tolist() == [3, 4, 5]
+    write_table(path, pd.DataFrame({'a': [6]}))
+    assert META_FILE in os.listdir(path) and len(os.listdir(path)) == 3
+
+
+def test_failed_write_leaves_table(tmp_path):
+    path = str(tmp_path / 'table')
+    write_table(path, pd.DataFrame({'a': [1, 2]}))
+    with pytest.raises(OverflowError):
+        write_table(path, pd.DataFrame({'a': np.array([2**64 - 1], dtype=np.uint64)}))
+
+    source = str(tmp_path / 'votes.csv')
+    pd.DataFrame({'a': [1, 1000]}).to_csv(source, index=False)
+    with pytest.raises(ValueError):
+        ingest_csv(source, path, {'a': 'int8'})
+    assert ColumnStore(path).to_frame()['a'].tolist() == [1, 2]
+    assert len(os.listdir(path)) == 2
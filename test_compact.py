@@ -0,0 +1,33 @@
+# ====================================================================================== #
+# Tests for the compact int8 vote representation.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import numpy as np
+import pandas as pd
+import pytest
+
+from ._compact import CompactVotes
+
+
+def test_round_trip():
+    df = pd.DataFrame([[1, -1, np.nan], [0, np.nan, 1], [1, 1, 1]],
+                      index=pd.Index(['a', 'b', 'c'], name='case'),
+                      columns=pd.MultiIndex.from_product([['vote'], ['x', 'y', 'z']]), dtype=float)
+    votes = CompactVotes.from_frame(df)
+    assert votes.codes.dtype == np.int8 and votes.shape == (3, 3)
+    assert votes.missing.sum() == 2
+    pd.testing.assert_frame_equal(votes.to_frame(), df)
+    np.testing.assert_array_equal(np.asarray(votes.take([False, True, True])), df.values[1:])
+
+    # A sentinel code marks missing votes, as in the state tables.
+    votes = CompactVotes.from_array(np.array([[1, -1], [0, 3]]), missing_value=-1)
+    np.testing.assert_array_equal(votes.to_numpy(np.int64, -1), [[1, -1], [0, 3]])
+    # A full matrix carries no mask.
+    assert CompactVotes.from_array(np.ones((4, 9))).nbytes == 36
+
+    with pytest.raises(ValueError):
+        CompactVotes.from_array(np.array([.5, 1.]))
+    with pytest.raises(ValueError):
+        CompactVotes.from_array(np.array([300, 1]))
+    with pytest.raises(ValueError):
+        CompactVotes(np.ones((2, 3)), np.zeros((3, 2), dtype=bool))
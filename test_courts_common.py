@@ -0,0 +1,75 @@
+# ====================================================================================== #
+# Tests for the shared natural-court helpers on small hand-built vote matrices.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from ._courts_common import extract_natural_courts, full_court_vote_sets
+
+
+def test_extract_natural_courts():
+    # Two full cohorts ({0, 1, 2} and {1, 2, 3}) plus partial votes by subsets of each.
+    # Cohorts are ordered lexicographically by participation mask.
+    X = np.array([[1, 0, 1, -1],
+                  [0, 0, 1, -1],
+                  [-1, 1, 1, 0],
+                  [1, 1, -1, -1],
+                  [-1, 1, 0, 1],
+                  [-1, 0, 1, 1],
+                  [1, -1, -1, -1]])
+    assert extract_natural_courts(X, threshold_votes=None) == [([1, 2, 3], 3.), ([0, 1, 2], 2.)]
+    assert extract_natural_courts(X, threshold_votes=3) == [([1, 2, 3], 3.)]
+
+    # Without restricting to full votes, counts include every case in which the cohort
+    # voted, i.e. cases by any superset of its members.
+    courts = dict((tuple(nc), c) for nc, c in
+                  extract_natural_courts(X, only_full_votes=False, threshold_votes=None))
+    assert courts == {(0,): 4., (0, 1): 3., (0, 1, 2): 2., (1, 2, 3): 3.}
+
+    # Sparse input stores code + 1 and is equivalent to the dense matrix.
+    sparse = csr_matrix(X + 1)
+    assert extract_natural_courts(sparse, threshold_votes=None) == \
+        extract_natural_courts(X, threshold_votes=None)
+    assert extract_natural_courts(sparse, only_full_votes=False, threshold_votes=None) == \
+        extract_natural_courts(X, only_full_votes=False, threshold_votes=None)
+
+
+def _loop_full_court_vote_sets(df, court_size, min_votes, justice_name_fn):
+    """Reference row-by-row implementation that full_court_vote_sets replaced."""
+    full_votes_ix = np.where((np.isnan(df) == 0).sum(axis=1) == court_size)[0]
+    vote_strings = []
+    for i in full_votes_ix:
+        present = np.where(np.isnan(df.iloc[i, :]) == 0)[0]
+        vote_strings.append(' '.join(str(j) for j in present))
+    courts = []
+    for v in np.unique(vote_strings):
+        complete_votes = df.iloc[:, np.array([int(j) for j in v.split(' ')])].dropna()
+        if complete_votes.shape[0] > min_votes:
+            courts.append({'justices': [justice_name_fn(c) for c in complete_votes.columns],
+                           'votes': complete_votes.values})
+    return courts
+
+
+def test_full_court_vote_sets_matches_loop():
+    rng = np.random.default_rng(0)
+    # Mimic the HCJD layouts used by setup_canada/setup_india (9 of 12 justices, name_v1)
+    # and setup_australia (7 of 9 justices, v_name).
+    for court_size, n_justices, fmt, name_fn in [(9, 12, 'j%02d_v1', lambda c: c.split('_')[0]),
+                                                 (7, 9, 'v_j%02d', lambda c: c.split('_')[1])]:
+        cohorts = [rng.choice(n_justices, court_size, replace=False) for _ in range(6)]
+        votes = np.full((400, n_justices), np.nan)
+        for row in votes:
+            members = cohorts[rng.integers(len(cohorts))]
+            if rng.random() < .3:
+                members = members[:-1 - rng.integers(3)]
+            row[members] = rng.integers(0, 2, len(members))
+        df = pd.DataFrame(votes, columns=[fmt % j for j in range(n_justices)])
+
+        expected = _loop_full_court_vote_sets(df, court_size, 20, name_fn)
+        courts = full_court_vote_sets(df, court_size, 20, name_fn)
+        assert len(courts) == len(expected) > 0
+        for c, e in zip(courts, expected):
+            assert c['justices'] == e['justices']
+            np.testing.assert_array_equal(c['votes'], e['votes'])
@@ -1,7 +1,15 @@
 # ====================================================================================== #
-# Smoke tests for international high-court data access.
+# Smoke tests for international high-court data access, and the cohort store on
+# temporary data.
 # Author: Eddie Lee, edlee@alumni.princeton.edu
 # ====================================================================================== #
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from . import high_courts
 from .high_courts import HighCourt
 
 
@@ -11,3 +19,56 @@ def test_get_canada():
     # Each natural court is a dict of justices and a vote matrix sized to the court.
     for court in courts:
         assert court['votes'].shape[1] == len(court['justices'])
+
+
+def test_cohort_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(high_courts, 'DATADR', str(tmp_path))
+    rng = np.random.default_rng(0)
+    courts = [{'justices': ['a', 'b', 'c'], 'votes': rng.integers(0, 2, (5, 3)).astype(float)},
+              {'justices': ['a', 'b', 'd'], 'votes': np.zeros((0, 3), dtype=np.int8)},
+              {'justices': ['b', 'c', 'd'], 'votes': rng.integers(0, 2, (7, 3))}]
+    HighCourt.save_court('canada', courts)
+    assert os.listdir(tmp_path) == ['canada_full_court_votes.cohorts']
+
+    index = HighCourt.cohort_index('canada')
+    assert index['n_votes'].tolist() == [5, 0, 7]
+    assert index['justices'][2] == ('b', 'c', 'd') and (index['offset'] % 64 == 0).all()
+    for court, loaded in zip(courts, HighCourt.get_court('canada')):
+        assert loaded['justices'] == court['justices']
+        assert loaded['votes'].dtype == court['votes'].dtype
+        assert (loaded['votes'] == court['votes']).all()
+    cohort = HighCourt.get_cohort('canada', ['d', 'c', 'b'], compact=True)
+    assert list(cohort['votes'].columns) == ['b', 'c', 'd']
+    assert not HighCourt.get_cohort('canada', 0)['votes'].flags.writeable
+
+    # An open store keeps reading its version after the file is replaced; new reads see
+    # the new file.
+    store = HighCourt.store('canada')
+    HighCourt.save_court('canada', courts[:1])
+    assert len(store) == 3 and store.cohort(2)['votes'].shape == (7, 3)
+    assert len(HighCourt.get_court('canada')) == 1
+    with pytest.raises(ValueError):
+        HighCourt.get_cohort('canada', ['b', 'c', 'd'])
+
+
+def test_legacy_pickle(tmp_path, monkeypatch):
+    monkeypatch.setattr(high_courts, 'DATADR', str(tmp_path))
+    courts = [{'justices': ['a', 'b'], 'votes': np.ones((4, 2))}]
+    with open(tmp_path / 'india_full_court_votes.p', 'wb') as f:
+        pickle.dump({'courts': courts}, f)
+    assert HighCourt.store('india') is None
+    assert HighCourt.get_cohort('india', ['b', 'a'])['votes'].shape == (4, 2)
+    assert HighCourt.cohort_index('india')['offset'].tolist() == [-1]
+
+
+def test_cohort_labels_and_missing_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(high_courts, 'DATADR', str(tmp_path))
+    with pytest.raises(FileNotFoundError, match='australian_full_court_votes.p'):
+        HighCourt.store('australia')
+
+    # Numeric labels, e.g. HCJD justice codes, are read back as numbers.
+    courts = [{'justices': list(np.array([3, 1, 2])), 'votes': np.ones((2, 3))}]
+    HighCourt.save_court('australia', courts)
+    assert HighCourt.get_court('australia')[0]['justices'] == [3, 1, 2]
+    assert HighCourt.get_cohort('australia', [1, 2, 3])['votes'].shape == (2, 3)
+    assert not [f for f in os.listdir(tmp_path) if '.tmp-' in f]
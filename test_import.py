@@ -0,0 +1,48 @@
+# ====================================================================================== #
+# Import-time benchmark: importing the package must stay cheap and must not load the
+# numerical stack until a data class is used; listing states and resolving paths never
+# load it.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+import sys
+import json
+import subprocess
+
+from ._paths import LEGACY_PICKLE_DIR
+
+# Wall-clock budget (seconds) for a cold `import <package>`, excluding interpreter start-up.
+# An eager numpy/pandas import alone costs several hundred ms.
+IMPORT_BUDGET = 0.05
+HEAVY_MODULES = ('numpy', 'pandas', 'scipy')
+
+_SCRIPT = """
+import sys, time, json
+t0 = time.perf_counter()
+import {pkg}
+elapsed = time.perf_counter() - t0
+heavy = [m for m in {heavy!r} if m in sys.modules]
+states = {pkg}.list_possible_states()
+{pkg}.scdb_paths(year=2020)
+print(json.dumps({{'elapsed': elapsed, 'heavy': heavy, 'states': states,
+                  'heavy_after_use': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _run_import(data_dir):
+    here = os.path.dirname(os.path.abspath(__file__))
+    pkg = __name__.rpartition('.')[0] or os.path.basename(here)
+    out = subprocess.run([sys.executable, '-c', _SCRIPT.format(pkg=pkg, heavy=HEAVY_MODULES)],
+                         cwd=os.path.dirname(here), capture_output=True, text=True, check=True,
+                         env=dict(os.environ, SCOTUS_DATA_DIR=data_dir))
+    return json.loads(out.stdout)
+
+
+def test_import_is_lazy(tmp_path):
+    os.makedirs(tmp_path / LEGACY_PICKLE_DIR)
+    for state in ('CA', 'NY'):
+        open(tmp_path / LEGACY_PICKLE_DIR / ('%s.p' % state), 'w').close()
+    result = _run_import(str(tmp_path))
+    assert result['heavy'] == []
+    assert result['states'] == ['CA', 'NY'] and result['heavy_after_use'] == []
+    assert result['elapsed'] < IMPORT_BUDGET, result
@@ -0,0 +1,39 @@
+# ====================================================================================== #
+# Opt-in instrumentation: records only inside profile(), nesting and memory peaks.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import json
+
+import numpy as np
+
+from . import profiling
+from ._courts_common import extract_natural_courts
+
+
+def test_profile(tmp_path):
+    X = np.array([[0, 1, -1], [1, 1, -1], [0, 0, 1]])
+    n_before = len(profiling.records())
+    extract_natural_courts(X, threshold_votes=None)
+    with profiling.span('outside') as s:
+        assert s.output(X) is X
+    assert len(profiling.records()) == n_before
+
+    with profiling.profile(memory=True) as records:
+        with profiling.span('outer', source=str(tmp_path / 'missing')) as outer:
+            big = outer.output(np.ones(10**6))
+            extract_natural_courts(X, threshold_votes=None)
+        del big
+    assert [r['name'] for r in records] == ['_courts_common.extract_natural_courts', 'outer']
+    inner, outer = records
+    assert (inner['depth'], outer['depth']) == (1, 0)
+    assert outer['out_bytes'] == 8 * 10**6 and outer['shape'] == [10**6]
+    assert outer['in_bytes'] is None
+    assert outer['peak_bytes'] >= 8 * 10**6 > inner['peak_bytes']
+    assert outer['wall'] >= inner['wall']
+    assert not profiling.enabled()
+
+    report = profiling.report(records)
+    assert report.loc['outer', 'calls'] == 1
+    profiling.dump(str(tmp_path / 'prof.json'), records)
+    with open(tmp_path / 'prof.json') as f:
+        assert [r['name'] for r in json.load(f)['records']] == [r['name'] for r in records]
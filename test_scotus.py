@@ -2,7 +2,16 @@
 # Test module for loading modern SCOTUS voting data.
 # Author: Eddie Lee, edl56@cornell.edu
 # =============================================================================================== #
+import os
+import time
+
+import pytest
+
 from .scotus import *
+from . import scotus as scotus_module
+from . import profiling
+from ._cache import clear_cache
+from .scotus import _binarize_merit_votes, _fix_merit_votes, _shift_merit_votes
 
 def test_ScotusData():
     scotus = ScotusData()
@@ -14,3 +23,152 @@ def test_ScotusData():
     assert shape[0]==len(scotus.term_table())
     assert shape[0]==len(scotus.natural_court())
     assert shape[0]==len(scotus.issue_table())
+
+    # per-case metadata is aligned with the vote tables
+    meta = scotus.case_metadata()
+    assert meta.index.equals(scotus.vote_table().index)
+    assert (meta['term'].values==scotus.term_table()['term'].values).all()
+    assert not set(JUSTICE_COLUMNS) & set(meta.columns)
+
+def test_natural_court_votes():
+    scotus = ScotusData()
+
+    votes = scotus.natural_court_votes(justices=SECOND_REHNQUIST_COURT, sort_by=None)
+    assert votes.equals(scotus.second_rehnquist_court()[0])
+    assert len(votes)==909
+
+    # Every case in a natural court's record belongs to that court.
+    votes, case_ix = scotus.natural_court_votes(court_id=1706, n_voters=9, return_case_ix=True)
+    assert case_ix.sum()==len(votes)
+    assert (scotus.natural_court().values[case_ix]==1706).all()
+
+def test_MQ_score(tmp_path, monkeypatch):
+    from . import _paths, synthetic
+
+    for module in (_paths, scotus_module):
+        monkeypatch.setattr(module, 'DATADR', str(tmp_path))
+    synthetic.write_scdb(str(tmp_path), 50, np.random.default_rng(0))
+    scotus = ScotusData()
+    terms, scores = scotus.MQ_score('AScalia')
+    term, score = int(terms[3]), scores[3]
+
+    assert scotus.MQ_score('AScalia', term)==score
+    assert scotus.MQ_score('AScalia', float(term))==score
+    assert scotus.MQ_score('AScalia', np.int32(term))==score
+    assert np.array_equal(scotus.MQ_score(['AScalia', 'AScalia'], [term, term + 1.]),
+                          scores[3:5])
+    # names and years broadcast against each other
+    both = scotus.MQ_score(np.array(['AScalia', 'CThomas'])[:, None], terms[None, :2])
+    assert both.shape==(2, 2) and np.array_equal(both[0], scores[:2])
+    # array lookups of unknown pairs give NaN; single ones raise
+    assert np.isnan(scotus.MQ_score(['AScalia', 'Nobody'], [1700, term])).all()
+    with pytest.raises(ValueError):
+        scotus.MQ_score('AScalia', 1700)
+    with pytest.raises(KeyError):
+        scotus.MQ_score('Nobody', term)
+    with pytest.raises(ValueError):
+        scotus.MQ_score('AScalia', term + .5)
+    with pytest.raises(ValueError):
+        scotus.MQ_score(['AScalia'], [np.nan])
+
+def test_case_metadata_without_justice_names(tmp_path, monkeypatch):
+    from . import _paths, synthetic
+
+    for module in (_paths, scotus_module):
+        monkeypatch.setattr(module, 'DATADR', str(tmp_path))
+    synthetic.write_scdb(str(tmp_path), 50, np.random.default_rng(0))
+    scotus = ScotusData()
+    table = scotus.table.copy()
+    # The last case has no named justices; its metadata must still be its own.
+    last = table['caseId'].values[-1]
+    table.loc[table['caseId']==last, 'justiceName'] = np.nan
+    scotus.table = table
+
+    term = scotus.term_table()['term']
+    assert term[last]==table.loc[table['caseId']==last, 'term'].iloc[0]
+    assert term[last]!=table['term'].iloc[0]
+    assert scotus.maj_vote_table().loc[last].isna().all()
+    votes, case_ix = scotus.natural_court_votes(court_id=1802, n_voters=9,
+                                                return_case_ix=True)
+    assert (scotus.natural_court().values[case_ix]==1802).all()
+
+def test_merit_votes():
+    # rounds 1 and 3 of case 0 and rounds 0, 2, 3, 4 of case 1 were held
+    present = np.array([[0, 1, 0, 1, 0], [1, 0, 1, 1, 1]], dtype=bool)
+    raw = np.empty((2, 5, 2), dtype=object)
+    raw[0, 1], raw[0, 3] = [1., '2.0'], ['grant/reverse', 'nan']
+    raw[1, 0], raw[1, 2], raw[1, 3], raw[1, 4] = [2, 2], [1, 1], ['deny/affirm', 1], [1, 1]
+
+    raw, present = _shift_merit_votes(raw, present)
+    assert present.tolist() == [[True, True, False], [True, True, True]]
+    votes = _binarize_merit_votes(_fix_merit_votes(raw), present)
+    assert votes.dtype == np.int8
+    assert votes.tolist() == [[[1, -1], [1, 0], [0, 0]], [[-1, -1], [1, 1], [-1, 1]]]
+
+def test_conference_report_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(scotus_module, 'DATADR', str(tmp_path))
+    rng = np.random.default_rng(0)
+    by_kind = {kind: {} for kind in scotus_module._WARREN_KINDS}
+    justices = {'A': np.array(['war', 'blk']), 'B': np.array(['blk', 'doug'])}
+    for court in justices:
+        for kind in ('confVotes', 'confIdeVotes', 'rptVotes', 'rptIdeVotes'):
+            by_kind[kind][court] = rng.choice([-1, 1], size=(5, 2))
+        by_kind['mrtVotes'][court] = rng.choice([-1, 0, 1], size=(5, 3, 2)).astype(np.int8)
+        by_kind['mrtPresent'][court] = rng.random((5, 3)) < .5
+    scotus_module._write_warren_by_court(by_kind, justices, {'A': [0, 1], 'B': [1, 2]})
+
+    votes = ConferenceReportVotes()
+    assert votes.courts == ['A', 'B']
+    conf, report, merits = votes.conference_and_report('B', include_extra_merits=True)
+    assert np.array_equal(conf, by_kind['confIdeVotes']['B'])
+    assert np.array_equal(merits, by_kind['mrtVotes']['B'])
+    assert list(votes.justices_by_court['B']) == ['blk', 'doug']
+
+    # Rewriting publishes a new version; an instance opened before keeps its matrices.
+    path = tmp_path / scotus_module.WARREN_BY_COURT_DIR
+    old = votes.conference_and_report('A')[0]
+    by_kind['confIdeVotes']['A'] = -by_kind['confIdeVotes']['A']
+    scotus_module._write_warren_by_court(by_kind, justices, {'A': [0, 1], 'B': [1, 2]})
+    assert np.array_equal(ConferenceReportVotes().conference_and_report('A')[0],
+                          by_kind['confIdeVotes']['A'])
+    assert np.array_equal(old, -by_kind['confIdeVotes']['A'])
+    assert not [f for f in os.listdir(path) if f.startswith('tmp-')]
+
+    # A failed write leaves the published store in place.
+    by_kind['confVotes']['B'] = np.array([None])
+    with pytest.raises(ValueError):
+        scotus_module._write_warren_by_court(by_kind, justices, {'A': [0, 1], 'B': [1, 2]})
+    assert np.array_equal(ConferenceReportVotes().conference_and_report('A')[0],
+                          by_kind['confIdeVotes']['A'])
+    assert not [f for f in os.listdir(path) if f.startswith('tmp-')]
+
+def test_load_all_conference_report_votes(tmp_path, monkeypatch):
+    import scipy.io as sio
+
+    monkeypatch.setattr(scotus_module, 'DATADR', str(tmp_path))
+    rng = np.random.default_rng(0)
+    for name in COURT_NAMES:
+        sio.savemat(str(tmp_path / ('%s_confra_idevotes.mat' % name)),
+                    {'confvotes_all': rng.choice([-1, 0, 1], size=(20, 9)),
+                     'finvotes_all': rng.choice([-1, 0, 1], size=(20, 9))})
+    votes = ScotusData.load_all_conference_report_votes()
+    assert list(votes) == COURT_NAMES
+
+    # Later loads read the sidecars without parsing the .mat files.
+    def no_loadmat(*args, **kwargs):
+        raise AssertionError("MATLAB file parsed again.")
+    monkeypatch.setattr(sio, 'loadmat', no_loadmat)
+    # The np.load span covers reading the sidecar.
+    load = np.load
+    def slow_load(*args, **kwargs):
+        time.sleep(.01)
+        return load(*args, **kwargs)
+    monkeypatch.setattr(np, 'load', slow_load)
+    clear_cache()
+    with profiling.profile() as records:
+        again = ScotusData.load_all_conference_report_votes()
+    for name in COURT_NAMES:
+        for x, y in zip(votes[name], again[name]):
+            assert np.array_equal(x, y, equal_nan=True)
+    loads = [r for r in records if r['name']=='np.load']
+    assert len(loads)==len(COURT_NAMES) and min(r['wall'] for r in loads)>=.01
@@ -0,0 +1,68 @@
+# ====================================================================================== #
+# Shared-memory publication of compact votes and metadata, attached from a worker pool.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ._compact import CompactVotes
+from .shared import attach_votes, detach_votes, share_votes
+
+
+def _worker_sum(handle):
+    court = attach_votes(handle)
+    return (float(np.nansum(court.votes.to_numpy())), court.metadata['term'].sum(),
+            court.votes.codes.flags.writeable)
+
+
+def test_share_votes():
+    rng = np.random.default_rng(0)
+    X = rng.choice([1., 2., np.nan], size=(50, 9))
+    index = pd.Index(['case%d' % i for i in range(50)], name='caseId')
+    columns = pd.MultiIndex.from_product([['majority'], list('abcdefghi')],
+                                         names=[None, 'justiceName'])
+    votes = CompactVotes.from_array(X, index=index, columns=columns)
+    meta = pd.DataFrame({'term': pd.array(rng.integers(1990, 2000, 50), dtype='Int16'),
+                         'issueArea': pd.Categorical(rng.choice(['x', 'y'], 50)),
+                         'date': pd.date_range('2000-01-01', periods=50),
+                         'score': rng.normal(size=50)}, index=index)
+    meta.loc['case3', 'term'] = pd.NA
+
+    with share_votes(votes, meta) as handle:
+        assert len(pickle.dumps(handle)) < 2000
+        court = attach_votes(handle)
+        assert attach_votes(handle) is court
+        pd.testing.assert_frame_equal(court.votes.to_frame(), votes.to_frame())
+        pd.testing.assert_frame_equal(court.metadata, meta)
+        with ProcessPoolExecutor(2) as pool:
+            out = list(pool.map(_worker_sum, [handle] * 4))
+        assert out == [(float(np.nansum(X)), meta['term'].sum(), False)] * 4
+        del court
+        detach_votes(handle)
+
+
+def test_share_metadata_types():
+    index = pd.Index(['a', None, 'c'], name='caseId')
+    meta = pd.DataFrame({'name': pd.array(['x', None, 'z'], dtype='str'),
+                         'note': pd.Series(['p', None, 'q'], dtype=object).values,
+                         'when': pd.to_datetime(['2000-01-01', None, '2000-03-01'])
+                         .tz_localize('US/Eastern'),
+                         'share': pd.array([.5, None, .25], dtype='Float64')}, index=index)
+    votes = CompactVotes.from_array(np.ones((3, 2)), index=index)
+
+    with share_votes(votes, meta) as handle:
+        court = attach_votes(handle)
+        pd.testing.assert_frame_equal(court.metadata, meta)
+        assert court.metadata['name'].isna().tolist() == [False, True, False]
+        assert court.votes.index.isna().tolist() == [False, True, False]
+        del court
+        detach_votes(handle)
+
+    with pytest.raises(TypeError):
+        share_votes(votes, pd.DataFrame({'obj': [1, 'a', None]}, index=index))
+    with pytest.raises(TypeError):
+        CompactVotes.from_parts(np.zeros(3))
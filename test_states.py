@@ -1,6 +1,12 @@
 # Wrapper for loading US state Supreme Court data.
 # Author: Eddie Lee, edlee@alumni.princeton.edu
+import os
+
+import numpy as np
+import pandas as pd
+
 from .states import *
+from . import states, _paths, synthetic
 
 
 def test_State():
@@ -10,3 +16,107 @@ def test_State():
     # votes across cohorts must equal the number of cases with full participation.
     natCourts = state.extract_nat_courts(v, threshold_votes=None)
     assert sum([i[1] for i in natCourts])==((v>-1).values.sum(1)==len(natCourts[0][0])).sum()
+
+
+def _use_data_dir(monkeypatch, path):
+    for module in (_paths, states):
+        monkeypatch.setattr(module, 'DATADR', str(path))
+
+
+def test_state_store(tmp_path, monkeypatch):
+    """The consolidated store gives the same tables as the per-state pickles it replaces."""
+    store_dir, pickle_dir = tmp_path / 'store', tmp_path / 'pickles'
+    os.makedirs(store_dir)
+    os.makedirs(pickle_dir / LEGACY_PICKLE_DIR)
+    synthetic.write_states(str(store_dir), 30, np.random.default_rng(0))
+    master = pd.read_pickle(store_dir / 'state_supreme_court_v2.p')
+    # Missing names, as read from Stata files with empty slots as NaN.
+    master.loc[master.index[::7], 'J2_Name'] = np.nan
+    master.to_pickle(store_dir / 'state_supreme_court_v2.p')
+    for state, rows in master.groupby('state'):
+        rows.to_pickle(pickle_dir / LEGACY_PICKLE_DIR / ('%s.p' % state))
+
+    _use_data_dir(monkeypatch, store_dir)
+    setup_us_states()
+    store = states._open_store()
+    offsets = store.meta['offsets']
+    assert list_possible_states() == sorted(master['state'].unique())
+    assert sum(b - a for a, b in offsets.values()) == len(master)
+    for state, (start, stop) in offsets.items():
+        assert stop - start == (master['state'] == state).sum()
+        rows = store.to_frame(['LexisNexisCitationNumber'], start, stop)
+        assert rows['LexisNexisCitationNumber'].str.startswith(state).all()
+    assert 'nan' not in store.to_frame(['J2_Name'])['J2_Name'].cat.categories
+
+    tables = {s: (State(s).vote_table(), State(s).vote_table(return_code=True),
+                  State(s).vote_table(clean=False)) for s in ('CA', 'MD', 'NY')}
+    _use_data_dir(monkeypatch, pickle_dir)
+    assert State('CA').store is None
+    for state, (table, by_code, raw) in tables.items():
+        assert 'nan' not in table.columns
+        assert table.equals(State(state).vote_table())
+        assert by_code.equals(State(state).vote_table(return_code=True))
+        assert raw.equals(State(state).vote_table(clean=False))
+
+
+def _pivot_vote_table(df, state, clean=True, return_code=False, return_year=False):
+    """State.vote_table as originally built, by melting the slots and pivoting."""
+    label_col, label_key = ('J%d_Code', 'code') if return_code else ('J%d_Name', 'name')
+    subtables = []
+    for i in range(1, N_JUSTICE_SLOTS + 1):
+        cols = ['LexisNexisCitationNumber', 'Year', 'J%d_Vote' % i, label_col % i]
+        sub = df.loc[:, cols]
+        sub.columns = ['citation', 'year', 'vote', label_key]
+        subtables.append(sub)
+    fullTable = pd.concat(subtables, axis=0)
+    if not return_code:
+        for wrong, right in states._NAME_FIXES.get(state, {}).items():
+            fullTable.loc[(fullTable[label_key] == wrong).values, label_key] = right
+    # Slots without a label are dropped, as documented by vote_table.
+    fullTable = fullTable[fullTable[label_key].notna()]
+
+    voteTable = pd.pivot_table(fullTable, columns=label_key, index='citation',
+                               values='vote', fill_value=NO_DATA)
+    if not return_code:
+        voteTable = voteTable.loc[:, voteTable.columns != '']
+    # Repeated citations average to a non-code value where their votes differ.
+    voteTable[(voteTable != np.round(voteTable)).values] = NO_DATA
+    if not clean:
+        return voteTable
+    voteTable[((voteTable != MINORITY) & (voteTable != MAJORITY)).values] = NO_DATA
+    if return_year:
+        return voteTable, pd.pivot_table(fullTable, index='citation', values='year')
+    return voteTable
+
+
+def _assert_same_table(table, expected):
+    assert list(table.index) == list(expected.index)
+    assert list(table.columns) == list(expected.columns)
+    assert (table.values == expected.values).all()
+
+
+def test_vote_table_matches_pivot(tmp_path, monkeypatch):
+    """The factorize-and-scatter build matches the pivot_table one, densely and sparsely."""
+    os.makedirs(tmp_path / LEGACY_PICKLE_DIR)
+    synthetic.write_states(str(tmp_path), 60, np.random.default_rng(1))
+    master = pd.read_pickle(tmp_path / 'state_supreme_court_v2.p')
+    for state in ('CA', 'MD'):
+        master[master['state'] == state].to_pickle(tmp_path / LEGACY_PICKLE_DIR /
+                                                   ('%s.p' % state))
+    _use_data_dir(monkeypatch, tmp_path)
+
+    for state in ('CA', 'MD'):
+        df = master[master['state'] == state]
+        for kwargs in ({}, {'return_code': True}, {'clean': False},
+                       {'clean': False, 'return_code': True}):
+            expected = _pivot_vote_table(df, state, **kwargs)
+            _assert_same_table(State(state).vote_table(**kwargs), expected)
+            _assert_same_table(State(state).vote_table(sparse=True, **kwargs).to_frame(),
+                               expected)
+
+        table, year = State(state).vote_table(return_year=True)
+        expected, expected_year = _pivot_vote_table(df, state, return_year=True)
+        _assert_same_table(table, expected)
+        assert np.allclose(year['year'].values, expected_year['year'].values)
+    # Maryland's misspelled justice is merged into the corrected name.
+    assert 'J. Murphy' in State('MD').vote_table().columns
@@ -0,0 +1,46 @@
+# ====================================================================================== #
+# Synthetic data and the benchmark runner, on a small generated data directory.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import os
+
+import pandas as pd
+import pytest
+
+from . import bench
+from .synthetic import generate
+from .scotus import SCDB_SCHEMA
+
+
+def test_generate(tmp_path):
+    sizes = generate(str(tmp_path), scale=.02)
+    scdb = pd.read_csv(tmp_path / 'SCDB_2024_01_justiceCentered_Citation.csv',
+                       encoding='latin1')
+    assert list(scdb.columns) == list(SCDB_SCHEMA)
+    assert scdb['caseId'].nunique() == sizes['scdb']
+    assert (scdb.groupby('caseId').size() == 9).all()
+    assert os.path.isfile(tmp_path / 'original_data_files' / 'HCJD_India.dta')
+
+    master = pd.read_pickle(tmp_path / 'state_supreme_court_v2.p')
+    assert master['state'].nunique() == 52
+
+
+def test_bench(tmp_path):
+    results = bench.run(['State.vote_table', 'HighCourt.get_court'], data_dir=str(tmp_path),
+                        scale=.02, repeat=1, disp=False)
+    assert [r['name'] for r in results] == ['State.vote_table', 'HighCourt.get_court']
+    assert all(r['best'] > 0 and r['peak_mb'] >= 0 for r in results)
+
+    slower = [dict(r, best=r['best'] * 2) for r in results]
+    assert [r[0] for r in bench.compare(slower, results)] == ['State.vote_table',
+                                                             'HighCourt.get_court']
+    assert bench.compare(results, slower) == []
+
+
+def test_prepare_reports_failed_builds(tmp_path):
+    generate(str(tmp_path), scale=.02)
+    # A corrupt source fails its build target.
+    with open(tmp_path / 'original_data_files' / 'HCJD_Canada.dta', 'wb') as f:
+        f.write(b'not a Stata file')
+    with pytest.raises(RuntimeError, match=r'canada \(failed\)'):
+        bench.prepare(str(tmp_path))
@@ -0,0 +1,60 @@
+# ====================================================================================== #
+# Tests for the pairwise voting statistics against per-pair loops.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from ._compact import CompactVotes
+from .vote_stats import natural_court_stats, pair_stats
+
+
+def _loop_correlation(X, lo, hi):
+    n = X.shape[1]
+    corr = np.full((n, n), np.nan)
+    for i in range(n):
+        for j in range(n):
+            both = np.isin(X[:, i], [lo, hi]) & np.isin(X[:, j], [lo, hi])
+            if both.any():
+                corr[i, j] = (np.where(X[both, i] == hi, 1, -1) *
+                              np.where(X[both, j] == hi, 1, -1)).mean()
+    return corr
+
+
+def test_pair_stats():
+    rng = np.random.default_rng(0)
+    X = rng.choice([-1, 0, 1, 2], size=(200, 6), p=[.3, .3, .3, .1])
+    X[:, 5] = -1  # a justice with no votes
+    stats = pair_stats(X, codes=(0, 1), labels=list('abcdef'))
+
+    corr = _loop_correlation(X, 0, 1)
+    np.testing.assert_allclose(stats['correlation'].values, corr)
+    np.testing.assert_allclose(stats['agreement'].values, (1 + corr) / 2)
+    assert stats['n'].loc['a', 'b'] == (np.isin(X[:, 0], [0, 1]) &
+                                         np.isin(X[:, 1], [0, 1])).sum()
+    assert np.isnan(stats['mean']['f'])
+
+    # Dense NaN-coded, compact and sparse inputs agree.
+    dense = np.where(X == -1, np.nan, X)
+    sparse = pair_stats(csr_matrix(X + 1), codes=(0, 1), labels=list('abcdef'))
+    compact = pair_stats(CompactVotes.from_array(dense), codes=(0, 1), labels=list('abcdef'))
+    for other in (sparse, compact):
+        pd.testing.assert_frame_equal(other['connected_correlation'],
+                                      stats['connected_correlation'])
+
+
+def test_natural_court_stats():
+    X = np.array([[1, -1, 1, -1],
+                  [-1, -1, 1, 1],
+                  [1, 1, -1, np.nan],
+                  [1, -1, -1, np.nan]])
+    courts = natural_court_stats(X, labels=list('abcd'), threshold_votes=None)
+    assert [(c['justices'], c['n_votes']) for c in courts] == [(['a', 'b', 'c', 'd'], 2)]
+    np.testing.assert_allclose(courts[0]['correlation'].values,
+                               _loop_correlation(X[:2], -1, 1))
+
+    courts = natural_court_stats(X, labels=list('abcd'), only_full_votes=False,
+                                 threshold_votes=None)
+    assert [(c['justices'], c['n_votes']) for c in courts] == [(['a', 'b', 'c'], 4),
+                                                              (['a', 'b', 'c', 'd'], 2)]
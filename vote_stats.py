@@ -0,0 +1,156 @@
+# ====================================================================================== #
+# Pairwise voting statistics (agreement rates, correlations and co-participation counts)
+# for whole courts and for each of their natural courts. Votes are mapped to spins
+# s = +/-1, with 0 for missing votes, so that every pairwise statistic follows from a few
+# masked matrix products instead of loops over pairs of justices.
+# Author: Eddie Lee, edlee@alumni.princeton.edu
+# ====================================================================================== #
+import numpy as np
+import pandas as pd
+
+from ._compact import CompactVotes, SparseVotes
+from ._courts_common import extract_natural_courts
+
+
+def to_spins(X, codes):
+    """Map a vote matrix onto spins.
+
+    Parameters
+    ----------
+    X : ndarray, pd.DataFrame, CompactVotes, SparseVotes or scipy.sparse matrix
+        Sparse matrices store each vote code plus one, as State.vote_table(sparse=True).
+    codes : tuple
+        (lo, hi) vote codes mapped to -1 and +1. Any other value is a missing vote.
+
+    Returns
+    -------
+    s : ndarray or scipy.sparse.csr_matrix
+        Spins, 0 where the vote is missing.
+    p : ndarray or scipy.sparse.csr_matrix
+        1 where a vote is present.
+    labels : pd.Index or None
+        Column labels of X.
+    """
+    lo, hi = codes
+    labels = None
+    if isinstance(X, (SparseVotes, CompactVotes)):
+        labels = X.columns
+        X = X.matrix if isinstance(X, SparseVotes) else X.to_numpy()
+    elif isinstance(X, pd.DataFrame):
+        labels = X.columns
+        X = X.values
+
+    if hasattr(X, 'tocsr'):
+        s = X.tocsr().astype(np.float64)
+        code = s.data - 1
+        s.data = np.where(code == hi, 1., np.where(code == lo, -1., 0.))
+        s.eliminate_zeros()
+        p = s.copy()
+        p.data = np.abs(p.data)
+        return s, p, labels
+
+    X = np.asarray(X, dtype=float)
+    s = np.where(X == hi, 1., np.where(X == lo, -1., 0.))
+    return s, (s != 0).astype(float), labels
+
+
+def densify(m):
+    """Dense ndarray of a scipy.sparse matrix or array-like, e.g. the output of to_spins."""
+    return m.toarray() if hasattr(m, 'toarray') else np.asarray(m)
+
+
+def _pair_stats(s, p, labels):
+    """pair_stats from spins and the presence mask."""
+    n = densify(p.T @ p)
+    ss = densify(s.T @ s)
+    sp = densify(s.T @ p)  # sp[i, j]: sum of i's spins over cases where j voted
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = ss / n
+        # <s_i> over the cases in which both i and j voted
+        pair_mean = sp / n
+        mean = np.diag(sp) / np.diag(n)
+    connected = corr - pair_mean * pair_mean.T
+
+    if labels is None:
+        labels = pd.RangeIndex(n.shape[0])
+
+    def frame(m):
+        return pd.DataFrame(m, index=labels, columns=labels)
+    return {'n': frame(n.astype(np.int64)),
+            'agreement': frame((1 + corr) / 2),
+            'correlation': frame(corr),
+            'connected_correlation': frame(connected),
+            'mean': pd.Series(mean, index=labels)}
+
+
+def pair_stats(X, codes=(-1, 1), labels=None):
+    """Pairwise statistics over every pair of justices, each computed over the cases in
+    which both voted.
+
+    Parameters
+    ----------
+    X : ndarray, pd.DataFrame, CompactVotes, SparseVotes or scipy.sparse matrix
+        Case x justice votes from any of the accessors. Sparse matrices store code + 1.
+    codes : tuple, (-1, 1)
+        (lo, hi) vote codes mapped to spins -1 and +1; every other value, including NaN,
+        is a missing vote. E.g. (1, 2) for the SCDB majority and direction tables and
+        (0, 1) for the state tables.
+    labels : list, None
+        Justice labels. By default the columns of X, if any.
+
+    Returns
+    -------
+    dict
+        'n': co-participation counts (diagonal: votes per justice).
+        'agreement': fraction of co-voted cases in which the pair voted alike.
+        'correlation': <s_i s_j>.
+        'connected_correlation': <s_i s_j> - <s_i><s_j>, means taken over the same cases.
+        'mean': <s_i> per justice (pd.Series).
+        Pairs that never voted together are NaN.
+    """
+    s, p, columns = to_spins(X, codes)
+    return _pair_stats(s, p, columns if labels is None else pd.Index(labels))
+
+
+def natural_court_stats(X, codes=(-1, 1), labels=None, only_full_votes=True,
+                        threshold_votes='default'):
+    """pair_stats for each natural court, over the cases in which all of its members voted.
+
+    Natural courts are the cohorts found by _courts_common.extract_natural_courts on the
+    votes that map onto spins (votes with other codes, such as recusals, do not count as
+    participation).
+
+    Parameters
+    ----------
+    X : ndarray, pd.DataFrame, CompactVotes, SparseVotes or scipy.sparse matrix
+    codes : tuple, (-1, 1)
+        See pair_stats.
+    labels : list, None
+        See pair_stats.
+    only_full_votes : bool, True
+        See extract_natural_courts.
+    threshold_votes : int or 'default', 'default'
+        See extract_natural_courts.
+
+    Returns
+    -------
+    list of dict
+        The output of pair_stats for each court, plus 'justices' (labels of its members)
+        and 'n_votes' (number of cases).
+    """
+    s, p, columns = to_spins(X, codes)
+    labels = columns if labels is None else pd.Index(labels)
+    if labels is None:
+        labels = pd.RangeIndex(s.shape[1])
+
+    # Participation coded for extract_natural_courts: code 0 present, -1 absent.
+    participation = p if hasattr(p, 'tocsr') else p.astype(np.int8) - 1
+    courts = []
+    for members, count in extract_natural_courts(participation,
+                                                 only_full_votes=only_full_votes,
+                                                 threshold_votes=threshold_votes):
+        rows = np.where(np.asarray(p[:, members].sum(1)).ravel() == len(members))[0]
+        court = _pair_stats(s[rows][:, members], p[rows][:, members], labels[members])
+        court.update({'justices': list(labels[members]), 'n_votes': int(count)})
+        courts.append(court)
+    return courts